@@ -5,6 +5,7 @@ import logging
 from dotenv import load_dotenv
 
 from .config import Config
+from .shard import run_sharded
 from .telegram import JackBot
 
 
@@ -15,6 +16,9 @@ def main() -> None:
         format="%(asctime)s  %(name)s  %(levelname)s  %(message)s",
     )
     config = Config.from_env()
+    if config.workers > 1:
+        run_sharded(config)
+        return
     bot = JackBot(config)
     bot.run()
 
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
 import time
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
 from typing import Any, TYPE_CHECKING
 
 import httpx
 
+from . import deadline
+from .context import ContextBudget
+from .llm import ChatClient, TextHook
+from .projection import encode_result
+
 if TYPE_CHECKING:
     from .router import ForestBackend
 
@@ -39,7 +47,7 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "forest_read",
-            "description": "Read a Forest node's full body by UUID prefix.",
+            "description": "Read a Forest node's full body by UUID prefix. Long bodies are returned in pages; follow the truncation note's offset to continue.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -47,6 +55,10 @@ TOOLS = [
                         "type": "string",
                         "description": "UUID prefix (4+ characters) of the node to read.",
                     },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Character offset into the body to start from (default 0).",
+                    },
                 },
                 "required": ["ref"],
             },
@@ -103,7 +115,7 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "forest_synthesize",
-            "description": "Synthesize a new article from 2+ existing nodes using GPT-5. Takes node UUID prefixes, calls the Forest server's LLM to produce a synthesis, and saves it as a new node. This is slow (30-90s).",
+            "description": "Synthesize a new article from 2+ existing nodes using GPT-5. Takes node UUID prefixes; the Forest server's LLM writes a synthesis and saves it as a new node. Runs as a background job (30-90s): returns a job_id immediately, and the user gets a message with the new node when it is done.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -120,8 +132,32 @@ TOOLS = [
 ]
 
 MAX_ROUNDS = 10
+# Sent when the model's final message has no text
+EMPTY_ANSWER = "I couldn't put together an answer. Try rephrasing your question?"
 MAX_REPEAT = 3
 TOTAL_TIMEOUT = 120.0
+# Seconds held back from rounds and tools for a final answer from what's been found
+FINAL_RESERVE = 15.0
+DEFAULT_TOKEN_BUDGET = 24_000
+
+# Max in-flight calls per tool across all agent runs
+TOOL_CONCURRENCY = {
+    "forest_search": 4,
+    "forest_read": 8,
+    "forest_capture": 2,
+    "forest_stats": 2,
+    "forest_tags": 2,
+    "forest_synthesize": 1,
+}
+
+# Speculative reads of search hits: per search, and per run
+PREFETCH_TOP_N = 3
+PREFETCH_MAX = 9
+
+_PARTIAL_NOTE = (
+    "[Out of {reason}. Don't call any more tools: answer now from what you "
+    "have found so far, and say briefly what you didn't get to.]"
+)
 
 ToolHook = Callable[[int, str, dict[str, Any]], Awaitable[None]]
 
@@ -139,7 +175,7 @@ def _tool_label(name: str, args: dict[str, Any]) -> str:
         case "forest_tags":
             return "Listing tags"
         case "forest_synthesize":
-            return "Synthesizing (this may take a moment)"
+            return "Starting a synthesis job"
         case _:
             return name
 
@@ -147,7 +183,7 @@ def _tool_label(name: str, args: dict[str, Any]) -> str:
 async def _dispatch_tool(
     name: str, args: dict[str, Any], forest: ForestBackend,
 ) -> str:
-    """Call the appropriate ForestBackend method and return JSON result."""
+    """Call the appropriate ForestBackend method and return its projected JSON result."""
     match name:
         case "forest_search":
             result = await forest.search(args["query"], limit=args.get("limit", 5))
@@ -167,7 +203,119 @@ async def _dispatch_tool(
             result = await forest.synthesize(args["node_ids"])
         case _:
             return json.dumps({"error": f"Unknown tool: {name}"})
-    return json.dumps(result, default=str)
+    return encode_result(name, result, args)
+
+
+@dataclass
+class TierStats:
+    """Cumulative latency and token usage of one model tier."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    escalations: int = 0
+
+    def record(self, seconds: float, usage: dict[str, Any] | None) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        if usage:
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+_REQUIRED_ARGS = {
+    t["function"]["name"]: t["function"]["parameters"].get("required", [])
+    for t in TOOLS
+}
+
+
+def _invalid_tool_calls(tool_calls: list[dict[str, Any]]) -> str | None:
+    """Return why a round's tool calls are unusable, or None if they look valid."""
+    for tc in tool_calls:
+        fn = tc.get("function") or {}
+        name = fn.get("name", "")
+        if name not in _REQUIRED_ARGS:
+            return f"unknown tool {name!r}"
+        try:
+            args = json.loads(fn.get("arguments") or "{}")
+        except json.JSONDecodeError:
+            return f"malformed arguments for {name}"
+        if not isinstance(args, dict):
+            return f"malformed arguments for {name}"
+        missing = [a for a in _REQUIRED_ARGS[name] if a not in args]
+        if missing:
+            return f"{name} missing {', '.join(missing)}"
+    return None
+
+
+class _Prefetcher:
+    """ForestBackend wrapper that speculatively reads the top hits of each search.
+
+    Reads start as soon as a search result arrives, so the forest_read calls
+    of the next round usually resolve from memory. Bounded per run, and
+    cancelled when the run finishes. Each read takes a slot of ``limit``
+    (the bot-wide forest_read limit) like a real one.
+    """
+
+    def __init__(
+        self,
+        forest: ForestBackend,
+        limit: asyncio.Semaphore | None = None,
+        top_n: int = PREFETCH_TOP_N,
+        max_reads: int = PREFETCH_MAX,
+    ) -> None:
+        self._forest = forest
+        self._limit = limit or contextlib.nullcontext()
+        self._top_n = top_n
+        self._max_reads = max_reads
+        self._reads: dict[str, asyncio.Task] = {}  # full node id -> read task
+        self._started: set[str] = set()  # ids whose read holds a slot
+
+    async def _prefetch(self, node_id: str) -> dict[str, Any]:
+        async with self._limit:
+            self._started.add(node_id)
+            return await self._forest.read(node_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._forest, name)
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        result = await self._forest.search(query, limit=limit)
+        for hit in result.get("results", [])[: self._top_n]:
+            node_id = hit.get("id")
+            if not node_id or node_id in self._reads:
+                continue
+            if len(self._reads) >= self._max_reads:
+                break
+            task = asyncio.create_task(self._prefetch(node_id))
+            # Failures are retried by the real read; don't log them as unretrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._reads[node_id] = task
+        return result
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        matches = [nid for nid in self._reads if nid.startswith(ref)]
+        if len(ref) >= 4 and len(matches) == 1:
+            node_id = matches[0]
+            if node_id not in self._started:
+                # Still waiting for a slot, which the caller may be holding: read directly
+                self._reads[node_id].cancel()
+                return await self._forest.read(ref)
+            try:
+                return await asyncio.shield(self._reads[node_id])
+            except Exception:
+                logger.debug("Prefetched read of %s failed, retrying", ref, exc_info=True)
+        return await self._forest.read(ref)
+
+    def cancel(self) -> None:
+        for task in self._reads.values():
+            task.cancel()
+        self._reads.clear()
 
 
 class Agent:
@@ -179,11 +327,36 @@ class Agent:
         api_key: str,
         model: str,
         base_url: str,
+        stream: bool = False,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        fallback_models: Sequence[str] = (),
+        hedge: bool = True,
+        router_model: str | None = None,
     ) -> None:
-        self._client = client
-        self._api_key = api_key
-        self._model = model
-        self._base_url = base_url.rstrip("/")
+        self._llm = ChatClient(
+            client,
+            api_key=api_key,
+            base_url=base_url,
+            models=[model, *fallback_models],
+            stream=stream,
+            hedge=hedge,
+        )
+        # Optional cheap tier for tool-routing rounds; never streamed to the user
+        self._router_llm: ChatClient | None = None
+        if router_model:
+            self._router_llm = ChatClient(
+                client,
+                api_key=api_key,
+                base_url=base_url,
+                models=[router_model],
+                hedge=False,
+            )
+        self.tier_stats = {"router": TierStats(), "strong": TierStats()}
+        self._context = ContextBudget(token_budget)
+        # Shared across runs, so slow tools can't starve reads bot-wide
+        self._tool_limits = {
+            name: asyncio.Semaphore(n) for name, n in TOOL_CONCURRENCY.items()
+        }
 
     async def run(
         self,
@@ -191,24 +364,68 @@ class Agent:
         system_prompt: str,
         forest: ForestBackend,
         on_tool_call: ToolHook | None = None,
+        on_text: TextHook | None = None,
     ) -> str:
-        """Run the agent loop. Returns the final text response."""
+        """Run the agent loop. Returns the final text response.
+
+        When streaming is enabled, ``on_text`` is called with the text
+        accumulated so far in the current round as it arrives.
+        """
         messages: list[dict[str, Any]] = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message},
         ]
 
+        # Top search hits are read in the background while the LLM thinks
+        prefetch = _Prefetcher(forest, self._tool_limits["forest_read"])
+        try:
+            # Everything awaited below (tools, backends, subprocesses) sees this deadline
+            with deadline.scope(TOTAL_TIMEOUT):
+                return await self._run_rounds(messages, prefetch, on_tool_call, on_text)
+        finally:
+            prefetch.cancel()
+            if self._router_llm is not None:
+                logger.info("Tier stats: %s", self.tier_report())
+
+    def tier_report(self) -> str:
+        """One-line cumulative latency/token summary per model tier."""
+        return "; ".join(
+            f"{tier}: {st.calls} calls, avg {st.avg_latency:.2f}s, "
+            f"{st.prompt_tokens}/{st.completion_tokens} tok in/out, "
+            f"{st.escalations} escalated"
+            for tier, st in self.tier_stats.items()
+        )
+
+    async def _run_rounds(
+        self,
+        messages: list[dict[str, Any]],
+        forest: ForestBackend,
+        on_tool_call: ToolHook | None,
+        on_text: TextHook | None,
+    ) -> str:
         call_history: list[str] = []
         step = 0
-        start = time.monotonic()
 
-        for _ in range(MAX_ROUNDS):
-            elapsed = time.monotonic() - start
-            remaining = TOTAL_TIMEOUT - elapsed
-            if remaining <= 0:
-                return "Timed out while thinking. Try a simpler question?"
+        for round_no in range(1, MAX_ROUNDS + 1):
+            # Rounds and tools only get the time left after the final-answer reserve
+            working = (deadline.remaining() or 0) - FINAL_RESERVE
+            if working <= 0:
+                return await self._partial_answer(messages, on_text, "time")
+
+            est_tokens, saved = self._context.compact(messages)
 
-            resp = await self._chat(messages, timeout=remaining)
+            round_start = time.monotonic()
+            try:
+                resp, tier = await self._next_message(messages, working, on_text)
+            except (TimeoutError, asyncio.TimeoutError):
+                logger.warning("Round %d ran out of time", round_no)
+                return await self._partial_answer(messages, on_text, "time")
+            usage = resp.get("usage") or {}
+            logger.info(
+                "Round %d (%s, %.1fs): prompt ~%d tokens (reported %s), %d elided",
+                round_no, tier, time.monotonic() - round_start,
+                est_tokens, usage.get("prompt_tokens", "n/a"), saved,
+            )
             choice = resp["choices"][0]
             msg = choice["message"]
 
@@ -218,9 +435,10 @@ class Agent:
             tool_calls = msg.get("tool_calls")
             if not tool_calls:
                 # Final text response
-                return msg.get("content") or ""
+                return msg.get("content") or EMPTY_ANSWER
 
-            # Execute tool calls
+            # Report every call in order first, then execute the round concurrently
+            pending: list[tuple[str, str, dict[str, Any]]] = []
             for tc in tool_calls:
                 fn = tc["function"]
                 name = fn["name"]
@@ -247,37 +465,110 @@ class Agent:
                     except Exception:
                         logger.debug("on_tool_call hook failed", exc_info=True)
 
-                try:
-                    result = await _dispatch_tool(name, args, forest)
-                except Exception as e:
-                    result = json.dumps({"error": str(e)})
+                pending.append((tc["id"], name, args))
 
+            with deadline.scope((deadline.remaining() or 0) - FINAL_RESERVE):
+                results = await asyncio.gather(*(
+                    self._run_tool(name, args, forest) for _, name, args in pending
+                ))
+
+            # Tool messages must follow the assistant's tool_calls order
+            for (call_id, _, _), result in zip(pending, results):
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tc["id"],
+                    "tool_call_id": call_id,
                     "content": result,
                 })
 
-        return "Reached the maximum number of steps. Here's what I found so far."
+        return await self._partial_answer(messages, on_text, "steps")
+
+    async def _partial_answer(
+        self,
+        messages: list[dict[str, Any]],
+        on_text: TextHook | None,
+        reason: str,
+    ) -> str:
+        """Ask for a final answer from the results so far, with tools switched off."""
+        fallback = (
+            "Timed out while thinking. Try a simpler question?" if reason == "time"
+            else "Reached the maximum number of steps. Try a narrower question?"
+        )
+        left = deadline.remaining() or 0
+        if left < 1:
+            return fallback
+        logger.info("Out of %s, asking for a partial answer (%.1fs left)", reason, left)
+        messages.append({"role": "user", "content": _PARTIAL_NOTE.format(reason=reason)})
+        try:
+            resp = await self._chat(messages, left, on_text, tier="strong", tool_choice="none")
+        except Exception:
+            logger.warning("Partial answer failed", exc_info=True)
+            return fallback
+        return resp["choices"][0]["message"].get("content") or fallback
+
+    async def _run_tool(
+        self, name: str, args: dict[str, Any], forest: ForestBackend,
+    ) -> str:
+        """Dispatch one tool call under its per-tool concurrency limit and the run's deadline."""
+        limit = self._tool_limits.get(name) or contextlib.nullcontext()
+
+        async def _call() -> str:
+            async with limit:
+                return await _dispatch_tool(name, args, forest)
+
+        try:
+            # budget() rejects the call up front when too little time is left
+            return await asyncio.wait_for(_call(), timeout=deadline.budget(TOTAL_TIMEOUT))
+        except (TimeoutError, asyncio.TimeoutError):
+            # Distinct classes before 3.11: wait_for raises asyncio's, budget() the builtin
+            return json.dumps({"error": "skipped: out of time for this request"})
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    async def _next_message(
+        self,
+        messages: list[dict[str, Any]],
+        timeout: float,
+        on_text: TextHook | None,
+    ) -> tuple[dict[str, Any], str]:
+        """Get the next assistant message, cascading from the router tier if configured.
+
+        The router model drives tool-calling rounds. A round where it answers
+        instead of calling tools, or calls them wrongly, is re-asked of the
+        strong model, so only the strong model ever writes the final answer.
+        """
+        if self._router_llm is None:
+            return await self._chat(messages, timeout, on_text, tier="strong"), "strong"
+
+        start = time.monotonic()
+        try:
+            resp = await self._chat(messages, timeout, None, tier="router")
+        except Exception as e:
+            reason = f"router model failed: {e}"
+        else:
+            tool_calls = resp["choices"][0]["message"].get("tool_calls")
+            reason = _invalid_tool_calls(tool_calls) if tool_calls else "final answer"
+            if reason is None:
+                return resp, "router"
+
+        logger.info("Escalating to strong model: %s", reason)
+        self.tier_stats["router"].escalations += 1
+        remaining = timeout - (time.monotonic() - start)
+        return await self._chat(messages, remaining, on_text, tier="strong"), "strong"
 
     async def _chat(
         self,
         messages: list[dict[str, Any]],
         timeout: float,
+        on_text: TextHook | None = None,
+        tier: str = "strong",
+        tool_choice: str | None = None,
     ) -> dict[str, Any]:
-        """Single non-streaming chat completion call to OpenRouter."""
-        resp = await self._client.post(
-            f"{self._base_url}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": self._model,
-                "messages": messages,
-                "tools": TOOLS,
-            },
-            timeout=min(timeout, 45.0),
-        )
-        resp.raise_for_status()
-        return resp.json()
+        """One chat completion call to OpenRouter (hedged across models)."""
+        llm = self._router_llm if tier == "router" and self._router_llm else self._llm
+        body: dict[str, Any] = {"messages": messages, "tools": TOOLS}
+        if tool_choice:
+            body["tool_choice"] = tool_choice
+        start = time.monotonic()
+        resp = await llm.chat(body, timeout=timeout, on_text=on_text)
+        self.tier_stats[tier].record(time.monotonic() - start, resp.get("usage"))
+        return resp
@@ -0,0 +1,237 @@
+"""Bulk capture: many notes from one message or an uploaded document.
+
+Notes are parsed lazily, one at a time, from a message (one
+``Title | Body | #tags`` note per line) or from an uploaded file on disk:
+
+- ``.md`` / ``.markdown``: each heading starts a note, the text under it
+  is the body, and a line of only hashtags (``#a #b``) sets its tags
+- ``.jsonl`` / ``.ndjson``: one ``{"title", "body", "tags"}`` object per line
+- ``.csv``: a header row with ``title``, ``body`` and ``tags`` columns
+- ``.txt``: same as a message, one note per line
+
+run_bulk captures them with at most ``concurrency`` calls in flight and
+only reads ahead as far as it has free slots, so a large upload is never
+held in memory. Notes that fail to parse or capture are reported, not fatal.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from .journal import quiet_captures
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+# Summaries list this many created ids and failures; the rest are counted
+MAX_LISTED = 30
+
+FORMATS = {
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".txt": "lines",
+}
+
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+_TAG_LINE = re.compile(r"^(?:#[\w/-]+\s*)+$")
+
+
+@dataclass
+class Note:
+    line: int
+    title: str
+    body: str
+    tags: str | None = None
+
+
+class ParseError(ValueError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(message)
+        self.line = line
+
+
+@dataclass
+class BulkResult:
+    total: int = 0
+    created: list[tuple[str, str]] = field(default_factory=list)  # (title, node id)
+    failed: list[tuple[int, str, str]] = field(default_factory=list)  # (line, title, error)
+    created_count: int = 0
+    # Journaled captures: accepted with a provisional id, committed to Forest later
+    queued_count: int = 0
+    failed_count: int = 0
+
+    def add_created(self, title: str, node_id: str, pending: bool = False) -> None:
+        if pending:
+            self.queued_count += 1
+            return
+        self.created_count += 1
+        if len(self.created) < MAX_LISTED:
+            self.created.append((title, node_id))
+
+    def add_failed(self, line: int, title: str, error: str) -> None:
+        self.failed_count += 1
+        if len(self.failed) < MAX_LISTED:
+            self.failed.append((line, title, error))
+
+
+ProgressHook = Callable[[BulkResult], None]
+NoteStream = Iterable[Note | ParseError]
+
+
+def format_for(filename: str) -> str | None:
+    """The parser for an uploaded file's name, or None if it isn't supported."""
+    return FORMATS.get(Path(filename).suffix.lower())
+
+
+def _tags(value: Any) -> str | None:
+    if isinstance(value, list):
+        value = ",".join(str(t).strip() for t in value if str(t).strip())
+    value = str(value or "").strip()
+    return value or None
+
+
+def _pipe_note(line_no: int, raw: str) -> Note:
+    parts = [p.strip() for p in raw.split("|")]
+    title = parts[0]
+    body = parts[1] if len(parts) > 1 and parts[1] else title
+    tags = parts[2] if len(parts) > 2 else None
+    return Note(line_no, title, body, tags or None)
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Note | ParseError]:
+    """One ``Title | Body | #tags`` note per non-empty line."""
+    for line_no, raw in enumerate(lines, 1):
+        if raw.strip():
+            yield _pipe_note(line_no, raw.strip())
+
+
+def parse_markdown(lines: Iterable[str]) -> Iterator[Note | ParseError]:
+    """Heading-delimited notes. Text before the first heading is ignored."""
+    current: Note | None = None
+    body: list[str] = []
+
+    def _finish() -> Note:
+        assert current is not None
+        current.body = "\n".join(body).strip() or current.title
+        return current
+
+    for line_no, raw in enumerate(lines, 1):
+        raw = raw.rstrip("\n")
+        heading = _HEADING.match(raw)
+        if heading:
+            if current is not None:
+                yield _finish()
+            current, body = Note(line_no, heading.group(1), ""), []
+        elif current is not None:
+            if _TAG_LINE.match(raw.strip()):
+                current.tags = ",".join(raw.split())
+            else:
+                body.append(raw)
+    if current is not None:
+        yield _finish()
+
+
+def parse_jsonl(lines: Iterable[str]) -> Iterator[Note | ParseError]:
+    for line_no, raw in enumerate(lines, 1):
+        if not raw.strip():
+            continue
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError as e:
+            yield ParseError(line_no, f"invalid JSON: {e.msg}")
+            continue
+        if not isinstance(obj, dict) or not str(obj.get("title") or "").strip():
+            yield ParseError(line_no, "expected an object with a title")
+            continue
+        title = str(obj["title"]).strip()
+        yield Note(line_no, title, str(obj.get("body") or title), _tags(obj.get("tags")))
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Note | ParseError]:
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None or "title" not in [f.strip().lower() for f in reader.fieldnames]:
+        yield ParseError(1, "the header row needs a title column")
+        return
+    for row in reader:
+        row = {(k or "").strip().lower(): v for k, v in row.items()}
+        title = (row.get("title") or "").strip()
+        if not title:
+            yield ParseError(reader.line_num, "missing title")
+            continue
+        yield Note(reader.line_num, title, row.get("body") or title, _tags(row.get("tags")))
+
+
+PARSERS: dict[str, Callable[[Iterable[str]], Iterator[Note | ParseError]]] = {
+    "lines": parse_lines,
+    "markdown": parse_markdown,
+    "jsonl": parse_jsonl,
+    "csv": parse_csv,
+}
+
+
+async def run_bulk(
+    backend: ForestBackend,
+    notes: NoteStream,
+    concurrency: int = 4,
+    on_progress: ProgressHook | None = None,
+) -> BulkResult:
+    """Capture every note in ``notes``, at most ``concurrency`` at a time."""
+    result = BulkResult()
+    slots = asyncio.Semaphore(concurrency)
+    pending: set[asyncio.Task] = set()
+
+    def _progress() -> None:
+        if on_progress is not None:
+            on_progress(result)
+
+    async def _capture(note: Note) -> None:
+        try:
+            data = await backend.capture(note.title, note.body, note.tags)
+            result.add_created(
+                note.title, data.get("node", {}).get("id", ""), pending=bool(data.get("pending")),
+            )
+        except Exception as e:
+            result.add_failed(note.line, note.title, str(e) or type(e).__name__)
+        finally:
+            slots.release()
+            _progress()
+
+    # The summary covers every note; journaled ones only report back if they fail
+    token = quiet_captures.set(True)
+    try:
+        for note in notes:
+            result.total += 1
+            if isinstance(note, ParseError):
+                result.add_failed(note.line, "", str(note))
+                _progress()
+                continue
+            # Parse no further ahead than there are free slots
+            await slots.acquire()
+            task = asyncio.create_task(_capture(note))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+    finally:
+        quiet_captures.reset(token)
+    return result
+
+
+def notes_from_file(path: Path, fmt: str) -> Iterator[Note | ParseError]:
+    """Notes from ``path``, holding the file open only while they're consumed."""
+    with path.open(encoding="utf-8", errors="replace", newline="") as f:
+        yield from PARSERS[fmt](f)
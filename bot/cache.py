@@ -0,0 +1,104 @@
+"""Caching wrapper for any ForestBackend (API or CLI)."""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, OrderedDict
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+# Seconds a cached result stays fresh, per backend method
+DEFAULT_TTLS: dict[str, float] = {
+    "search": 60.0,
+    "read": 300.0,
+    "tags": 300.0,
+    "stats": 30.0,
+}
+
+# Methods whose results go stale when a node is created
+_WRITE_INVALIDATES = ("search", "tags", "stats")
+
+
+class CachedForest:
+    """Bounded LRU cache in front of a ForestBackend.
+
+    Read-only calls (search, read, tags, stats) are cached with per-method
+    TTLs. capture and synthesize pass through and drop the cached search,
+    tags and stats entries, since a new node can change all of them.
+    """
+
+    def __init__(
+        self,
+        backend: ForestBackend,
+        max_entries: int = 512,
+        ttls: dict[str, float] | None = None,
+    ) -> None:
+        self._backend = backend
+        self._max_entries = max_entries
+        self._ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+    def cache_info(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+        }
+
+    def invalidate(self, *methods: str) -> None:
+        """Drop cached entries for the given methods (all if none given)."""
+        if not methods:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] in methods]:
+            del self._entries[key]
+
+    async def _cached(self, method: str, *key: Any) -> dict[str, Any]:
+        cache_key = (method, *key)
+        entry = self._entries.get(cache_key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(cache_key)
+            self.hits[method] += 1
+            return entry[1]
+
+        self.misses[method] += 1
+        result = await getattr(self._backend, method)(*key)
+        self._entries[cache_key] = (time.monotonic() + self._ttls[method], result)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        return await self._cached("search", query, limit)
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        return await self._cached("read", ref)
+
+    async def tags(self) -> dict[str, Any]:
+        return await self._cached("tags")
+
+    async def stats(self) -> dict[str, Any]:
+        return await self._cached("stats")
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        try:
+            return await self._backend.capture(title, body, tags)
+        finally:
+            # Invalidate even on error: the write may have landed before it failed
+            self.invalidate(*_WRITE_INVALIDATES)
+
+    async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
+        try:
+            return await self._backend.synthesize(node_ids)
+        finally:
+            self.invalidate(*_WRITE_INVALIDATES)
@@ -0,0 +1,104 @@
+"""Single-flight wrapper for any ForestBackend (API or CLI)."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Any, TYPE_CHECKING
+
+from . import deadline
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+
+class CoalescingForest:
+    """Identical concurrent read-only calls share one in-flight backend call.
+
+    search, read, tags and stats calls with the same arguments that arrive
+    while one is running await that call's result (or exception) instead
+    of starting another request or subprocess. Each waiter awaits it
+    through a shield, so a cancelled waiter never cancels the shared call
+    for the others; when the last waiter leaves, the call is cancelled,
+    so a superseded run still stops its backend work. The shared call
+    runs without any caller's deadline; each waiter stops waiting at its
+    own. capture and synthesize pass
+    through; once one finishes, later reads start fresh rather than
+    joining a call that may predate the write.
+    """
+
+    def __init__(self, backend: ForestBackend) -> None:
+        self._backend = backend
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._waiters: Counter[tuple] = Counter()
+        self._generation = 0
+        self.calls: Counter[str] = Counter()
+        self.coalesced: Counter[str] = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+    def coalesce_info(self) -> dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "calls": dict(self.calls),
+            "coalesced": dict(self.coalesced),
+        }
+
+    async def _shared(self, method: str, *args: Any) -> dict[str, Any]:
+        key = (method, self._generation, *args)
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls[method] += 1
+            with deadline.cleared():
+                task = asyncio.ensure_future(getattr(self._backend, method)(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.coalesced[method] += 1
+        self._waiters[key] += 1
+        try:
+            left = deadline.remaining()
+            if left is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), timeout=deadline.budget(left))
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    # Nobody wants the result any more
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+                    task.cancel()
+
+    def _forget(self, key: tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        return await self._shared("search", query, limit)
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        return await self._shared("read", ref)
+
+    async def tags(self) -> dict[str, Any]:
+        return await self._shared("tags")
+
+    async def stats(self) -> dict[str, Any]:
+        return await self._shared("stats")
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        try:
+            return await self._backend.capture(title, body, tags)
+        finally:
+            self._generation += 1
+
+    async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
+        try:
+            return await self._backend.synthesize(node_ids)
+        finally:
+            self._generation += 1
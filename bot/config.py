@@ -1,10 +1,29 @@
 from __future__ import annotations
 
 import os
+import re
 import sys
 from dataclasses import dataclass
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw not in ("0", "false", "no", "off")
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        print(f"{name} must be an integer", file=sys.stderr)
+        sys.exit(1)
+
+
 @dataclass(frozen=True)
 class Config:
     telegram_token: str
@@ -16,6 +35,37 @@ class Config:
     openrouter_api_key: str = ""
     openrouter_model: str = "moonshotai/kimi-k2.5"
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    openrouter_stream: bool = True
+    openrouter_fallback_models: tuple[str, ...] = ()
+    openrouter_hedge: bool = True
+    openrouter_router_model: str = ""
+    agent_token_budget: int = 24000
+    cancel_superseded: bool = True
+    max_concurrent_updates: int = 16
+    fast_concurrent: int = 8  # ... plus this many fast-lane updates (/read, buttons)
+    transport: str = "polling"  # "polling" or "webhook"
+    telegram_base_url: str = ""  # override the Bot API URL, e.g. for a local fake server
+    webhook_url: str = ""
+    webhook_secret: str = ""
+    webhook_listen: str = "127.0.0.1"
+    webhook_port: int = 8443
+    webhook_path: str = "/telegram"
+    workers: int = 1  # >1: front process plus worker processes sharded by chat id
+    cache_size: int = 512  # 0 disables the Forest result cache
+    synth_concurrency: int = 1
+    synth_queue_size: int = 10
+    outbound_rate: int = 25  # Telegram messages/s across all chats
+    outbound_chat_rate: int = 1  # ... and per chat
+    cli_concurrency: int = 4  # CLI mode: forest/icli/ncli processes at once
+    forest_max_connections: int = 20
+    forest_keepalive: int = 30  # seconds an idle connection is kept
+    openrouter_max_connections: int = 20
+    openrouter_keepalive: int = 60
+    http2: bool = False
+    bulk_concurrency: int = 4  # /import and uploads: captures in flight at once
+    export_concurrency: int = 8  # /export: node reads in flight at once
+    index_sync: int = 900  # API mode: seconds between full node index syncs (0 = off)
+    capture_journal: str = ""  # SQLite path; set to journal captures write-behind
 
     @classmethod
     def from_env(cls) -> Config:
@@ -55,6 +105,89 @@ class Config:
         openrouter_base_url = os.environ.get(
             "JACK_OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1",
         ).strip()
+        openrouter_stream = _env_flag("JACK_OPENROUTER_STREAM", True)
+        openrouter_fallback_models = tuple(
+            m.strip()
+            for m in os.environ.get("JACK_OPENROUTER_FALLBACK_MODELS", "").split(",")
+            if m.strip()
+        )
+        openrouter_hedge = _env_flag("JACK_OPENROUTER_HEDGE", True)
+        openrouter_router_model = os.environ.get("JACK_OPENROUTER_ROUTER_MODEL", "").strip()
+        agent_token_budget = _env_int("JACK_AGENT_TOKEN_BUDGET", 24000)
+        cancel_superseded = _env_flag("JACK_CANCEL_SUPERSEDED", True)
+        max_concurrent_updates = _env_int("JACK_MAX_CONCURRENT_UPDATES", 16)
+        if max_concurrent_updates < 1:
+            print("JACK_MAX_CONCURRENT_UPDATES must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        fast_concurrent = _env_int("JACK_FAST_CONCURRENT", 8)
+        if fast_concurrent < 1:
+            print("JACK_FAST_CONCURRENT must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        cache_size = _env_int("JACK_CACHE_SIZE", 512)
+        synth_concurrency = _env_int("JACK_SYNTH_CONCURRENCY", 1)
+        if synth_concurrency < 1:
+            print("JACK_SYNTH_CONCURRENCY must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        synth_queue_size = _env_int("JACK_SYNTH_QUEUE_SIZE", 10)
+
+        transport = os.environ.get("JACK_TRANSPORT", "polling").strip().lower()
+        if transport not in ("polling", "webhook"):
+            print("JACK_TRANSPORT must be 'polling' or 'webhook'", file=sys.stderr)
+            sys.exit(1)
+
+        telegram_base_url = os.environ.get("JACK_TELEGRAM_BASE_URL", "").strip()
+        webhook_url = os.environ.get("JACK_WEBHOOK_URL", "").strip()
+        webhook_secret = os.environ.get("JACK_WEBHOOK_SECRET", "").strip()
+        webhook_listen = os.environ.get("JACK_WEBHOOK_LISTEN", "127.0.0.1").strip()
+        webhook_port = _env_int("JACK_WEBHOOK_PORT", 8443)
+        webhook_path = "/" + os.environ.get("JACK_WEBHOOK_PATH", "/telegram").strip().lstrip("/")
+
+        if transport == "webhook":
+            if not re.fullmatch(r"[A-Za-z0-9_-]{1,256}", webhook_secret):
+                print(
+                    "JACK_WEBHOOK_SECRET is required when JACK_TRANSPORT=webhook "
+                    "(1-256 chars of A-Z, a-z, 0-9, _ and -)",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+        workers = _env_int("JACK_WORKERS", 1)
+        if workers < 1:
+            print("JACK_WORKERS must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        if workers > 1 and transport != "webhook":
+            print("JACK_WORKERS > 1 requires JACK_TRANSPORT=webhook", file=sys.stderr)
+            sys.exit(1)
+
+        outbound_rate = _env_int("JACK_OUTBOUND_RATE", 25)
+        outbound_chat_rate = _env_int("JACK_OUTBOUND_CHAT_RATE", 1)
+        if outbound_rate < 1 or outbound_chat_rate < 1:
+            print("JACK_OUTBOUND_RATE and JACK_OUTBOUND_CHAT_RATE must be at least 1", file=sys.stderr)
+            sys.exit(1)
+
+        cli_concurrency = _env_int("JACK_CLI_CONCURRENCY", 4)
+        if cli_concurrency < 1:
+            print("JACK_CLI_CONCURRENCY must be at least 1", file=sys.stderr)
+            sys.exit(1)
+
+        forest_max_connections = _env_int("JACK_FOREST_MAX_CONNECTIONS", 20)
+        forest_keepalive = _env_int("JACK_FOREST_KEEPALIVE", 30)
+        openrouter_max_connections = _env_int("JACK_OPENROUTER_MAX_CONNECTIONS", 20)
+        openrouter_keepalive = _env_int("JACK_OPENROUTER_KEEPALIVE", 60)
+        if forest_max_connections < 1 or openrouter_max_connections < 1:
+            print("JACK_*_MAX_CONNECTIONS must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        http2 = _env_flag("JACK_HTTP2", False)
+        capture_journal = os.environ.get("JACK_CAPTURE_JOURNAL", "").strip()
+        export_concurrency = _env_int("JACK_EXPORT_CONCURRENCY", 8)
+        index_sync = _env_int("JACK_INDEX_SYNC", 900)
+        if export_concurrency < 1:
+            print("JACK_EXPORT_CONCURRENCY must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        bulk_concurrency = _env_int("JACK_BULK_CONCURRENCY", 4)
+        if bulk_concurrency < 1:
+            print("JACK_BULK_CONCURRENCY must be at least 1", file=sys.stderr)
+            sys.exit(1)
 
         return cls(
             telegram_token=token,
@@ -66,4 +199,35 @@ class Config:
             openrouter_api_key=openrouter_api_key,
             openrouter_model=openrouter_model,
             openrouter_base_url=openrouter_base_url,
+            openrouter_stream=openrouter_stream,
+            openrouter_fallback_models=openrouter_fallback_models,
+            openrouter_hedge=openrouter_hedge,
+            openrouter_router_model=openrouter_router_model,
+            agent_token_budget=agent_token_budget,
+            cancel_superseded=cancel_superseded,
+            max_concurrent_updates=max_concurrent_updates,
+            fast_concurrent=fast_concurrent,
+            transport=transport,
+            telegram_base_url=telegram_base_url,
+            webhook_url=webhook_url,
+            webhook_secret=webhook_secret,
+            webhook_listen=webhook_listen,
+            webhook_port=webhook_port,
+            webhook_path=webhook_path,
+            workers=workers,
+            cache_size=cache_size,
+            synth_concurrency=synth_concurrency,
+            synth_queue_size=synth_queue_size,
+            outbound_rate=outbound_rate,
+            outbound_chat_rate=outbound_chat_rate,
+            cli_concurrency=cli_concurrency,
+            forest_max_connections=forest_max_connections,
+            forest_keepalive=forest_keepalive,
+            openrouter_max_connections=openrouter_max_connections,
+            openrouter_keepalive=openrouter_keepalive,
+            http2=http2,
+            bulk_concurrency=bulk_concurrency,
+            export_concurrency=export_concurrency,
+            index_sync=index_sync,
+            capture_journal=capture_journal,
         )
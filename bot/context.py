@@ -0,0 +1,114 @@
+"""Token-budgeted compaction of the agent's message list.
+
+Every round re-sends the whole conversation, so old tool results (whole
+node bodies from forest_read, full search listings) are paid for again on
+each round. ContextBudget elides the oldest tool results down to a short
+summary once the estimated prompt size exceeds the budget, keeping the
+most recent rounds intact.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+# Words split into <=4-char pieces plus individual punctuation: close enough
+# to BPE token counts for budgeting, and linear in the input.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Per-message framing overhead (role, separators) in chat formats
+_MESSAGE_OVERHEAD = 4
+
+_SUMMARY_CHARS = 200
+_ELIDED_KEY = "elided"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text`` without a real tokenizer."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def message_tokens(msg: dict[str, Any]) -> int:
+    tokens = _MESSAGE_OVERHEAD + estimate_tokens(msg.get("content") or "")
+    for tc in msg.get("tool_calls") or []:
+        fn = tc.get("function", {})
+        tokens += estimate_tokens(fn.get("name", "")) + estimate_tokens(fn.get("arguments", ""))
+    return tokens
+
+
+def _clip(text: str, limit: int = _SUMMARY_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _summarize(tool: str, content: str) -> str:
+    """Short stand-in for an elided tool result."""
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        data = None
+
+    summary: dict[str, Any] = {_ELIDED_KEY: True, "tool": tool}
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        summary["results"] = [
+            {"id": r.get("id", ""), "title": r.get("title", "")}
+            for r in data["results"] if isinstance(r, dict)
+        ]
+    elif isinstance(data, dict) and isinstance(data.get("node"), dict):
+        node = data["node"]
+        summary["node"] = {"id": node.get("id", ""), "title": node.get("title", "")}
+        if data.get("body"):
+            summary["body"] = _clip(str(data["body"]))
+    else:
+        summary["content"] = _clip(content)
+    summary["note"] = "Older result shortened; call the tool again for full content."
+    return json.dumps(summary, ensure_ascii=False)
+
+
+class ContextBudget:
+    """Keeps the estimated prompt size of a message list under ``max_tokens``."""
+
+    def __init__(self, max_tokens: int, keep_rounds: int = 1) -> None:
+        self.max_tokens = max_tokens
+        self.keep_rounds = keep_rounds
+
+    def compact(self, messages: list[dict[str, Any]]) -> tuple[int, int]:
+        """Elide old tool results in place until under budget.
+
+        Returns ``(estimated_tokens, tokens_saved)`` for the compacted list.
+        """
+        sizes = [message_tokens(m) for m in messages]
+        total = sum(sizes)
+        if total <= self.max_tokens:
+            return total, 0
+
+        # Tool results after the last `keep_rounds` assistant turns are kept
+        assistant_idx = [i for i, m in enumerate(messages) if m.get("role") == "assistant"]
+        if len(assistant_idx) <= self.keep_rounds:
+            return total, 0
+        protected_from = assistant_idx[-self.keep_rounds]
+
+        tool_names = {
+            tc.get("id"): tc.get("function", {}).get("name", "")
+            for m in messages for tc in m.get("tool_calls") or []
+        }
+
+        saved = 0
+        for i in range(protected_from):
+            if total <= self.max_tokens:
+                break
+            msg = messages[i]
+            content = msg.get("content") or ""
+            if msg.get("role") != "tool" or content.startswith(f'{{"{_ELIDED_KEY}"'):
+                continue
+            msg["content"] = _summarize(tool_names.get(msg.get("tool_call_id"), ""), content)
+            new_size = message_tokens(msg)
+            if new_size >= sizes[i]:
+                # Already small; put it back rather than inflate it
+                msg["content"] = content
+                continue
+            saved += sizes[i] - new_size
+            total -= sizes[i] - new_size
+            sizes[i] = new_size
+
+        return total, saved
@@ -0,0 +1,65 @@
+"""Request deadlines carried in a context variable.
+
+The agent opens a scope for its whole run, and everything awaited inside
+it (tool dispatch, backend HTTP calls, CLI subprocesses, tasks spawned
+from there) sizes its own timeout from the time left instead of a fixed
+30s. A call that can't get a useful slice of time fails up front with
+DeadlineExceeded rather than starting and being cut off.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Less than this left and a backend call isn't worth starting
+MIN_CALL_SECONDS = 0.5
+
+_deadline: ContextVar[float | None] = ContextVar("jack_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def scope(seconds: float) -> Iterator[None]:
+    """Run the block with at most ``seconds`` left (never extends an outer deadline)."""
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def cleared() -> Iterator[None]:
+    """Run the block with no deadline, e.g. work shared by callers with different ones."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current scope, or None outside any."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def budget(default: float, minimum: float = MIN_CALL_SECONDS) -> float:
+    """Timeout for one call: ``default``, capped by the time left.
+
+    Raises DeadlineExceeded if less than ``minimum`` is left.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left < minimum:
+        raise DeadlineExceeded(f"only {max(left, 0):.1f}s left of the request's time")
+    return min(default, left)
@@ -0,0 +1,184 @@
+"""Streaming export of Forest nodes to a gzipped markdown or JSONL file.
+
+The export is a chain of async generators: node_refs pages through the
+matching nodes, fetch_nodes reads full nodes with a bounded window of
+reads in flight (yielding them in order), and write_export renders each
+one into a gzip file on disk. At most one page of refs, ``concurrency``
+nodes and one write batch are held at a time, however many nodes match.
+Compression and disk writes run in a worker thread, a batch at a time,
+so a large export doesn't stall the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+PAGE_SIZE = 100
+# Rendered text handed to the writer thread at a time
+WRITE_BATCH_CHARS = 256 * 1024
+
+FORMATS = ("md", "jsonl")
+
+
+@dataclass
+class ExportResult:
+    nodes: int = 0
+    failed: int = 0
+    bytes_written: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Nodes per second."""
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+ProgressHook = Callable[[ExportResult], None]
+
+
+async def node_refs(
+    backend: ForestBackend,
+    query: str | None = None,
+    tag: str | None = None,
+    page_size: int = PAGE_SIZE,
+) -> AsyncIterator[dict[str, Any]]:
+    """Every matching node summary, a page at a time."""
+    offset = 0
+    while True:
+        page = await backend.list_nodes(query=query, tag=tag, limit=page_size, offset=offset)
+        nodes = page.get("nodes", [])
+        for node in nodes:
+            yield node
+        offset += len(nodes)
+        total = page.get("total")
+        if not nodes or not page.get("has_more") or (total is not None and offset >= total):
+            return
+
+
+async def fetch_nodes(
+    backend: ForestBackend,
+    refs: AsyncIterator[dict[str, Any]],
+    concurrency: int = 8,
+) -> AsyncIterator[dict[str, Any] | BaseException]:
+    """Full nodes (with bodies) for ``refs``, in order, ``concurrency`` reads at a time.
+
+    A node that can't be read is yielded as its exception.
+    """
+
+    async def _read(ref: dict[str, Any]) -> dict[str, Any]:
+        data = await backend.read(ref.get("id", ""))
+        return {**ref, **data.get("node", {}), "body": data.get("body", "")}
+
+    window: deque[asyncio.Task] = deque()
+    try:
+        async for ref in refs:
+            window.append(asyncio.create_task(_read(ref)))
+            if len(window) >= concurrency:
+                yield await _settle(window.popleft())
+        while window:
+            yield await _settle(window.popleft())
+    finally:
+        for task in window:
+            task.cancel()
+        # Collects reads that already failed too, so none is logged as never retrieved
+        await asyncio.gather(*window, return_exceptions=True)
+
+
+async def _settle(task: asyncio.Task) -> dict[str, Any] | BaseException:
+    try:
+        return await task
+    except Exception as e:
+        return e
+
+
+def render_markdown(node: dict[str, Any]) -> str:
+    title = node.get("title", "untitled")
+    meta = [f"id: `{node.get('id', '')}`"]
+    tags = node.get("tags") or []
+    if tags:
+        meta.append("tags: " + " ".join(f"#{t.lstrip('#')}" for t in tags))
+    created = node.get("createdAt") or node.get("created")
+    if created:
+        meta.append(f"created: {created}")
+    body = (node.get("body") or "").strip()
+    return f"# {title}\n\n{' · '.join(meta)}\n\n{body}\n\n---\n\n"
+
+
+def render_jsonl(node: dict[str, Any]) -> str:
+    return json.dumps(node, ensure_ascii=False) + "\n"
+
+
+RENDERERS = {"md": render_markdown, "jsonl": render_jsonl}
+
+
+async def write_export(
+    nodes: AsyncIterator[dict[str, Any] | BaseException],
+    path: Path,
+    fmt: str,
+    on_progress: ProgressHook | None = None,
+) -> ExportResult:
+    """Render ``nodes`` into a gzip file at ``path`` as they arrive."""
+    render = RENDERERS[fmt]
+    result = ExportResult()
+    started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    # One thread, so the close queues behind a write still running after a cancel
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+    try:
+        f = await loop.run_in_executor(writer, lambda: gzip.open(path, "wt", encoding="utf-8"))
+        try:
+            batch: list[str] = []
+            size = 0
+            async for node in nodes:
+                if isinstance(node, BaseException):
+                    result.failed += 1
+                else:
+                    text = render(node)
+                    batch.append(text)
+                    size += len(text)
+                    result.nodes += 1
+                    if size >= WRITE_BATCH_CHARS:
+                        await loop.run_in_executor(writer, f.writelines, batch)
+                        batch, size = [], 0
+                if on_progress is not None:
+                    on_progress(result)
+            if batch:
+                await loop.run_in_executor(writer, f.writelines, batch)
+        finally:
+            await asyncio.shield(loop.run_in_executor(writer, f.close))
+    finally:
+        writer.shutdown(wait=False)
+    result.seconds = time.monotonic() - started
+    result.bytes_written = path.stat().st_size
+    return result
+
+
+async def export(
+    backend: ForestBackend,
+    path: Path,
+    fmt: str = "md",
+    query: str | None = None,
+    tag: str | None = None,
+    concurrency: int = 8,
+    on_progress: ProgressHook | None = None,
+) -> ExportResult:
+    """Export the nodes matching ``query`` or ``tag`` (all nodes if neither) to ``path``."""
+    refs = node_refs(backend, query=query, tag=tag)
+    nodes = fetch_nodes(backend, refs, concurrency)
+    try:
+        return await write_export(nodes, path, fmt, on_progress)
+    finally:
+        await nodes.aclose()
+        await refs.aclose()
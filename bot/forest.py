@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import asyncio
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
+from .procpool import ProcessPool
+
 
 def _normalize_search(raw: dict[str, Any]) -> dict[str, Any]:
     """Normalize CLI search output to the shape formatting.py expects."""
@@ -44,21 +45,17 @@ def _normalize_stats(raw: dict[str, Any]) -> dict[str, Any]:
 class ForestCLI:
     bin: str = "forest"
     timeout: float = 30.0
+    pool: ProcessPool = field(default_factory=ProcessPool)
 
     async def _run(self, *args: str, stdin: str | None = None) -> dict[str, Any]:
-        proc = await asyncio.create_subprocess_exec(
+        returncode, stdout, stderr = await self.pool.run(
             self.bin, *args, "--json",
-            stdin=asyncio.subprocess.PIPE if stdin else asyncio.subprocess.DEVNULL,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(stdin.encode() if stdin else None),
+            stdin=stdin.encode() if stdin else None,
             timeout=self.timeout,
         )
-        if proc.returncode != 0:
+        if returncode != 0:
             err = stderr.decode().strip() or stdout.decode().strip()
-            raise RuntimeError(f"forest exited {proc.returncode}: {err}")
+            raise RuntimeError(f"forest exited {returncode}: {err}")
         return json.loads(stdout.decode())
 
     async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
@@ -85,3 +82,12 @@ class ForestCLI:
 
     async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
         raise RuntimeError("synthesize is only available in API mode")
+
+    async def list_nodes(
+        self,
+        query: str | None = None,
+        tag: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        raise RuntimeError("export is only available in API mode")
@@ -3,9 +3,13 @@ from __future__ import annotations
 import httpx
 from typing import Any
 
+from . import deadline
+
 
 class ForestAPIError(RuntimeError):
-    pass
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
 
 
 class ForestAPI:
@@ -15,22 +19,36 @@ class ForestAPI:
     returning the same normalized dicts that formatting.py expects.
     """
 
-    def __init__(self, base_url: str, api_key: str, timeout: float = 30.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 30.0,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
         self._base = base_url.rstrip("/") + "/api/v1"
-        self._client = httpx.AsyncClient(
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=timeout,
-        )
+        self._timeout = timeout
+        self._headers = {"Authorization": f"Bearer {api_key}"}
+        # A shared client is owned (and closed) by whoever passed it in
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout)
 
     async def close(self) -> None:
-        await self._client.aclose()
+        if self._owns_client:
+            await self._client.aclose()
 
     async def _get(self, path: str, **params: Any) -> dict[str, Any]:
-        resp = await self._client.get(f"{self._base}{path}", params=params)
+        resp = await self._client.get(
+            f"{self._base}{path}", params=params, headers=self._headers,
+            timeout=deadline.budget(self._timeout),
+        )
         return self._unwrap(resp)
 
     async def _post(self, path: str, body: dict[str, Any]) -> dict[str, Any]:
-        resp = await self._client.post(f"{self._base}{path}", json=body)
+        resp = await self._client.post(
+            f"{self._base}{path}", json=body, headers=self._headers,
+            timeout=deadline.budget(self._timeout),
+        )
         return self._unwrap(resp)
 
     @staticmethod
@@ -39,7 +57,7 @@ class ForestAPI:
         if not payload.get("success"):
             err = payload.get("error", {})
             msg = err.get("message", f"HTTP {resp.status_code}")
-            raise ForestAPIError(msg)
+            raise ForestAPIError(msg, status=resp.status_code)
         return payload.get("data", {})
 
     async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
@@ -84,6 +102,29 @@ class ForestAPI:
             "recent": nodes.get("recent", []),
         }
 
+    async def list_nodes(
+        self,
+        query: str | None = None,
+        tag: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        """One page of nodes matching ``query`` (semantic search) or ``tag``, or of all nodes."""
+        if query:
+            data = await self._get("/search/semantic", q=query, limit=limit, offset=offset)
+        else:
+            params: dict[str, Any] = {"limit": limit, "offset": offset}
+            if tag:
+                params["tags"] = tag.lstrip("#")
+            data = await self._get("/nodes", **params)
+        nodes = data.get("nodes", [])
+        pagination = data.get("pagination", {})
+        return {
+            "nodes": nodes,
+            "total": pagination.get("total"),
+            "has_more": pagination.get("hasMore", len(nodes) == limit),
+        }
+
     async def tags(self) -> dict[str, Any]:
         data = await self._get("/tags")
         return {"tags": data.get("tags", [])}
@@ -92,7 +133,8 @@ class ForestAPI:
         resp = await self._client.post(
             f"{self._base}/nodes/synthesize",
             json={"nodeIds": node_ids},
-            timeout=90.0,
+            headers=self._headers,
+            timeout=deadline.budget(90.0),
         )
         data = self._unwrap(resp)
         node = data.get("node", {})
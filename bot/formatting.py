@@ -3,6 +3,8 @@ from __future__ import annotations
 from html import escape
 from typing import Any
 
+from .markup import chunk
+
 TELEGRAM_MAX = 4096
 
 
@@ -12,11 +14,13 @@ _TRUNCATION_SUFFIX = "\n\n<i>[truncated]</i>"
 def _truncate(text: str, max_len: int = TELEGRAM_MAX) -> str:
     if len(text) <= max_len:
         return text
-    # Truncate, then close any open <pre> tags so Telegram can parse the HTML
-    cut = text[: max_len - len(_TRUNCATION_SUFFIX) - 10]
-    open_pre = cut.count("<pre>") - cut.count("</pre>")
-    suffix = "</pre>" * open_pre + _TRUNCATION_SUFFIX
-    return cut + suffix
+    # First chunk closes whatever tags are open at the cut, so it still parses
+    return chunk(text, max_len - len(_TRUNCATION_SUFFIX))[0] + _TRUNCATION_SUFFIX
+
+
+def paginate(text: str, max_len: int = TELEGRAM_MAX) -> list[str]:
+    """Split HTML into pages of at most ``max_len`` chars that each parse on their own."""
+    return chunk(text, max_len)
 
 
 def search_buttons(data: dict[str, Any]) -> list[tuple[str, str]]:
@@ -66,13 +70,20 @@ def format_read(data: dict[str, Any]) -> str:
         f"{tags}\n\n"
         f"<pre>{body}</pre>"
     )
-    return _truncate(text)
+    # Long nodes are paged by the sender rather than truncated here
+    return text
 
 
 def format_capture(data: dict[str, Any]) -> str:
     node = data.get("node", {})
     title = escape(node.get("title", "untitled"))
-    rid = node.get("id", "")[:8]
+    rid = node.get("id", "")[:10]
+    if data.get("pending"):
+        return (
+            f"Queued: <b>{title}</b>  <code>{rid}</code>\n"
+            f"<i>You'll get the node id once Forest has it.</i>"
+        )
+    rid = rid[:8]
     links = data.get("links", {})
     accepted = links.get("accepted", 0)
 
@@ -107,23 +118,129 @@ def format_stats(data: dict[str, Any]) -> str:
     return _truncate("\n".join(lines))
 
 
+def format_capture_done(capture: Any) -> str:
+    title = escape(capture.title)
+    if capture.status != "committed":
+        return (
+            f"Capture <b>{title}</b>  <code>{capture.id}</code> failed after "
+            f"{capture.attempts} attempts: <code>{escape(capture.error or 'unknown error')}</code>\n"
+            f"<i>It is kept in the capture journal.</i>"
+        )
+    result = capture.result or {}
+    rid = result.get("node", {}).get("id", "")[:8]
+    accepted = result.get("links", {}).get("accepted", 0)
+    return (
+        f"Saved: <b>{title}</b>  <code>{rid}</code>  (was <code>{capture.id}</code>)\n"
+        f"Auto-linked to {accepted} nodes."
+    )
+
+
+def format_bulk_progress(label: str, result: Any) -> str:
+    done = result.created_count + result.queued_count + result.failed_count
+    text = f"Importing {label}: {done} notes, {result.created_count} captured"
+    if result.queued_count:
+        text += f", {result.queued_count} queued"
+    if result.failed_count:
+        text += f", {result.failed_count} failed"
+    return text + "…"
+
+
+def format_bulk_summary(label: str, result: Any) -> str:
+    lines = [
+        f"<b>Imported {escape(label)}</b>: {result.created_count} captured"
+        + (f", {result.queued_count} queued" if result.queued_count else "")
+        + (f", {result.failed_count} failed" if result.failed_count else ""),
+    ]
+    if result.queued_count:
+        lines.append(
+            "<i>Queued notes are saved to Forest in the background; "
+            "you'll only hear about the ones that fail.</i>"
+        )
+    if result.created:
+        lines.append("")
+        for title, node_id in result.created:
+            lines.append(f"<code>{escape(node_id[:8])}</code>  {escape(title)}")
+        if result.created_count > len(result.created):
+            lines.append(f"<i>…and {result.created_count - len(result.created)} more</i>")
+    if result.failed:
+        lines += ["", "<b>Failed:</b>"]
+        for line, title, error in result.failed:
+            name = f" {escape(title)}" if title else ""
+            lines.append(f"line {line}{name}: <code>{escape(error)}</code>")
+        if result.failed_count > len(result.failed):
+            lines.append(f"<i>…and {result.failed_count - len(result.failed)} more</i>")
+    return "\n".join(lines)
+
+
+def format_export_progress(label: str, result: Any) -> str:
+    text = f"Exporting {label}: {result.nodes} nodes"
+    if result.failed:
+        text += f", {result.failed} unreadable"
+    return text + "…"
+
+
+def format_export_summary(label: str, result: Any) -> str:
+    """Plain-text caption for the exported file."""
+    text = (
+        f"Exported {label}: {result.nodes} nodes in {result.seconds:.1f}s "
+        f"({result.rate:.1f} nodes/s, {result.bytes_written / 1024:,.0f} KB gzipped)"
+    )
+    if result.failed:
+        text += f"; {result.failed} could not be read"
+    return text
+
+
+def format_job_done(job: Any) -> str:
+    if job.status != "done":
+        return f"Synthesis job <code>{job.id}</code> failed: <code>{escape(job.error or 'unknown error')}</code>"
+    result = job.result or {}
+    node = result.get("node", {})
+    title = escape(result.get("title") or node.get("title", "untitled"))
+    rid = node.get("id", "")[:8]
+    preview = escape(result.get("body_preview", "")[:300])
+    return (
+        f"Synthesis ready: <b>{title}</b>  <code>{rid}</code>\n\n"
+        f"<i>{preview}</i>"
+    )
+
+
+def format_jobs(jobs: list[Any]) -> str:
+    if not jobs:
+        return "No synthesize jobs."
+    lines = ["<b>Synthesize jobs</b>\n"]
+    for job in jobs:
+        refs = ", ".join(escape(n[:8]) for n in job.node_ids)
+        line = f"<code>{job.id}</code>  {job.status}  ({refs})"
+        if job.status == "done" and job.result:
+            rid = job.result.get("node", {}).get("id", "")[:8]
+            line += f"  → <code>{rid}</code>"
+        elif job.status == "failed":
+            line += f"  <i>{escape(job.error or '')}</i>"
+        lines.append(line)
+    return _truncate("\n".join(lines))
+
+
 def format_text(label: str, text: str) -> str:
-    """Wrap plain CLI text output for Telegram."""
-    return _truncate(f"<b>{escape(label)}</b>\n\n<pre>{escape(text)}</pre>")
+    """Wrap plain CLI text output for Telegram (paged by the sender if long)."""
+    return f"<b>{escape(label)}</b>\n\n<pre>{escape(text)}</pre>"
 
 
-def format_help(has_tools: bool = True) -> str:
+def format_help(has_tools: bool = True, has_jobs: bool = True) -> str:
     lines = [
         "<b>Jack — Forest Telegram Bot</b>\n",
         "<b>Forest:</b>",
         "/search <i>query</i>  — search the Forest",
         "/s <i>query</i>  — alias for /search",
-        "/read <i>ref</i>  — read a node (UUID prefix)",
+        "/read <i>ref</i>  — read a node (UUID prefix or title)",
         "/r <i>ref</i>  — alias for /read",
         "/capture <i>Title | Body | #tags</i>  — capture a note",
         "/c <i>Title | Body | #tags</i>  — alias for /capture",
+        "/import  — capture one note per line, or send a .md, .jsonl, .csv or .txt file captioned /import",
+        "/export <i>[md|jsonl] #tag or query</i>  — export nodes as a gzipped file",
         "/stats  — node/edge counts &amp; degree stats",
     ]
+    if has_jobs:
+        lines.append("/jobs  — background synthesis jobs")
 
     if has_tools:
         lines += [
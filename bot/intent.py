@@ -0,0 +1,106 @@
+"""Local intent classifier for free text: rules plus light scoring, no network.
+
+Messages like "search dwarven economy", a bare UUID prefix, or "stats" can be
+answered with one backend call instead of several LLM rounds. Anything that
+looks open-ended (questions, multi-step requests, captures) is left to the
+agent. All-digit strings like "20261018" look like id prefixes too, so they
+only count as one if they contain a hex letter or name a known node.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Minimum score for a message to skip the agent
+FAST_PATH_THRESHOLD = 0.7
+
+_UUID_PREFIX = re.compile(
+    r"[0-9a-f]{8}(?:-[0-9a-f]{4}(?:-[0-9a-f]{4}(?:-[0-9a-f]{4}(?:-[0-9a-f]{12})?)?)?)?",
+    re.IGNORECASE,
+)
+_READ_VERB = re.compile(r"^(?:read|open|show|view)\s+(?:node\s+)?(\S+)$", re.IGNORECASE)
+_SEARCH_VERB = re.compile(
+    r"^(?:search|find|look\s*up|lookup|s)(?:\s+(?:for|forest))?[:\s]+(.+)$", re.IGNORECASE,
+)
+_STATS = re.compile(
+    r"^(?:forest\s+)?(?:stats|statistics|node\s+count|how\s+many\s+(?:nodes|notes))\??$",
+    re.IGNORECASE,
+)
+
+# Words that signal the user wants reasoning, chaining or a write
+_OPEN_ENDED = frozenset({
+    "what", "why", "how", "when", "where", "who", "which", "should", "could",
+    "would", "explain", "summarize", "summarise", "summary", "compare", "tell",
+    "capture", "save", "remember", "note", "synthesize", "and", "then", "also",
+    "me", "my", "i", "you", "please",
+})
+
+MAX_SEARCH_WORDS = 8
+
+# Score for an all-digit "id" nothing vouches for: a date or number, most likely
+_UNVOUCHED_REF = 0.4
+
+# Whether a ref resolves to a node Jack knows of (e.g. NodeIndex lookup)
+RefCheck = Callable[[str], bool]
+
+
+@dataclass(frozen=True)
+class Intent:
+    kind: str  # "search", "read", "stats" or "agent"
+    arg: str = ""
+    score: float = 0.0
+
+    @property
+    def is_fast(self) -> bool:
+        return self.kind != "agent" and self.score >= FAST_PATH_THRESHOLD
+
+
+AGENT = Intent("agent")
+
+
+def _open_ended_penalty(words: list[str]) -> float:
+    hits = sum(1 for w in words if w.lower().strip(",.!;:") in _OPEN_ENDED)
+    return 0.3 * hits
+
+
+def _ref_score(ref: str, score: float, is_known: RefCheck | None) -> float:
+    """``score`` if ``ref`` has a hex letter or is a known node, else too low for the fast path."""
+    if any(c in "abcdef" for c in ref) or (is_known is not None and is_known(ref)):
+        return score
+    return _UNVOUCHED_REF
+
+
+def classify(text: str, is_known: RefCheck | None = None) -> Intent:
+    """Classify a free-text message; returns AGENT unless it's obviously routable."""
+    text = text.strip()
+    if not text or "\n" in text:
+        return AGENT
+
+    if _UUID_PREFIX.fullmatch(text):
+        ref = text.lower()
+        return Intent("read", ref, _ref_score(ref, 1.0, is_known))
+
+    m = _READ_VERB.match(text)
+    if m and _UUID_PREFIX.fullmatch(m.group(1)):
+        ref = m.group(1).lower()
+        return Intent("read", ref, _ref_score(ref, 0.95, is_known))
+
+    if _STATS.match(text):
+        return Intent("stats", "", 0.95)
+
+    m = _SEARCH_VERB.match(text)
+    if m:
+        query = m.group(1).strip().strip("\"'")
+        words = query.split()
+        score = 0.9
+        score -= _open_ended_penalty(words)
+        if "?" in query:
+            score -= 0.4
+        if len(words) > MAX_SEARCH_WORDS:
+            score -= 0.1 * (len(words) - MAX_SEARCH_WORDS)
+        if query:
+            return Intent("search", query, round(score, 2))
+
+    return AGENT
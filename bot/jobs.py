@@ -0,0 +1,135 @@
+"""Background synthesize jobs.
+
+forest_synthesize takes 30-90 seconds, most of the agent's total budget.
+SynthesizeQueue wraps a ForestBackend so synthesize returns a job id
+immediately and runs on a bounded worker pool; the bot is notified when
+the job finishes and sends the new node to the chat that asked for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TYPE_CHECKING
+
+from . import deadline
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+logger = logging.getLogger(__name__)
+
+# Chat the current update came from; jobs remember it for the follow-up message
+current_chat_id: ContextVar[int | None] = ContextVar("current_chat_id", default=None)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    node_ids: list[str]
+    chat_id: int | None
+    status: str = "queued"  # queued, running, done, failed
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+
+
+JobHook = Callable[[Job], Awaitable[None]]
+
+
+class SynthesizeQueue:
+    """ForestBackend wrapper that runs synthesize as a bounded background job."""
+
+    def __init__(
+        self,
+        backend: ForestBackend,
+        concurrency: int = 1,
+        max_pending: int = 10,
+        history: int = 20,
+    ) -> None:
+        self._backend = backend
+        self._concurrency = concurrency
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_pending)
+        self._workers: list[asyncio.Task] = []
+        self._active: dict[str, Job] = {}
+        self._finished: deque[Job] = deque(maxlen=history)
+        self.on_done: JobHook | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+    def jobs(self, chat_id: int | None) -> list[Job]:
+        """``chat_id``'s queued, running and recently finished jobs, newest first."""
+        chat_jobs = [j for j in (*self._active.values(), *self._finished) if j.chat_id == chat_id]
+        chat_jobs.sort(key=lambda j: j.created, reverse=True)
+        return chat_jobs
+
+    def submit(self, node_ids: list[str], chat_id: int | None = None) -> Job:
+        self._ensure_workers()
+        job = Job(id=uuid.uuid4().hex[:6], node_ids=list(node_ids), chat_id=chat_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(
+                f"{self._queue.maxsize} synthesize jobs already queued; try again later"
+            ) from None
+        self._active[job.id] = job
+        logger.info("Queued synthesize job %s (%s)", job.id, ",".join(job.node_ids))
+        return job
+
+    async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
+        job = self.submit(node_ids, chat_id=current_chat_id.get())
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "queued_ahead": self._queue.qsize() - 1,
+        }
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        # Started from inside a tool call; the workers must not inherit that request's deadline
+        with deadline.cleared():
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self._concurrency)
+            ]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.result = await self._backend.synthesize(job.node_ids)
+                job.status = "done"
+            except Exception as e:
+                logger.warning("Synthesize job %s failed: %s", job.id, e)
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+                self._active.pop(job.id, None)
+                self._finished.append(job)
+                self._queue.task_done()
+
+            if self.on_done is not None:
+                try:
+                    await self.on_done(job)
+                except Exception:
+                    logger.exception("Job completion hook failed")
@@ -0,0 +1,291 @@
+"""Write-behind capture journal.
+
+With JACK_CAPTURE_JOURNAL set, CaptureJournal wraps a ForestBackend so
+capture appends the note to a local SQLite journal and returns at once
+with a provisional id. A background drainer replays journaled captures to
+the real backend, oldest first, retrying with backoff while Forest is
+down or restarting, and the bot is told when each one is committed (or
+given up on) so the chat gets the real node id.
+
+The journal is the source of truth until a capture is committed, so
+pending captures survive a bot restart. Delivery is at-least-once: a
+crash between Forest accepting a capture and the journal dropping it
+replays that capture on the next start.
+
+A drainer leases each capture it claims. Leases name the process holding
+them, so on start the drainer takes back any left by a dead process on
+this host at once, rather than waiting LEASE_SECONDS for them to lapse.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TYPE_CHECKING
+
+from .jobs import current_chat_id
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+MAX_ATTEMPTS = 20
+# A claimed capture is retried by anyone once this lapses (e.g. its drainer died)
+LEASE_SECONDS = 120.0
+# Other processes may share the journal; look for their captures this often
+POLL_SECONDS = 5.0
+
+# Set by bulk imports, which summarise their own captures: only failures are reported
+quiet_captures: ContextVar[bool] = ContextVar("quiet_captures", default=False)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    tags TEXT,
+    chat_id INTEGER,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT,
+    quiet INTEGER NOT NULL DEFAULT 0,
+    leased_by TEXT
+)
+"""
+# Added after the first release; journals written before get them on open
+_NEW_COLUMNS = {
+    "quiet": "INTEGER NOT NULL DEFAULT 0",
+    "leased_by": "TEXT",
+}
+
+
+@dataclass
+class PendingCapture:
+    id: str
+    title: str
+    body: str
+    tags: str | None
+    chat_id: int | None
+    attempts: int = 0
+    status: str = "pending"  # pending, committed, failed
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    quiet: bool = False
+
+
+CaptureHook = Callable[[PendingCapture], Awaitable[None]]
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class CaptureJournal:
+    """ForestBackend wrapper that journals captures and commits them in the background."""
+
+    def __init__(self, backend: ForestBackend, path: str) -> None:
+        self._backend = backend
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(captures)")}
+        for column, decl in _NEW_COLUMNS.items():
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE captures ADD COLUMN {column} {decl}")
+        # host:pid:run, so a lease from an earlier process with our pid isn't taken for ours
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wake = asyncio.Event()
+        self._drainer: asyncio.Task | None = None
+        self.on_done: CaptureHook | None = None
+        self.committed = 0
+        self.retries = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+    async def _sql(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        def _run() -> Any:
+            with self._lock:
+                return fn(self._db)
+
+        return await asyncio.to_thread(_run)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM captures WHERE status = 'pending'"
+            ).fetchone()
+        return row[0]
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        capture_id = f"p-{uuid.uuid4().hex[:8]}"
+        chat_id = current_chat_id.get()
+        quiet = quiet_captures.get()
+        await self._sql(lambda db: db.execute(
+            "INSERT INTO captures (id, title, body, tags, chat_id, created, quiet) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (capture_id, title, body, tags, chat_id, time.time(), quiet),
+        ))
+        logger.info("Journaled capture %s (%s)", capture_id, title)
+        self._wake.set()
+        tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
+        return {
+            "node": {"id": capture_id, "title": title, "tags": tag_list},
+            "links": {"accepted": 0},
+            "pending": True,
+        }
+
+    def start(self) -> None:
+        if self._drainer is None:
+            with self._lock:
+                released = self._release_stale(self._db)
+            if released:
+                logger.info("Released %d capture leases held by stopped processes", released)
+            self._drainer = asyncio.create_task(self._drain())
+            pending = self.pending_count()
+            if pending:
+                logger.info("Replaying %d journaled captures", pending)
+
+    async def close(self) -> None:
+        if self._drainer is not None:
+            self._drainer.cancel()
+            await asyncio.gather(self._drainer, return_exceptions=True)
+            self._drainer = None
+        with self._lock:
+            self._db.close()
+
+    def _release_stale(self, db: sqlite3.Connection) -> int:
+        """Make captures leased by dead processes on this host due now. Returns how many."""
+        host = socket.gethostname()
+        released = 0
+        owners = db.execute(
+            "SELECT DISTINCT leased_by FROM captures "
+            "WHERE status = 'pending' AND leased_by IS NOT NULL"
+        ).fetchall()
+        for (owner,) in owners:
+            if owner == self._owner:
+                continue
+            parts = owner.rsplit(":", 2)
+            if len(parts) != 3 or parts[0] != host or not parts[1].isdigit():
+                # Another host's drainer; its leases lapse on their own
+                continue
+            pid = int(parts[1])
+            if pid != os.getpid() and _is_running(pid):
+                continue
+            released += db.execute(
+                "UPDATE captures SET next_attempt = 0, leased_by = NULL "
+                "WHERE status = 'pending' AND leased_by = ?",
+                (owner,),
+            ).rowcount
+        return released
+
+    def _claim(self, db: sqlite3.Connection) -> tuple[PendingCapture | None, float | None]:
+        """Lease the oldest due capture. Returns (capture, None) or (None, next due time)."""
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT id, title, body, tags, chat_id, attempts, quiet FROM captures "
+                "WHERE status = 'pending' AND next_attempt <= ? ORDER BY created LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                due = db.execute(
+                    "SELECT MIN(next_attempt) FROM captures WHERE status = 'pending'"
+                ).fetchone()[0]
+                db.execute("COMMIT")
+                return None, due
+            db.execute(
+                "UPDATE captures SET next_attempt = ?, leased_by = ? WHERE id = ?",
+                (now + LEASE_SECONDS, self._owner, row[0]),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return PendingCapture(*row[:6], quiet=bool(row[6])), None
+
+    async def _drain(self) -> None:
+        while True:
+            try:
+                capture, due = await self._sql(self._claim)
+            except sqlite3.Error:
+                logger.exception("Capture journal read failed")
+                await asyncio.sleep(POLL_SECONDS)
+                continue
+            if capture is None:
+                wait = POLL_SECONDS if due is None else min(POLL_SECONDS, max(0.0, due - time.time()))
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._commit(capture)
+
+    async def _commit(self, capture: PendingCapture) -> None:
+        try:
+            capture.result = await self._backend.capture(capture.title, capture.body, capture.tags)
+        except Exception as e:
+            capture.attempts += 1
+            capture.error = str(e)
+            if capture.attempts >= MAX_ATTEMPTS:
+                # Kept in the journal as failed rather than dropped
+                capture.status = "failed"
+                logger.error("Capture %s failed %d times, giving up: %s", capture.id, capture.attempts, e)
+                await self._sql(lambda db: db.execute(
+                    "UPDATE captures SET status = 'failed', attempts = ?, last_error = ?, "
+                    "leased_by = NULL WHERE id = ?",
+                    (capture.attempts, capture.error, capture.id),
+                ))
+                await self._notify(capture)
+                return
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (capture.attempts - 1))
+            self.retries += 1
+            logger.warning(
+                "Capture %s failed (attempt %d), retrying in %.0fs: %s",
+                capture.id, capture.attempts, delay, e,
+            )
+            await self._sql(lambda db: db.execute(
+                "UPDATE captures SET attempts = ?, next_attempt = ?, last_error = ?, "
+                "leased_by = NULL WHERE id = ?",
+                (capture.attempts, time.time() + delay, capture.error, capture.id),
+            ))
+            return
+
+        await self._sql(lambda db: db.execute("DELETE FROM captures WHERE id = ?", (capture.id,)))
+        capture.status = "committed"
+        self.committed += 1
+        node_id = capture.result.get("node", {}).get("id", "")
+        logger.info("Committed capture %s as %s", capture.id, node_id[:8])
+        await self._notify(capture)
+
+    async def _notify(self, capture: PendingCapture) -> None:
+        if self.on_done is None or (capture.quiet and capture.status == "committed"):
+            return
+        try:
+            await self.on_done(capture)
+        except Exception:
+            logger.exception("Capture completion hook failed")
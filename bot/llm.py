@@ -0,0 +1,417 @@
+"""OpenRouter chat completions with hedging, retries and per-model circuit breakers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Called with a streamed round's text so far; "" withdraws it (the round turned into tool calls)
+TextHook = Callable[[str], Awaitable[None]]
+
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+REQUEST_TIMEOUT = 45.0
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Hedge delay: this percentile of the primary's recent latency, clamped
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_DELAY = 2.0
+HEDGE_MAX_DELAY = 20.0
+HEDGE_DEFAULT_DELAY = 8.0
+HEDGE_MIN_SAMPLES = 5
+
+
+class StreamError(RuntimeError):
+    """An error chunk in a stream that hadn't produced any output yet (retryable)."""
+
+
+class CircuitOpen(RuntimeError):
+    """A model's breaker is open, or its one half-open trial is already in flight."""
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; half-opens after ``cooldown`` seconds.
+
+    Half-open admits a single trial request. Everyone else is turned away
+    until it succeeds (closing the breaker) or fails (reopening it).
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_inflight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def _cooled_down(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at >= self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a request could go out now (without taking the trial slot)."""
+        if self.opened_at is None:
+            return True
+        return not self._trial_inflight and self._cooled_down()
+
+    def acquire(self, force: bool = False) -> bool:
+        """Admit one request; when open, it becomes the trial. ``force`` skips the cooldown."""
+        if self.opened_at is None:
+            return True
+        if self._trial_inflight or not (force or self._cooled_down()):
+            return False
+        self._trial_inflight = True
+        return True
+
+    def release(self) -> None:
+        """End a trial that got no verdict (cancelled, or the request's own fault)."""
+        self._trial_inflight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_inflight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_inflight or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._trial_inflight = False
+
+
+class LatencyTracker:
+    """Sliding window of recent successful request latencies."""
+
+    def __init__(self, window: int = 50) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class _Race:
+    """Shared state of one hedged request: the first attempt to commit wins."""
+
+    def __init__(self) -> None:
+        self.tasks: dict[asyncio.Task, str] = {}
+        self.winner: asyncio.Task | None = None
+
+    def claim(self) -> bool:
+        task = asyncio.current_task()
+        if self.winner is not None:
+            return self.winner is task
+        self.winner = task
+        for other in self.tasks:
+            if other is not task:
+                other.cancel()
+        return True
+
+
+class ChatClient:
+    """Chat completions across an ordered list of models.
+
+    The first model is the primary. If it hasn't answered within a delay
+    derived from its recent latency, the same request is hedged to the next
+    model and whichever commits first wins; the loser is cancelled. Failed
+    attempts fall through to the next model immediately. Each attempt retries
+    retryable statuses with jittered exponential backoff, and models whose
+    breaker is open are skipped.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        base_url: str,
+        models: Sequence[str],
+        stream: bool = False,
+        hedge: bool = True,
+    ) -> None:
+        if not models:
+            raise ValueError("at least one model is required")
+        self._client = client
+        self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
+        self.models = list(models)
+        self._stream = stream
+        self._hedge = hedge
+        self.breakers = {m: CircuitBreaker() for m in self.models}
+        self.latency = {m: LatencyTracker() for m in self.models}
+
+    async def chat(
+        self,
+        body: dict[str, Any],
+        timeout: float,
+        on_text: TextHook | None = None,
+    ) -> dict[str, Any]:
+        """Run one chat completion (``body`` without ``model``) within ``timeout`` seconds."""
+        return await asyncio.wait_for(self._race(body, timeout, on_text), timeout=timeout)
+
+    def hedge_delay(self, model: str) -> float:
+        tracker = self.latency[model]
+        if len(tracker) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        delay = tracker.percentile(HEDGE_PERCENTILE) or HEDGE_DEFAULT_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, delay))
+
+    async def _race(
+        self,
+        body: dict[str, Any],
+        timeout: float,
+        on_text: TextHook | None,
+    ) -> dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        candidates = [m for m in self.models if self.breakers[m].allow()]
+        # Everything is tripped; one trial of the primary beats failing outright
+        force = not candidates
+        if force:
+            candidates = self.models[:1]
+
+        race = _Race()
+        queue = list(candidates)
+        last_error: BaseException | None = None
+
+        def launch() -> None:
+            model = queue.pop(0)
+            task = asyncio.create_task(
+                self._attempt(model, body, deadline, race, on_text, force=force),
+            )
+            race.tasks[task] = model
+
+        launch()
+        try:
+            while race.tasks:
+                hedge_in = None
+                if self._hedge and queue and race.winner is None:
+                    primary = next(iter(race.tasks.values()))
+                    hedge_in = self.hedge_delay(primary)
+                done, _ = await asyncio.wait(
+                    race.tasks, timeout=hedge_in, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info("Hedging to %s after %.1fs", queue[0], hedge_in)
+                    launch()
+                    continue
+
+                for task in done:
+                    model = race.tasks.pop(task)
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    last_error = error
+                    logger.warning("Model %s failed: %s", model, error)
+                    if race.winner is task:
+                        # Failed mid-stream after committing; output can't be retracted
+                        raise error
+                if not race.tasks and queue:
+                    launch()
+        finally:
+            for task in race.tasks:
+                task.cancel()
+
+        assert last_error is not None
+        raise last_error
+
+    async def _attempt(
+        self,
+        model: str,
+        body: dict[str, Any],
+        deadline: float,
+        race: _Race,
+        on_text: TextHook | None,
+        force: bool = False,
+    ) -> dict[str, Any]:
+        breaker = self.breakers[model]
+        payload = {"model": model, **body}
+        for attempt in range(MAX_RETRIES + 1):
+            trial = breaker.is_open
+            if not breaker.acquire(force=force):
+                # Another request is the trial, or a failed retry just reopened the breaker
+                raise CircuitOpen(f"circuit open for {model}")
+            start = time.monotonic()
+            try:
+                if self._stream:
+                    result = await self._stream_once(payload, deadline, race, on_text, start)
+                else:
+                    result = await self._post_once(payload, deadline)
+                    self.latency[model].add(time.monotonic() - start)
+                    if not race.claim():
+                        raise asyncio.CancelledError
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status not in RETRYABLE_STATUS:
+                    # The request's fault, not the model's: no retry, no breaker trip
+                    if trial:
+                        breaker.release()
+                    raise
+                breaker.record_failure()
+                if attempt == MAX_RETRIES or race.winner:
+                    raise
+                await self._backoff(attempt, deadline, e.response)
+            except (httpx.TransportError, StreamError):
+                breaker.record_failure()
+                if attempt == MAX_RETRIES or race.winner:
+                    raise
+                await self._backoff(attempt, deadline, None)
+            except BaseException:
+                # Cancelled (lost the race, timed out) or a bug: no verdict on the model
+                if trial:
+                    breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    async def _backoff(attempt: int, deadline: float, resp: httpx.Response | None) -> None:
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+        if resp is not None:
+            try:
+                delay = max(delay, float(resp.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+        if time.monotonic() + delay >= deadline:
+            raise httpx.TimeoutException("no time left to retry")
+        await asyncio.sleep(delay)
+
+    def _headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+        }
+
+    async def _post_once(self, payload: dict[str, Any], deadline: float) -> dict[str, Any]:
+        resp = await self._client.post(
+            f"{self._base_url}/chat/completions",
+            headers=self._headers(),
+            json=payload,
+            timeout=min(deadline - time.monotonic(), REQUEST_TIMEOUT),
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _stream_once(
+        self,
+        payload: dict[str, Any],
+        deadline: float,
+        race: _Race,
+        on_text: TextHook | None,
+        start: float,
+    ) -> dict[str, Any]:
+        """Streaming (SSE) chat completion, reassembled into the non-streaming shape.
+
+        The attempt commits (claims the race) on its first content or
+        tool-call delta, not when headers arrive: providers send headers
+        at once, so time-to-first-token is the latency that hedging needs.
+        Text is only streamed until the first tool call: anything before
+        it is preamble to a tool round, not the answer, and is withdrawn.
+        """
+        content = ""
+        tool_calls: dict[int, dict[str, Any]] = {}
+        finish_reason = None
+        usage = None
+        claimed = False
+
+        def claim() -> None:
+            nonlocal claimed
+            if claimed:
+                return
+            self.latency[payload["model"]].add(time.monotonic() - start)
+            if not race.claim():
+                raise asyncio.CancelledError
+            claimed = True
+
+        async with self._client.stream(
+            "POST",
+            f"{self._base_url}/chat/completions",
+            headers=self._headers(),
+            json={**payload, "stream": True},
+            timeout=min(deadline - time.monotonic(), REQUEST_TIMEOUT),
+        ) as resp:
+            resp.raise_for_status()
+
+            async for line in resp.aiter_lines():
+                # SSE: skip blank keepalives and ": comment" lines
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    message = chunk["error"].get("message", "stream error")
+                    if not claimed:
+                        # Nothing shown yet, so another attempt or model can still answer
+                        raise StreamError(message)
+                    raise RuntimeError(message)
+                usage = chunk.get("usage") or usage
+                if not chunk.get("choices"):
+                    continue
+                choice = chunk["choices"][0]
+                finish_reason = choice.get("finish_reason") or finish_reason
+                delta = choice.get("delta") or {}
+                if delta.get("content") or delta.get("tool_calls"):
+                    claim()
+
+                if delta.get("tool_calls") and not tool_calls and content and on_text:
+                    try:
+                        await on_text("")
+                    except Exception:
+                        logger.debug("on_text hook failed", exc_info=True)
+                for tc in delta.get("tool_calls") or []:
+                    slot = tool_calls.setdefault(tc.get("index", 0), {
+                        "id": "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    })
+                    if tc.get("id"):
+                        slot["id"] = tc["id"]
+                    fn = tc.get("function") or {}
+                    if fn.get("name"):
+                        slot["function"]["name"] += fn["name"]
+                    if fn.get("arguments"):
+                        slot["function"]["arguments"] += fn["arguments"]
+
+                if delta.get("content"):
+                    content += delta["content"]
+                    if on_text and not tool_calls:
+                        try:
+                            await on_text(content)
+                        except Exception:
+                            logger.debug("on_text hook failed", exc_info=True)
+
+        # An empty completion still has to win the race to count
+        claim()
+        msg: dict[str, Any] = {"role": "assistant", "content": content or None}
+        if tool_calls:
+            msg["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+        return {
+            "choices": [{"message": msg, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
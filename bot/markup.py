@@ -0,0 +1,296 @@
+"""Single-pass tokenizer, sanitizer and chunker for Telegram's HTML subset.
+
+Telegram rejects a whole message if its HTML has an unknown tag, a stray
+``<`` or ``&``, or tags that don't nest. LLM output often has all three,
+so agent replies are sanitized before sending instead of failing and
+being re-sent without formatting:
+
+- supported tags are kept (with only the attributes Telegram accepts),
+  mis-nested ones are closed and reopened, and unclosed ones are closed;
+- common HTML Telegram lacks is mapped (``<br>``, ``<p>``, ``<li>``,
+  headings) or dropped, and anything else that looks like a tag is
+  escaped and shown as text;
+- inside ``<pre>`` and ``<code>`` every tag is shown as text.
+
+``chunk`` splits sanitized HTML at line or word breaks into pieces that
+each parse on their own. Both run in time linear in the input.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterator
+from html import escape, unescape
+
+# Tags Telegram accepts, with their canonical names
+_SUPPORTED = {
+    "b": "b", "strong": "b",
+    "i": "i", "em": "i",
+    "u": "u", "ins": "u",
+    "s": "s", "strike": "s", "del": "s",
+    "tg-spoiler": "tg-spoiler",
+    "span": "span",
+    "a": "a",
+    "code": "code",
+    "pre": "pre",
+    "blockquote": "blockquote",
+    "tg-emoji": "tg-emoji",
+}
+
+# HTML that Telegram lacks: opening and closing replacement text
+_MAPPED = {
+    "br": ("\n", ""),
+    "p": ("", "\n\n"),
+    "div": ("", "\n"),
+    "li": ("\n• ", ""),
+    "ul": ("", "\n"),
+    "ol": ("", "\n"),
+    "hr": ("\n", ""),
+    "h1": ("<b>", "</b>\n"), "h2": ("<b>", "</b>\n"), "h3": ("<b>", "</b>\n"),
+    "h4": ("<b>", "</b>\n"), "h5": ("<b>", "</b>\n"), "h6": ("<b>", "</b>\n"),
+}
+
+# Other real HTML tags: dropped, keeping their content
+_DROPPED = frozenset({
+    "html", "head", "body", "font", "small", "big", "sup", "sub", "mark",
+    "table", "thead", "tbody", "tr", "td", "th", "img", "section", "article",
+    "header", "footer", "nav", "kbd", "samp", "var", "cite", "q", "abbr",
+})
+
+_NAMED_ENTITIES = frozenset({"lt", "gt", "amp", "quot"})
+
+_TOKEN = re.compile(r"<[^<>]*>|&#?\w+;|[<>&]")
+# As in HTML, "< b" is text: the name must follow "<" or "</" directly
+_TAG = re.compile(r"<(/?)([a-zA-Z][\w-]*)((?:\s|/)[^>]*)?>")
+_ATTR = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))|([\w-]+)""")
+
+TEXT, OPEN, CLOSE = "text", "open", "close"
+
+
+def _attrs(raw: str) -> dict[str, str]:
+    out = {}
+    for m in _ATTR.finditer(raw):
+        if m.group(5):
+            out[m.group(5).lower()] = ""
+        else:
+            value = next(v for v in m.group(2, 3, 4) if v is not None)
+            out[m.group(1).lower()] = unescape(value)
+    return out
+
+
+def _opening(name: str, attrs: dict[str, str], parent: str | None) -> str | None:
+    """Canonical opening tag for ``name``, or None if Telegram wouldn't accept it here."""
+    if name == "a":
+        href = attrs.get("href", "")
+        return f'<a href="{escape(href)}">' if href else None
+    if name == "span":
+        return '<span class="tg-spoiler">' if attrs.get("class") == "tg-spoiler" else None
+    if name == "code" and parent == "pre":
+        lang = attrs.get("class", "")
+        if lang.startswith("language-"):
+            return f'<code class="{escape(lang)}">'
+        return "<code>"
+    if name == "blockquote" and "expandable" in attrs:
+        return "<blockquote expandable>"
+    if name == "tg-emoji":
+        emoji_id = attrs.get("emoji-id", "")
+        return f'<tg-emoji emoji-id="{escape(emoji_id)}">' if emoji_id.isdigit() else None
+    return f"<{name}>"
+
+
+def tokens(html: str) -> Iterator[tuple[str, str, str]]:
+    """(kind, text, tag name) tokens of already-valid Telegram HTML."""
+    pos = 0
+    for m in _TOKEN.finditer(html):
+        if m.start() > pos:
+            yield TEXT, html[pos:m.start()], ""
+        raw = m.group(0)
+        tag = _TAG.fullmatch(raw) if raw.startswith("<") and len(raw) > 1 else None
+        if tag is None:
+            yield TEXT, raw, ""
+        else:
+            yield (CLOSE if tag.group(1) else OPEN), raw, tag.group(2).lower()
+        pos = m.end()
+    if pos < len(html):
+        yield TEXT, html[pos:], ""
+
+
+def sanitize(html: str) -> str:
+    """Rewrite arbitrary HTML-ish text into HTML that Telegram will accept."""
+    out: list[str] = []
+    # (name, opening tag as emitted); "" marks a redundant nested tag that was left out
+    stack: list[tuple[str, str]] = []
+    depth: Counter[str] = Counter()  # open tags per name, so membership is O(1)
+    pos = 0
+
+    def text(raw: str) -> None:
+        out.append(escape(raw, quote=False))
+
+    def push(name: str, opening: str) -> None:
+        stack.append((name, opening))
+        depth[name] += 1
+
+    def close_to(name: str) -> None:
+        # Close tags opened after ``name`` too, then reopen them (repairs mis-nesting)
+        reopen = []
+        while stack:
+            top, opening = stack.pop()
+            depth[top] -= 1
+            if opening:
+                out.append(f"</{top}>")
+            if top == name:
+                break
+            reopen.append((top, opening))
+        for top, opening in reversed(reopen):
+            out.append(opening)
+            push(top, opening)
+
+    for m in _TOKEN.finditer(html):
+        if m.start() > pos:
+            text(html[pos:m.start()])
+        pos = m.end()
+        raw = m.group(0)
+
+        if raw.startswith("&"):
+            if len(raw) == 1:
+                out.append("&amp;")
+            elif raw[1] == "#" or raw[1:-1] in _NAMED_ENTITIES:
+                out.append(raw)
+            else:
+                # Named entities beyond the four Telegram knows are spelled out
+                text(unescape(raw))
+            continue
+
+        tag = _TAG.fullmatch(raw) if len(raw) > 1 else None
+        if tag is None:
+            text(raw)
+            continue
+        closing, name = bool(tag.group(1)), tag.group(2).lower()
+        parent = stack[-1][0] if stack else None
+
+        # Nothing nests inside code or pre except <code> directly in <pre>
+        if parent in ("code", "pre") and not (
+            (closing and depth[_SUPPORTED.get(name, "")] > 0)
+            or (parent == "pre" and name == "code" and not closing)
+        ):
+            text(raw)
+            continue
+
+        if name in _MAPPED:
+            replacement = _MAPPED[name][1 if closing else 0]
+            if replacement.startswith("<b>"):
+                push("b", "<b>" if not depth["b"] else "")
+                out.append(stack[-1][1])
+            elif replacement.startswith("</b>"):
+                if depth["b"]:
+                    close_to("b")
+                out.append(replacement[4:])
+            else:
+                out.append(replacement)
+            continue
+        if name in _DROPPED:
+            continue
+        canonical = _SUPPORTED.get(name)
+        if canonical is None:
+            text(raw)
+            continue
+
+        if closing:
+            if depth[canonical]:
+                close_to(canonical)
+            continue
+        if depth[canonical]:
+            # <b> inside <b> changes nothing (and <a> can't nest); its close is dropped too
+            push(canonical, "")
+            continue
+        opening = _opening(canonical, _attrs(tag.group(3) or ""), parent)
+        if opening is None:
+            continue
+        out.append(opening)
+        push(canonical, opening)
+
+    if pos < len(html):
+        text(html[pos:])
+    for name, opening in reversed(stack):
+        if opening:
+            out.append(f"</{name}>")
+    return "".join(out)
+
+
+def _split_point(text: str, room: int) -> int:
+    """Where to cut ``text`` to fit ``room`` chars: a line break, else a space, else hard."""
+    newline = text.rfind("\n", 0, room)
+    if newline >= room // 2:
+        return newline + 1
+    space = text.rfind(" ", 0, room)
+    if space >= room // 2:
+        return space + 1
+    return room
+
+
+def chunk(html: str, max_len: int = 4096) -> list[str]:
+    """Split valid Telegram HTML into pieces of at most ``max_len`` chars.
+
+    Cuts fall on line breaks where possible and never inside a tag or
+    entity; tags open at a cut are closed before it and reopened after.
+    """
+    if len(html) <= max_len:
+        return [html]
+    pieces: list[str] = []
+    buf: list[str] = []
+    size = 0
+    stack: list[tuple[str, str]] = []
+    closers = 0  # length of the closing tags for everything on the stack
+    has_text = False  # anything besides reopened tags in the current piece
+
+    def flush() -> None:
+        nonlocal buf, size, has_text
+        tail = "".join(f"</{name}>" for name, _ in reversed(stack))
+        pieces.append("".join(buf) + tail)
+        buf = [opening for _, opening in stack]
+        size = sum(len(opening) for opening in buf)
+        has_text = False
+
+    for kind, raw, name in tokens(html):
+        if kind == OPEN:
+            closer = len(name) + 3
+            if size + len(raw) + closers + closer > max_len and has_text:
+                flush()
+            buf.append(raw)
+            size += len(raw)
+            stack.append((name, raw))
+            closers += closer
+        elif kind == CLOSE:
+            buf.append(raw)
+            size += len(raw)
+            if stack and stack[-1][0] == name:
+                stack.pop()
+                closers -= len(name) + 3
+        elif raw.startswith("&") and raw.endswith(";"):
+            if size + len(raw) + closers > max_len and has_text:
+                flush()
+            buf.append(raw)
+            size += len(raw)
+            has_text = True
+        else:
+            while raw:
+                room = max_len - size - closers
+                if len(raw) <= room:
+                    buf.append(raw)
+                    size += len(raw)
+                    has_text = True
+                    break
+                if room <= 0 and has_text:
+                    flush()
+                    continue
+                # Tags reopened at the top can't be dropped; nest absurdly deep and pieces run long
+                room = max(room, 1)
+                cut = _split_point(raw, room)
+                buf.append(raw[:cut])
+                size += cut
+                raw = raw[cut:]
+                flush()
+    if has_text or not pieces:
+        pieces.append("".join(buf) + "".join(f"</{name}>" for name, _ in reversed(stack)))
+    return pieces
@@ -0,0 +1,356 @@
+"""Local index of node id → title and tags, for resolving refs without Forest.
+
+NodeIndex keeps every node Jack has seen in a sorted list of full ids (so
+a UUID prefix is a bisect away) plus a map from the first letters of each
+title word to the ids whose titles contain such a word (so fuzzy title
+lookups only score a handful of candidates). It learns from search, read,
+capture and stats responses, and IndexedForest can also page through
+every node in the background to fill it in.
+
+IndexedForest wraps a ForestBackend so read and synthesize hand Forest
+full ids where the index knows them: a unique prefix or title is resolved
+locally, and an ambiguous prefix fails at once with the candidates. A ref
+the index doesn't know goes to Forest as is (the node may be newer than
+the last sync), and if Forest can't find it either, its error gets "did
+you mean" suggestions attached.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .router import ForestBackend
+
+logger = logging.getLogger(__name__)
+
+SYNC_PAGE_SIZE = 500
+MAX_SUGGESTIONS = 5
+# Title similarity needed to suggest a node, and to read it without asking
+SUGGEST_RATIO = 0.6
+RESOLVE_RATIO = 0.95
+# Candidate titles scored per fuzzy lookup, most shared word stems first
+MAX_CANDIDATES = 500
+STEM_LEN = 3
+
+_FULL_ID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+_ID_PREFIX = re.compile(r"^[0-9a-f][0-9a-f-]*$")
+_WORD = re.compile(r"\w+")
+# Shorter hex strings are treated as words, not id prefixes
+MIN_PREFIX = 4
+
+
+class UnknownRef(LookupError):
+    """A ref that matches no node, or more than one, with the nodes it might mean."""
+
+    def __init__(self, message: str, suggestions: list[tuple[str, str]]) -> None:
+        if suggestions:
+            message += "\nDid you mean:\n" + "\n".join(
+                f"  {node_id[:8]}  {title}" for node_id, title in suggestions
+            )
+        super().__init__(message)
+        self.suggestions = suggestions
+
+
+def _is_prefix(ref: str) -> bool:
+    return len(ref) >= MIN_PREFIX and _ID_PREFIX.match(ref) is not None
+
+
+def _not_found(e: Exception) -> bool:
+    """Whether a backend error means the node doesn't exist (not a network failure)."""
+    status = getattr(e, "status", None)
+    if status is not None:
+        return status == 404
+    return "not found" in str(e).lower()
+
+
+def _stems(title: str) -> set[str]:
+    return {w[:STEM_LEN] for w in _WORD.findall(title.lower()) if len(w) >= STEM_LEN}
+
+
+class NodeIndex:
+    def __init__(self) -> None:
+        self._ids: list[str] = []
+        # id → (title, tags); tag strings are interned, most nodes share them
+        self._nodes: dict[str, tuple[str, tuple[str, ...]]] = {}
+        self._stems: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._nodes
+
+    def ids(self) -> set[str]:
+        return set(self._nodes)
+
+    def title(self, node_id: str) -> str:
+        return self._nodes[node_id][0]
+
+    def add(self, node: dict[str, Any], _sort: bool = True) -> bool:
+        """Record ``node`` if it has a full id. True if it was new."""
+        node_id = str(node.get("id") or "").lower()
+        if not _FULL_ID.match(node_id):
+            return False
+        title = str(node.get("title") or "")
+        tags = tuple(sys.intern(str(t)) for t in node.get("tags") or ())
+        old = self._nodes.get(node_id)
+        if old is None:
+            if _sort:
+                bisect.insort(self._ids, node_id)
+            else:
+                self._ids.append(node_id)
+        elif old[0] != title:
+            self._unstem(node_id, old[0])
+        elif old[1] == tags:
+            return False
+        self._nodes[node_id] = (title, tags)
+        if old is None or old[0] != title:
+            for stem in _stems(title):
+                self._stems.setdefault(stem, []).append(node_id)
+        return old is None
+
+    def add_many(self, nodes: list[dict[str, Any]]) -> int:
+        """Record a batch of nodes, re-sorting once. Returns how many were new."""
+        added = sum(self.add(node, _sort=False) for node in nodes)
+        if added:
+            # Sorted run plus a short unsorted tail: Timsort merges it in linear time
+            self._ids.sort()
+        return added
+
+    def remove(self, node_id: str) -> None:
+        entry = self._nodes.pop(node_id, None)
+        if entry is None:
+            return
+        del self._ids[bisect.bisect_left(self._ids, node_id)]
+        self._unstem(node_id, entry[0])
+
+    def _unstem(self, node_id: str, title: str) -> None:
+        for stem in _stems(title):
+            ids = self._stems.get(stem)
+            if ids is not None:
+                ids.remove(node_id)
+                if not ids:
+                    del self._stems[stem]
+
+    def resolves(self, ref: str) -> bool:
+        """Whether ``ref`` is a full id or unique id prefix of an indexed node."""
+        return len(self.by_prefix(ref.strip().lower(), limit=2)) == 1
+
+    def by_prefix(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> list[str]:
+        """Ids starting with ``prefix``, at most ``limit`` of them."""
+        found = []
+        for i in range(bisect.bisect_left(self._ids, prefix), len(self._ids)):
+            if not self._ids[i].startswith(prefix) or len(found) == limit:
+                break
+            found.append(self._ids[i])
+        return found
+
+    def near_prefix(self, prefix: str, n: int = 3) -> list[str]:
+        """Ids sorted next to ``prefix``: those sharing the longest leading run with it."""
+        i = bisect.bisect_left(self._ids, prefix)
+        window = self._ids[max(0, i - n): i + n]
+
+        def shared(node_id: str) -> int:
+            k = 0
+            while k < min(len(node_id), len(prefix)) and node_id[k] == prefix[k]:
+                k += 1
+            return k
+
+        return sorted(window, key=shared, reverse=True)[:n]
+
+    def by_title(self, text: str, n: int = MAX_SUGGESTIONS) -> list[tuple[str, float]]:
+        """(id, similarity) for the titles closest to ``text``, best first."""
+        stems = _stems(text)
+        counts: Counter[str] = Counter()
+        for stem in stems:
+            counts.update(self._stems.get(stem, ()))
+        text = text.lower()
+        matcher = SequenceMatcher(b=text)
+        scored = []
+        for node_id, _ in counts.most_common(MAX_CANDIDATES):
+            matcher.set_seq1(self._nodes[node_id][0].lower())
+            if matcher.real_quick_ratio() >= SUGGEST_RATIO and matcher.quick_ratio() >= SUGGEST_RATIO:
+                ratio = matcher.ratio()
+                if ratio >= SUGGEST_RATIO:
+                    scored.append((node_id, ratio))
+        scored.sort(key=lambda s: s[1], reverse=True)
+        return scored[:n]
+
+
+class IndexedForest:
+    """ForestBackend wrapper that indexes every node it sees and resolves refs locally."""
+
+    def __init__(self, backend: ForestBackend, index: NodeIndex | None = None) -> None:
+        self._backend = backend
+        self.index = index or NodeIndex()
+        self.synced_at: float | None = None
+        self.sync_interval = 0.0
+        self._syncer: asyncio.Task | None = None
+        # Indexed ids the last sync's listing didn't include
+        self._missed: set[str] = set()
+        self.resolved_locally = 0
+        self.rejected_locally = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+    def index_info(self) -> dict[str, Any]:
+        return {
+            "nodes": len(self.index),
+            "synced": self.synced_at is not None,
+            "resolved_locally": self.resolved_locally,
+            "rejected_locally": self.rejected_locally,
+        }
+
+    def _suggest(self, ref: str) -> list[tuple[str, str]]:
+        if _is_prefix(ref):
+            ids = self.index.near_prefix(ref)
+        else:
+            ids = [node_id for node_id, _ in self.index.by_title(ref)]
+        return [(node_id, self.index.title(node_id)) for node_id in ids]
+
+    def _by_title(self, ref: str) -> str | None:
+        """The node whose title ``ref`` (nearly) is, if exactly one is that close."""
+        scored = self.index.by_title(ref)
+        if scored and scored[0][1] >= RESOLVE_RATIO and (
+            len(scored) == 1 or scored[1][1] < RESOLVE_RATIO
+        ):
+            return scored[0][0]
+        return None
+
+    def _resolve(self, ref: str) -> str | None:
+        """The full id ``ref`` stands for, or None to let Forest decide.
+
+        Raises UnknownRef when ``ref`` is a prefix of several indexed ids.
+        """
+        key = ref.strip().lower()
+        if _FULL_ID.match(key):
+            return key
+        if not _is_prefix(key):
+            node_id = self._by_title(ref)
+            if node_id is not None:
+                self.resolved_locally += 1
+            return node_id
+        if not any(c.isdigit() or c == "-" for c in key):
+            # "cafe", "decade": a title match wins over an id prefix
+            node_id = self._by_title(ref)
+            if node_id is not None:
+                self.resolved_locally += 1
+                return node_id
+        matches = self.index.by_prefix(key)
+        if len(matches) > 1:
+            self.rejected_locally += 1
+            raise UnknownRef(
+                f"'{ref}' matches several nodes; use a longer prefix",
+                [(node_id, self.index.title(node_id)) for node_id in matches],
+            )
+        if matches:
+            self.resolved_locally += 1
+            return matches[0]
+        # Not indexed yet (e.g. created by another client); Forest decides
+        return None
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        node_id = self._resolve(ref)
+        try:
+            data = await self._backend.read(node_id or ref)
+        except Exception as e:
+            if not _not_found(e):
+                raise
+            if node_id is not None:
+                # Deleted since it was indexed
+                self.index.remove(node_id)
+            suggestions = self._suggest(ref.strip().lower())
+            if not suggestions:
+                raise
+            raise UnknownRef(str(e), suggestions) from e
+        self.index.add(data.get("node", {}))
+        return data
+
+    async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
+        resolved = [self._resolve(ref) or ref for ref in node_ids]
+        data = await self._backend.synthesize(resolved)
+        self.index.add(data.get("node", {}))
+        return data
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        data = await self._backend.search(query, limit)
+        self.index.add_many(data.get("results", []))
+        return data
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        data = await self._backend.capture(title, body, tags)
+        self.index.add(data.get("node", {}))
+        return data
+
+    async def stats(self) -> dict[str, Any]:
+        data = await self._backend.stats()
+        self.index.add_many([n for n in data.get("recent", []) if isinstance(n, dict)])
+        return data
+
+    def start(self, interval: float, phase: float = 0.0) -> None:
+        """Sync the whole index now and then every ``interval`` seconds.
+
+        A ``phase`` brings the second sync forward to that many seconds, so
+        processes sharing one Forest take turns crawling it.
+        """
+        self.sync_interval = interval
+        if interval > 0 and self._syncer is None:
+            self._syncer = asyncio.create_task(self._sync_loop(phase))
+
+    async def close(self) -> None:
+        if self._syncer is not None:
+            self._syncer.cancel()
+            await asyncio.gather(self._syncer, return_exceptions=True)
+            self._syncer = None
+
+    async def sync(self) -> None:
+        """Page through every node, adding new ones and dropping any Forest no longer has.
+
+        Offset pages shift when nodes are added or deleted mid-sync, so one listing can
+        skip a live node. A node is only dropped once two syncs in a row
+        miss it (a read that 404s drops it at once).
+        """
+        started = time.monotonic()
+        seen: set[str] = set()
+        before = self.index.ids()
+        offset = 0
+        while True:
+            page = await self._backend.list_nodes(limit=SYNC_PAGE_SIZE, offset=offset)
+            nodes = page.get("nodes", [])
+            self.index.add_many(nodes)
+            seen.update(str(node.get("id") or "").lower() for node in nodes)
+            offset += len(nodes)
+            total = page.get("total")
+            if not nodes or not page.get("has_more") or (total is not None and offset >= total):
+                break
+        # Only nodes indexed before the sync began can be stale; newer ones came from responses
+        missed = before - seen
+        gone = missed & self._missed
+        for node_id in gone:
+            self.index.remove(node_id)
+        self._missed = missed - gone
+        self.synced_at = time.monotonic()
+        logger.info(
+            "Node index synced: %d nodes in %.1fs (%d dropped, %d unconfirmed)",
+            len(self.index), self.synced_at - started, len(gone), len(self._missed),
+        )
+
+    async def _sync_loop(self, phase: float) -> None:
+        delay = phase or self.sync_interval
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning("Node index sync failed: %s", e)
+            await asyncio.sleep(delay)
+            delay = self.sync_interval
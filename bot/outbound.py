@@ -0,0 +1,251 @@
+"""Central scheduler for outgoing Telegram requests.
+
+Every send, edit and chat action goes through one Outbound instance, so
+Telegram's flood limits (about 30 messages/s overall, about one per second
+per chat) are respected up front rather than discovered through 429s:
+
+- ``send`` waits for a per-chat and a global token, then makes the call.
+  Calls to one chat go out in the order they were made.
+- ``coalesce`` is for messages edited in place (tool status, streamed
+  drafts): while an edit for a key waits for its turn, newer edits replace
+  it, so only the latest text is sent.
+- ``typing`` drops chat actions the chat is still showing, or that would
+  have to wait for a token.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+CHAT_BURST = 3
+# Telegram shows a chat action for ~5s; a newer one inside this window is redundant
+TYPING_TTL = 3.5
+MAX_RETRY_AFTER = 2
+# Idle per-chat state is pruned once this many chats are tracked
+PRUNE_AT = 1024
+
+Call = Callable[[], Awaitable[Any]]
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def ready(self) -> bool:
+        self._refill()
+        return self._tokens >= 1
+
+    def full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.burst
+
+    def take_now(self) -> None:
+        self._tokens -= 1
+
+    async def take(self) -> float:
+        """Wait for a token and take it. Returns the seconds waited."""
+        waited = 0.0
+        while not self.ready():
+            delay = (1 - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+        self._tokens -= 1
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` (after a 429)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+@dataclass
+class _Chat:
+    bucket: TokenBucket
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+    last_typing: float = 0.0
+
+
+@dataclass
+class _Slot:
+    pending: Call | None = None
+    task: asyncio.Task | None = None
+
+
+def _retry_seconds(exc: RetryAfter) -> float:
+    value: Any = exc.retry_after
+    return value.total_seconds() if hasattr(value, "total_seconds") else float(value)
+
+
+class Outbound:
+    def __init__(self, rate: float = 25.0, chat_rate: float = 1.0) -> None:
+        self._global = TokenBucket(rate, max(1.0, rate))
+        self._global_lock = asyncio.Lock()
+        self._chat_rate = chat_rate
+        self._chats: dict[int, _Chat] = {}
+        self._slots: dict[Hashable, _Slot] = {}
+
+        self.queued = 0
+        self.max_queued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.typing_sent = 0
+        self.typing_dropped = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.retry_after = 0
+
+    def _chat(self, chat_id: int) -> _Chat:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            if len(self._chats) >= PRUNE_AT:
+                self._prune()
+            chat = _Chat(TokenBucket(self._chat_rate, CHAT_BURST))
+            self._chats[chat_id] = chat
+        return chat
+
+    def _prune(self) -> None:
+        # A chat with a full bucket and nothing queued carries no state worth keeping
+        for chat_id, chat in list(self._chats.items()):
+            if not chat.users and chat.bucket.full():
+                del self._chats[chat_id]
+
+    async def send(self, chat_id: int, call: Call) -> Any:
+        """Make ``call`` once the chat and global rate limits allow it."""
+        chat = self._chat(chat_id)
+        chat.users += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        started = time.monotonic()
+        waiting = True
+        try:
+            async with chat.lock:
+                for attempt in range(MAX_RETRY_AFTER + 1):
+                    await chat.bucket.take()
+                    async with self._global_lock:
+                        await self._global.take()
+                    if waiting:
+                        waiting = False
+                        self.queued -= 1
+                        waited = time.monotonic() - started
+                        if waited > 0.05:
+                            self.throttled += 1
+                            self.throttle_seconds += waited
+                    try:
+                        result = await call()
+                    except RetryAfter as e:
+                        if attempt == MAX_RETRY_AFTER:
+                            raise
+                        self.retry_after += 1
+                        seconds = _retry_seconds(e)
+                        logger.warning(
+                            "Telegram flood limit in chat %s; retrying in %.0fs", chat_id, seconds,
+                        )
+                        chat.bucket.pause(seconds)
+                        continue
+                    self.sent += 1
+                    # Sending a message clears the chat's typing indicator
+                    chat.last_typing = 0.0
+                    return result
+        finally:
+            if waiting:
+                self.queued -= 1
+            chat.users -= 1
+
+    def coalesce(self, key: Hashable, chat_id: int, call: Call) -> None:
+        """Queue an in-place edit for ``key``, replacing one that hasn't gone out yet."""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        if slot.pending is not None:
+            self.coalesced += 1
+        slot.pending = call
+        if slot.task is None:
+            slot.task = asyncio.create_task(self._drain(key, chat_id, slot))
+
+    async def _drain(self, key: Hashable, chat_id: int, slot: _Slot) -> None:
+        chosen: Call | None = None
+
+        async def _latest() -> Any:
+            # Picked when the tokens are in hand, so edits made while waiting collapse
+            nonlocal chosen
+            if slot.pending is not None:
+                chosen, slot.pending = slot.pending, None
+            return await chosen() if chosen is not None else None
+
+        try:
+            while slot.pending is not None:
+                chosen = None
+                try:
+                    await self.send(chat_id, _latest)
+                except Exception:
+                    logger.debug("Coalesced edit failed", exc_info=True)
+        finally:
+            slot.task = None
+            if self._slots.get(key) is slot:
+                del self._slots[key]
+
+    async def settle(self, key: Hashable) -> None:
+        """Drop ``key``'s unsent edit and wait for the one in flight, if any."""
+        slot = self._slots.get(key)
+        if slot is None:
+            return
+        slot.pending = None
+        if slot.task is not None:
+            await asyncio.shield(slot.task)
+
+    async def typing(self, chat_id: int, call: Call) -> bool:
+        """Send a chat action unless it is redundant or would have to wait."""
+        chat = self._chat(chat_id)
+        now = time.monotonic()
+        if (
+            now - chat.last_typing < TYPING_TTL
+            or chat.lock.locked()
+            or not chat.bucket.ready()
+            or self._global_lock.locked()
+            or not self._global.ready()
+        ):
+            self.typing_dropped += 1
+            return False
+        chat.bucket.take_now()
+        self._global.take_now()
+        chat.last_typing = now
+        try:
+            await call()
+        except Exception:
+            logger.debug("Chat action failed", exc_info=True)
+            return False
+        self.typing_sent += 1
+        return True
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "typing_sent": self.typing_sent,
+            "typing_dropped": self.typing_dropped,
+            "throttled": self.throttled,
+            "throttle_seconds": round(self.throttle_seconds, 2),
+            "retry_after": self.retry_after,
+        }
@@ -0,0 +1,40 @@
+"""Server-side pages of long replies, served by Prev/Next buttons."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+PAGE_CACHE_SIZE = 256
+# Replies longer than this many pages are sent as a file instead
+MAX_PAGES = 8
+
+
+class PageCache:
+    """Bounded LRU of paged replies, keyed by (chat_id, message_id).
+
+    Flipping pages edits the message from here, so it never re-runs the
+    command or touches the backend. Evicted replies just stop paging.
+    """
+
+    def __init__(self, max_entries: int = PAGE_CACHE_SIZE) -> None:
+        self._max_entries = max_entries
+        self._pages: OrderedDict[tuple[int, int], list[str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, chat_id: int, message_id: int, pages: list[str]) -> None:
+        key = (chat_id, message_id)
+        self._pages[key] = pages
+        self._pages.move_to_end(key)
+        while len(self._pages) > self._max_entries:
+            self._pages.popitem(last=False)
+
+    def get(self, chat_id: int, message_id: int, page: int) -> tuple[str, int] | None:
+        """Page ``page`` (0-based) and the page count, or None if unknown."""
+        pages = self._pages.get((chat_id, message_id))
+        if pages is None or not 0 <= page < len(pages):
+            self.misses += 1
+            return None
+        self._pages.move_to_end((chat_id, message_id))
+        self.hits += 1
+        return pages[page], len(pages)
@@ -0,0 +1,109 @@
+"""Bounded pool for CLI subprocesses (forest in CLI mode, icli, ncli).
+
+None of these CLIs has a request/response daemon mode to keep warm:
+forest's long-lived mode is its HTTP server, which JACK_MODE=api already
+talks to. So the pool bounds how many one-shot children run at once,
+measures how long calls queue for a slot, and makes sure a child that
+times out or is cancelled is killed along with anything it spawned, and
+reaped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Any
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+
+async def _reap(proc: asyncio.subprocess.Process) -> None:
+    try:
+        # The child leads its own session, so this takes its children down too
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+
+class ProcessPool:
+    def __init__(self, max_concurrent: int = 4) -> None:
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.runs = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.killed = 0
+
+    async def run(
+        self, *argv: str, stdin: bytes | None = None, timeout: float = 30.0,
+    ) -> tuple[int, bytes, bytes]:
+        """Run ``argv`` once a slot is free. Returns (returncode, stdout, stderr).
+
+        ``timeout`` covers the child only, not the wait for a slot; both
+        are cut short by the caller's deadline, if any.
+        """
+        queued = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            left = deadline.remaining()
+            if left is None:
+                await self._slots.acquire()
+            else:
+                try:
+                    await asyncio.wait_for(self._slots.acquire(), timeout=max(left, 0))
+                except asyncio.TimeoutError:
+                    raise deadline.DeadlineExceeded(f"no free slot for {argv[0]} in time") from None
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - queued
+        self.wait_seconds += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 1.0:
+            logger.debug("%s waited %.1fs for a process slot", argv[0], waited)
+
+        try:
+            return await self._spawn(argv, stdin, deadline.budget(timeout))
+        finally:
+            self._slots.release()
+
+    async def _spawn(
+        self, argv: tuple[str, ...], stdin: bytes | None, timeout: float,
+    ) -> tuple[int, bytes, bytes]:
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        self.runs += 1
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(stdin), timeout=timeout)
+        except BaseException:
+            # Timed out or cancelled: kill the child instead of leaving it running
+            if proc.returncode is None:
+                self.killed += 1
+                # Shielded so a second cancellation can't leave a zombie behind
+                await asyncio.shield(_reap(proc))
+            raise
+        return proc.returncode, stdout, stderr
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "runs": self.runs,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "avg_wait": round(self.wait_seconds / self.runs, 3) if self.runs else 0.0,
+            "max_wait": round(self.max_wait, 3),
+            "killed": self.killed,
+        }
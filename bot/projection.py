@@ -0,0 +1,151 @@
+"""Per-tool projection of backend results before they reach the LLM.
+
+Backends return whole node objects (edge metadata, bodyPreview alongside
+body, timestamps). The model only needs ids, titles, tags and text, and
+every byte sent is re-sent on each later round, so tool results are cut
+down to those fields and encoded compactly.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+READ_BODY_CHARS = 6000
+PREVIEW_CHARS = 160
+# Measuring the raw size re-encodes the whole result, so only 1 call in this many is measured
+SIZE_SAMPLE_EVERY = 10
+
+
+def _node_ref(node: dict[str, Any]) -> dict[str, Any]:
+    ref: dict[str, Any] = {"id": node.get("id", ""), "title": node.get("title", "")}
+    if node.get("tags"):
+        ref["tags"] = node["tags"]
+    return ref
+
+
+def _search(result: dict[str, Any], args: dict[str, Any]) -> dict[str, Any]:
+    hits = []
+    for r in result.get("results", []):
+        hit = _node_ref(r)
+        if "similarity" in r:
+            hit["score"] = round(float(r["similarity"]), 3)
+        preview = r.get("bodyPreview") or r.get("body") or ""
+        if preview:
+            hit["preview"] = preview[:PREVIEW_CHARS]
+        hits.append(hit)
+    return {"total": result.get("total", len(hits)), "results": hits}
+
+
+def _read(result: dict[str, Any], args: dict[str, Any]) -> dict[str, Any]:
+    node = result.get("node", {})
+    body = result.get("body") or node.get("body") or ""
+    try:
+        offset = max(0, int(args.get("offset") or 0))
+    except (TypeError, ValueError):
+        offset = 0
+    end = offset + READ_BODY_CHARS
+    out: dict[str, Any] = {"node": _node_ref(node), "body": body[offset:end]}
+    if offset:
+        out["offset"] = offset
+    if end < len(body):
+        out["truncated"] = (
+            f"Showing chars {offset}-{end} of {len(body)}; "
+            f"call forest_read with offset={end} for more."
+        )
+    return out
+
+
+def _capture(result: dict[str, Any], args: dict[str, Any]) -> dict[str, Any]:
+    if result.get("pending"):
+        # Journaled; the user is told the real node id once Forest commits it
+        return {
+            "pending": True,
+            "provisional_id": result.get("node", {}).get("id", ""),
+            "note": "Queued for Forest; the user will be sent the node id when it is saved.",
+        }
+    return {
+        "node": _node_ref(result.get("node", {})),
+        "linked": result.get("links", {}).get("accepted", 0),
+    }
+
+
+def _stats(result: dict[str, Any], args: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "counts": result.get("counts", {}),
+        "recent": [_node_ref(r) for r in result.get("recent", [])[:10]],
+    }
+
+
+def _synthesize(result: dict[str, Any], args: dict[str, Any]) -> dict[str, Any]:
+    if "job_id" in result:
+        # Queued as a background job; the user is notified when it finishes
+        return result
+    out = {"node": _node_ref(result.get("node", {}))}
+    if result.get("body_preview"):
+        out["preview"] = result["body_preview"]
+    return out
+
+
+_PROJECTIONS = {
+    "forest_search": _search,
+    "forest_read": _read,
+    "forest_capture": _capture,
+    "forest_stats": _stats,
+    "forest_synthesize": _synthesize,
+}
+
+
+class SizeReport:
+    """Raw vs projected result sizes (bytes of JSON) per tool, over sampled calls."""
+
+    def __init__(self, sample_every: int = SIZE_SAMPLE_EVERY) -> None:
+        self.sample_every = sample_every
+        self.calls: Counter[str] = Counter()
+        self.sampled: Counter[str] = Counter()
+        self.raw_bytes: Counter[str] = Counter()
+        self.sent_bytes: Counter[str] = Counter()
+
+    def should_sample(self, tool: str) -> bool:
+        """Count a call to ``tool``; True if this one should be measured."""
+        self.calls[tool] += 1
+        return (self.calls[tool] - 1) % self.sample_every == 0
+
+    def record(self, tool: str, raw: int, sent: int) -> None:
+        self.sampled[tool] += 1
+        self.raw_bytes[tool] += raw
+        self.sent_bytes[tool] += sent
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        return {
+            tool: {
+                "calls": self.calls[tool],
+                "sampled": self.sampled[tool],
+                "raw_bytes": self.raw_bytes[tool],
+                "sent_bytes": self.sent_bytes[tool],
+                "saved_pct": round(100 * (1 - self.sent_bytes[tool] / self.raw_bytes[tool]))
+                if self.raw_bytes[tool] else 0,
+            }
+            for tool in self.calls
+        }
+
+
+size_report = SizeReport()
+
+
+def encode_result(tool: str, result: Any, args: dict[str, Any]) -> str:
+    """Project ``result`` for ``tool`` and encode it as compact JSON."""
+    project = _PROJECTIONS.get(tool)
+    projected = project(result, args) if project and isinstance(result, dict) else result
+    text = json.dumps(projected, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    if size_report.should_sample(tool):
+        raw = len(json.dumps(result, default=str).encode())
+        sent = len(text.encode())
+        size_report.record(tool, raw, sent)
+        logger.debug("%s result: %d -> %d bytes", tool, raw, sent)
+    return text
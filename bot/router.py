@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import logging
+from collections import Counter
 from typing import Any, Protocol, TYPE_CHECKING
 
+from .intent import AGENT, Intent, classify
+from .jobs import current_chat_id
 from .tools import IdeaCLI, NovelCLI
 from . import formatting
 
 if TYPE_CHECKING:
     from .agent import Agent
+    from .jobs import SynthesizeQueue
+    from .nodeindex import NodeIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +24,9 @@ class ForestBackend(Protocol):
     async def stats(self) -> dict[str, Any]: ...
     async def tags(self) -> dict[str, Any]: ...
     async def synthesize(self, node_ids: list[str]) -> dict[str, Any]: ...
+    async def list_nodes(
+        self, query: str | None = None, tag: str | None = None, limit: int = 100, offset: int = 0,
+    ) -> dict[str, Any]: ...
 
 
 class Router:
@@ -28,11 +36,22 @@ class Router:
         ideas: IdeaCLI | None = None,
         novels: NovelCLI | None = None,
         agent: Agent | None = None,
+        jobs: SynthesizeQueue | None = None,
+        index: NodeIndex | None = None,
     ) -> None:
         self.forest = forest
         self.ideas = ideas
         self.novels = novels
         self.agent = agent
+        self.jobs = jobs
+        # Vouches for all-digit refs the classifier would otherwise not trust
+        self.index = index
+        # "fast:<kind>" for messages answered without the agent, "agent" otherwise
+        self.intent_stats: Counter[str] = Counter()
+
+    def fast_path_hit_rate(self) -> float:
+        total = sum(self.intent_stats.values())
+        return (total - self.intent_stats["agent"]) / total if total else 0.0
 
     async def handle_command(self, command: str, args: str) -> str:
         try:
@@ -59,6 +78,12 @@ class Router:
                     data = await self.forest.stats()
                     return formatting.format_stats(data)
 
+                case "jobs":
+                    if self.jobs is None:
+                        return "Synthesize jobs are only available in API mode."
+                    # Only the asking chat's jobs: others' node ids are theirs
+                    return formatting.format_jobs(self.jobs.jobs(current_chat_id.get()))
+
                 # --- Portfolio (icli) ---
                 case "ideas" | "idea" | "projects" | "project" | "portfolio":
                     return await self._handle_portfolio(command, args)
@@ -69,10 +94,10 @@ class Router:
 
                 # --- Meta ---
                 case "start" | "help":
-                    return formatting.format_help(has_tools=self.ideas is not None)
+                    return self._help()
 
                 case _:
-                    return formatting.format_help(has_tools=self.ideas is not None)
+                    return self._help()
 
         except Exception as e:
             return formatting.format_error(str(e))
@@ -82,9 +107,27 @@ class Router:
         text: str,
         on_tool_call: Any = None,
         reply_context: str | None = None,
+        on_text: Any = None,
+        on_search: Any = None,
     ) -> str:
-        """Free text goes through the LLM agent if available, else plain search."""
+        """Free text goes through the LLM agent if available, else plain search.
+
+        Obviously routable messages (bare node refs, "search ...", "stats")
+        skip the agent and go straight to the backend. When the reply is a
+        search listing, ``on_search`` gets the raw results (for buttons).
+        """
         if self.agent is not None:
+            # Replies carry context only the agent can use
+            is_known = self.index.resolves if self.index is not None else None
+            intent = AGENT if reply_context else classify(text, is_known)
+            if intent.is_fast:
+                reply = await self._handle_intent(intent, on_search)
+                if reply is not None:
+                    self.intent_stats[f"fast:{intent.kind}"] += 1
+                    return reply
+            self.intent_stats["agent"] += 1
+            logger.debug("Fast-path hit rate: %.2f", self.fast_path_hit_rate())
+
             try:
                 from .prompt import SYSTEM_PROMPT
 
@@ -95,17 +138,45 @@ class Router:
                     )
 
                 return await self.agent.run(
-                    user_message, SYSTEM_PROMPT, self.forest, on_tool_call=on_tool_call,
+                    user_message, SYSTEM_PROMPT, self.forest,
+                    on_tool_call=on_tool_call, on_text=on_text,
                 )
             except Exception:
                 logger.exception("Agent failed, falling back to search")
 
         try:
             data = await self.forest.search(text)
+            if on_search is not None:
+                on_search(data)
             return formatting.format_search(data)
         except Exception as e:
             return formatting.format_error(str(e))
 
+    async def _handle_intent(self, intent: Intent, on_search: Any = None) -> str | None:
+        """Answer a fast-path intent directly; None means escalate to the agent."""
+        try:
+            match intent.kind:
+                case "search":
+                    data = await self.forest.search(intent.arg)
+                    if on_search is not None:
+                        on_search(data)
+                    return formatting.format_search(data)
+                case "read":
+                    data = await self.forest.read(intent.arg)
+                    return formatting.format_read(data)
+                case "stats":
+                    data = await self.forest.stats()
+                    return formatting.format_stats(data)
+        except Exception:
+            # e.g. hex-looking text that isn't a node; let the agent make sense of it
+            logger.debug("Fast path %s failed, escalating", intent.kind, exc_info=True)
+        return None
+
+    def _help(self) -> str:
+        return formatting.format_help(
+            has_tools=self.ideas is not None, has_jobs=self.jobs is not None,
+        )
+
     async def _handle_capture(self, raw: str) -> str:
         parts = [p.strip() for p in raw.split("|")]
         title = parts[0]
@@ -0,0 +1,202 @@
+"""Multi-process mode: one front process, N bot workers sharded by chat id.
+
+The front process only terminates the webhook: it validates and acks each
+update and forwards the raw JSON to worker ``chat_id % N``. Every worker is
+a full JackBot (its own Agent, backend clients and caches) fed from its own
+queue, so each chat is handled by exactly one worker, in order, and
+per-chat state stays local. Workers that die are restarted.
+
+Updates still queued for a worker when it crashes are lost: Telegram has
+already been acked, and a queue whose reader died mid-read can't be
+trusted, so each restarted worker gets a fresh one.
+
+Each worker also keeps its own node index. They all crawl Forest once on
+start and then take turns, one crawl per ``index_sync`` seconds between
+them, so a worker's index is refreshed every ``index_sync * N`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing as mp
+import queue as queue_mod
+import signal
+import time
+from typing import Any
+
+from telegram import Bot, Update
+
+from .config import Config
+from .webhook import WebhookServer
+
+logger = logging.getLogger(__name__)
+
+SUPERVISE_INTERVAL = 1.0
+RESTART_BACKOFF_MAX = 30.0
+SHUTDOWN_GRACE = 10.0
+QUEUE_POLL = 1.0
+
+
+def chat_id_of(data: dict[str, Any]) -> int:
+    """Chat id of a raw update dict, falling back to the sender's id (0 if neither)."""
+    for key in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        if key in data:
+            return data[key].get("chat", {}).get("id", 0)
+    query = data.get("callback_query")
+    if query is not None:
+        message = query.get("message") or {}
+        if "chat" in message:
+            return message["chat"]["id"]
+    for value in data.values():
+        if isinstance(value, dict) and isinstance(value.get("from"), dict):
+            return value["from"].get("id", 0)
+    return 0
+
+
+def _worker_main(config: Config, index: int, queue: mp.Queue) -> None:
+    """Entry point of a worker process."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s  worker-{index}  %(name)s  %(levelname)s  %(message)s",
+    )
+    # Ctrl-C goes to the whole process group; the front shuts workers down in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .telegram import JackBot
+
+    bot = JackBot(config, worker=index)
+    asyncio.run(_serve_queue(bot, queue))
+
+
+async def _serve_queue(bot: Any, queue: mp.Queue) -> None:
+    app = bot.build_application()
+    loop = asyncio.get_running_loop()
+    stopping = False
+
+    def _stop() -> None:
+        nonlocal stopping
+        stopping = True
+
+    loop.add_signal_handler(signal.SIGTERM, _stop)
+
+    async with app:
+        await bot._startup(app)
+        await app.start()
+        try:
+            while not stopping:
+                # Poll with a timeout so SIGTERM is noticed and no thread stays blocked
+                try:
+                    data = await loop.run_in_executor(None, queue.get, True, QUEUE_POLL)
+                except queue_mod.Empty:
+                    continue
+                if data is None:
+                    break
+                update = Update.de_json(data, app.bot)
+                if update is not None:
+                    await app.update_queue.put(update)
+        finally:
+            await app.stop()
+            await bot._shutdown(app)
+
+
+class _Worker:
+    def __init__(self, ctx: Any, config: Config, index: int) -> None:
+        self._ctx = ctx
+        self._config = config
+        self.index = index
+        self.queue: Any = None
+        self.process: Any = None
+        self.restarts = 0
+        self._next_start = 0.0
+
+    def start(self) -> None:
+        self.queue = self._ctx.Queue()
+        self.process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._config, self.index, self.queue),
+            name=f"jack-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        logger.info("Started worker %d (pid %d)", self.index, self.process.pid)
+
+    def supervise(self) -> None:
+        if self.process.is_alive():
+            return
+        now = time.monotonic()
+        if self._next_start == 0.0:
+            self.restarts += 1
+            delay = min(RESTART_BACKOFF_MAX, 2 ** min(self.restarts, 5) / 2)
+            logger.error(
+                "Worker %d exited with %s; restarting in %.1fs",
+                self.index, self.process.exitcode, delay,
+            )
+            self._next_start = now + delay
+        if now >= self._next_start:
+            self._next_start = 0.0
+            self.start()
+
+    def stop(self) -> None:
+        if self.process is None or not self.process.is_alive():
+            return
+        self.queue.put(None)
+        self.process.join(SHUTDOWN_GRACE)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(SHUTDOWN_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+def run_sharded(config: Config) -> None:
+    """Run the webhook front process and ``config.workers`` supervised workers."""
+    asyncio.run(_run_front(config))
+
+
+async def _run_front(config: Config) -> None:
+    ctx = mp.get_context("spawn")
+    workers = [_Worker(ctx, config, i) for i in range(config.workers)]
+    for worker in workers:
+        worker.start()
+
+    async def _route(data: dict[str, Any]) -> None:
+        workers[chat_id_of(data) % len(workers)].queue.put(data)
+
+    server = WebhookServer(
+        _route,
+        secret_token=config.webhook_secret,
+        path=config.webhook_path,
+        host=config.webhook_listen,
+        port=config.webhook_port,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await server.start()
+    try:
+        if config.webhook_url:
+            bot_kwargs: dict[str, Any] = {}
+            if config.telegram_base_url:
+                bot_kwargs["base_url"] = config.telegram_base_url
+            async with Bot(config.telegram_token, **bot_kwargs) as bot:
+                await bot.set_webhook(
+                    url=config.webhook_url,
+                    secret_token=config.webhook_secret,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+        logger.info("Front process routing to %d workers", len(workers))
+        while not stop.is_set():
+            for worker in workers:
+                worker.supervise()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=SUPERVISE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await server.stop()
+        await asyncio.gather(*(asyncio.to_thread(w.stop) for w in workers))
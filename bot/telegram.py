@@ -1,10 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import html
 import logging
+import os
 import re
+import signal
+import tempfile
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
 
-import httpx
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ChatAction, ParseMode
 from telegram.ext import (
@@ -16,16 +22,32 @@ from telegram.ext import (
     filters,
 )
 
-from .agent import Agent, _tool_label
+from .agent import EMPTY_ANSWER, Agent, _tool_label
+from .cache import CachedForest
+from .coalesce import CoalescingForest
 from .config import Config
 from .forest import ForestCLI
 from .forest_api import ForestAPI
-from .router import Router
+from .jobs import Job, SynthesizeQueue, current_chat_id
+from .journal import CaptureJournal, PendingCapture
+from .nodeindex import IndexedForest
+from .outbound import Outbound
+from .pages import MAX_PAGES, PageCache
+from .procpool import ProcessPool
+from .router import ForestBackend, Router
 from .tools import IdeaCLI, NovelCLI
-from . import formatting
+from .transport import Transport
+from .updates import ChatOrderedUpdateProcessor
+from .webhook import WebhookServer
+from . import bulk, export, formatting, markup, projection
 
 logger = logging.getLogger(__name__)
 
+# Largest file the Bot API lets a bot download
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+# Largest file a bot can send
+MAX_SEND_BYTES = 50 * 1024 * 1024
+
 
 def _build_keyboard(buttons: list[tuple[str, str]]) -> InlineKeyboardMarkup | None:
     if not buttons:
@@ -35,35 +57,266 @@ def _build_keyboard(buttons: list[tuple[str, str]]) -> InlineKeyboardMarkup | No
     )
 
 
+def _page_keyboard(page: int, total: int) -> InlineKeyboardMarkup:
+    """Prev / counter / Next row for page ``page`` (0-based) of ``total``."""
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton("‹ Prev", callback_data=f"page:{page}"))
+    row.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"page:{page + 1}"))
+    if page + 1 < total:
+        row.append(InlineKeyboardButton("Next ›", callback_data=f"page:{page + 2}"))
+    return InlineKeyboardMarkup([row])
+
+
+def _is_import(text: str | None) -> bool:
+    return bool(text) and re.match(r"/import(?:@\w+)?(?:\s|$)", text) is not None
+
+
+def _update_enqueuer(
+    queue: asyncio.Queue, bot: Any,
+) -> Callable[[dict[str, Any]], Awaitable[None]]:
+    """Webhook hook that parses an update onto ``queue``.
+
+    An update that won't parse is logged and dropped: raising would make
+    the server answer 503, and Telegram would redeliver it forever ahead
+    of everything else. Only a full queue raises (QueueFull), so that
+    Telegram retries later.
+    """
+
+    async def _enqueue(data: dict[str, Any]) -> None:
+        try:
+            update = Update.de_json(data, bot)
+        except Exception:
+            logger.exception("Dropping malformed update %s", data.get("update_id"))
+            return
+        if update is not None:
+            queue.put_nowait(update)
+
+    return _enqueue
+
+
+def _strip_tags(text: str) -> str:
+    """Drop HTML tags, including a trailing tag that is still being streamed."""
+    return re.sub(r"<[^>]*(>|$)", "", text)
+
+
+class _DraftMessage:
+    """A reply that is edited in place as streamed text arrives.
+
+    Edits go through the outbound scheduler's coalescing slot for this
+    draft: they are paced by the chat's rate limit, and text that arrives
+    while an edit waits replaces it. Draft text is shown with tags
+    stripped, since partial HTML would not parse.
+    """
+
+    def __init__(self, outbound: Outbound, message: Any) -> None:
+        self._outbound = outbound
+        self._message = message
+        self._chat_id = message.chat_id
+        self._key = ("draft", message.chat_id, message.message_id)
+        self._sent: Any = None
+        self._shown = ""
+
+    async def update(self, text: str) -> None:
+        if not text:
+            # The streamed text was preamble to a tool round
+            await self.discard()
+            return
+        pending = _strip_tags(text)[: formatting.TELEGRAM_MAX].strip()
+        if pending:
+            self._outbound.coalesce(self._key, self._chat_id, lambda: self._show(pending))
+
+    async def _show(self, text: str) -> None:
+        if text == self._shown:
+            return
+        if self._sent is None:
+            self._sent = await self._message.reply_text(text)
+        else:
+            await self._sent.edit_text(text)
+        self._shown = text
+
+    async def discard(self) -> None:
+        """Delete the draft, e.g. when its run was superseded."""
+        await self._outbound.settle(self._key)
+        if self._sent is not None:
+            try:
+                await self._outbound.send(self._chat_id, self._sent.delete)
+            except Exception:
+                logger.debug("Draft delete failed", exc_info=True)
+            self._sent = None
+            self._shown = ""
+
+    async def finish(self, reply: str) -> bool:
+        """Replace the draft with the final HTML reply. False if nothing was sent yet."""
+        await self._outbound.settle(self._key)
+        if self._sent is None:
+            return False
+        if len(reply) > formatting.TELEGRAM_MAX or not reply.strip():
+            # Too long to edit into one message (the caller sends it paged), or
+            # nothing to show: the draft must not stand in for the answer
+            await self.discard()
+            return False
+        sent = self._sent
+        try:
+            await self._outbound.send(
+                self._chat_id, lambda: sent.edit_text(reply, parse_mode=ParseMode.HTML),
+            )
+        except Exception:
+            logger.warning("HTML parse failed, stripping tags")
+            plain = _strip_tags(reply)
+            if plain != self._shown:
+                await self._outbound.send(self._chat_id, lambda: sent.edit_text(plain))
+        return True
+
+
+class _StatusMessage:
+    """A progress message edited in place, then deleted when the work is done.
+
+    Updates that come faster than the chat's rate limit are coalesced to
+    the latest one. ``send`` posts the first update; later ones edit it.
+    """
+
+    def __init__(
+        self, outbound: Outbound, chat_id: int, key: tuple,
+        send: Callable[[str], Awaitable[Any]],
+    ) -> None:
+        self._outbound = outbound
+        self._chat_id = chat_id
+        self._key = key
+        self._send = send
+        self._sent: Any = None
+
+    def update(self, text: str) -> None:
+        self._outbound.coalesce(self._key, self._chat_id, lambda: self._show(text))
+
+    async def _show(self, text: str) -> None:
+        if self._sent is None:
+            self._sent = await self._send(text)
+        else:
+            await self._sent.edit_text(text)
+
+    async def close(self) -> None:
+        await self._outbound.settle(self._key)
+        if self._sent is not None:
+            try:
+                await self._outbound.send(self._chat_id, self._sent.delete)
+            except Exception:
+                logger.debug("Status delete failed", exc_info=True)
+            self._sent = None
+
+
 class JackBot:
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, worker: int = 0) -> None:
         self.config = config
+        # Index of this process among config.workers sharded workers
+        self.worker = worker
 
+        # HTTP clients for Forest and OpenRouter, warmed up on start and closed on shutdown
+        self.transport = Transport()
+
+        self.forest: ForestBackend
+        self.procs: ProcessPool | None
         if config.mode == "api":
             self.forest = ForestAPI(
                 base_url=config.forest_url,
                 api_key=config.forest_api_key,
+                client=self.transport.client(
+                    "forest",
+                    config.forest_url,
+                    max_connections=config.forest_max_connections,
+                    keepalive_expiry=config.forest_keepalive,
+                    http2=config.http2,
+                ),
             )
             self.ideas = None
             self.novels = None
+            self.procs = None
         else:
-            self.forest = ForestCLI(bin=config.forest_bin)
-            self.ideas = IdeaCLI()
-            self.novels = NovelCLI()
+            # One pool bounds every CLI subprocess (forest, icli, ncli) together
+            self.procs = ProcessPool(config.cli_concurrency)
+            self.forest = ForestCLI(bin=config.forest_bin, pool=self.procs)
+            self.ideas = IdeaCLI(pool=self.procs)
+            self.novels = NovelCLI(pool=self.procs)
+
+        # Concurrent identical reads share one backend call; the cache sits on top
+        self.coalescer = CoalescingForest(self.forest)
+        self.forest = self.coalescer
+
+        self.cache: CachedForest | None = None
+        if config.cache_size > 0:
+            self.cache = CachedForest(self.forest, max_entries=config.cache_size)
+            self.forest = self.cache
+
+        # Node refs are resolved against a local index, so Forest only sees full ids
+        self.indexed = IndexedForest(self.forest)
+        self.forest = self.indexed
+
+        # Optional write-behind: captures are journaled locally and committed in the background
+        self.journal: CaptureJournal | None = None
+        if config.capture_journal:
+            self.journal = CaptureJournal(self.forest, config.capture_journal)
+            self.journal.on_done = self._notify_capture
+            self.forest = self.journal
+
+        # Synthesize runs as a background job (API mode only; the CLI can't synthesize)
+        self.jobs: SynthesizeQueue | None = None
+        if config.mode == "api":
+            self.jobs = SynthesizeQueue(
+                self.forest,
+                concurrency=config.synth_concurrency,
+                max_pending=config.synth_queue_size,
+            )
+            self.jobs.on_done = self._notify_job
+            self.forest = self.jobs
 
         # LLM agent (optional — needs API key)
         self.agent: Agent | None = None
         if config.openrouter_api_key:
-            self._http_client = httpx.AsyncClient()
             self.agent = Agent(
-                client=self._http_client,
+                client=self.transport.client(
+                    "openrouter",
+                    config.openrouter_base_url,
+                    max_connections=config.openrouter_max_connections,
+                    keepalive_expiry=config.openrouter_keepalive,
+                    http2=config.http2,
+                ),
                 api_key=config.openrouter_api_key,
                 model=config.openrouter_model,
                 base_url=config.openrouter_base_url,
+                stream=config.openrouter_stream,
+                token_budget=config.agent_token_budget,
+                fallback_models=config.openrouter_fallback_models,
+                hedge=config.openrouter_hedge,
+                router_model=config.openrouter_router_model or None,
+            )
+            logger.info(
+                "Agent enabled (model=%s, fallbacks=%s, router=%s)",
+                config.openrouter_model,
+                ",".join(config.openrouter_fallback_models) or "none",
+                config.openrouter_router_model or "none",
             )
-            logger.info("Agent enabled (model=%s)", config.openrouter_model)
 
-        self.router = Router(self.forest, self.ideas, self.novels, agent=self.agent)
+        self.router = Router(
+            self.forest, self.ideas, self.novels, agent=self.agent, jobs=self.jobs,
+            index=self.indexed.index,
+        )
+        self._app: Application | None = None
+
+        # All outgoing messages, edits and chat actions are paced through here.
+        # Workers share Telegram's global limit, so each gets a slice of it.
+        self.outbound = Outbound(
+            rate=max(1.0, config.outbound_rate / config.workers),
+            chat_rate=config.outbound_chat_rate,
+        )
+
+        # Pages of long replies, flipped with Prev/Next without re-running anything
+        self.pages = PageCache()
+
+        # In-flight agent run per chat id, cancelled when a newer message arrives
+        self._inflight: dict[int, asyncio.Task] = {}
+        # Detached agent runs no longer hold an update processor slot, so they
+        # share their own limit of the same size
+        self._agent_slots = asyncio.Semaphore(config.max_concurrent_updates)
 
     def _is_authorized(self, update: Update) -> bool:
         user = update.effective_user
@@ -75,33 +328,255 @@ class JackBot:
             return
 
         assert update.message is not None
-        await update.message.chat.send_action(ChatAction.TYPING)
+        message = update.message
+        await self._typing(message.chat)
 
-        args = update.message.text.split(maxsplit=1)[1] if " " in update.message.text else ""
+        args = message.text.split(maxsplit=1)[1] if " " in message.text else ""
         if not args:
-            await update.message.reply_text("Usage: /search <query>")
+            await self._reply(message, "Usage: /search <query>", parse_mode=None)
             return
 
+        await self._search_reply(message, args)
+
+    async def _search_reply(self, message: Any, query: str) -> None:
         try:
-            data = await self.forest.search(args)
+            data = await self.forest.search(query)
             text = formatting.format_search(data)
             keyboard = _build_keyboard(formatting.search_buttons(data))
-            await update.message.reply_text(text, parse_mode=ParseMode.HTML, reply_markup=keyboard)
+            await self._reply(message, text, reply_markup=keyboard)
+        except Exception as e:
+            await self._reply(message, formatting.format_error(str(e)))
+
+    async def _reply(self, message: Any, text: str, **kwargs: Any) -> Any:
+        """Reply to ``message`` through the outbound scheduler (HTML unless overridden)."""
+        kwargs.setdefault("parse_mode", ParseMode.HTML)
+        if len(text) > formatting.TELEGRAM_MAX:
+            return await self._reply_long(message, text, kwargs["parse_mode"])
+        return await self.outbound.send(message.chat_id, lambda: message.reply_text(text, **kwargs))
+
+    async def _reply_long(self, message: Any, text: str, parse_mode: str | None) -> Any:
+        """Send an over-long reply as cached pages, or as a text file if it's huge.
+
+        Search results, the only replies with their own buttons, are
+        truncated when formatted and never get here.
+        """
+        if parse_mode != ParseMode.HTML:
+            text = html.escape(text)
+        pages = formatting.paginate(text)
+
+        if len(pages) > MAX_PAGES:
+            plain = html.unescape(_strip_tags(text))
+            caption = plain.split("\n", 1)[0][:200]
+            name = re.sub(r"[^\w-]+", "-", caption).strip("-")[:40] or "reply"
+            return await self.outbound.send(
+                message.chat_id,
+                lambda: message.reply_document(
+                    plain.encode(),
+                    filename=f"{name}.txt",
+                    caption=f"{caption} ({len(plain):,} chars)",
+                ),
+            )
+
+        sent = await self.outbound.send(
+            message.chat_id,
+            lambda: message.reply_text(
+                pages[0], parse_mode=ParseMode.HTML, reply_markup=_page_keyboard(0, len(pages)),
+            ),
+        )
+        self.pages.put(sent.chat_id, sent.message_id, pages)
+        return sent
+
+    async def _turn_page(self, query: Any, arg: str) -> None:
+        """Show page ``arg`` (1-based) of a paged reply, straight from the page cache."""
+        message = query.message
+        try:
+            page = int(arg) - 1
+        except ValueError:
+            await query.answer()
+            return
+        hit = self.pages.get(message.chat_id, message.message_id, page)
+        if hit is None:
+            await query.answer("These pages have expired; run the command again.", show_alert=True)
+            return
+        await query.answer()
+        text, total = hit
+        try:
+            await self.outbound.send(
+                message.chat_id,
+                lambda: message.edit_text(
+                    text, parse_mode=ParseMode.HTML, reply_markup=_page_keyboard(page, total),
+                ),
+            )
+        except Exception:
+            # Tapping the counter re-shows the current page ("message is not modified")
+            logger.debug("Page edit failed", exc_info=True)
+
+    async def _typing(self, chat: Any) -> None:
+        await self.outbound.typing(chat.id, lambda: chat.send_action(ChatAction.TYPING))
+
+    async def _import_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """/import with one note per line, or a .md/.jsonl/.csv/.txt file sent with /import."""
+        if not self._is_authorized(update):
+            return
+
+        assert update.message is not None
+        message = update.message
+        # Journaled captures that fail report back to this chat
+        current_chat_id.set(message.chat_id)
+        document = message.document
+        if document is None:
+            # Notes may start on the line after the command
+            parts = message.text.split(maxsplit=1)
+            args = parts[1] if len(parts) > 1 else ""
+            if not args.strip():
+                await self._reply(
+                    message,
+                    "Usage: /import followed by one <i>Title | Body | #tags</i> note per line, "
+                    "or send a .md, .jsonl, .csv or .txt file with the caption /import.",
+                )
+                return
+            notes = bulk.parse_lines(args.splitlines())
+            await self._bulk_capture(message, "message", notes)
+            return
+
+        # A forwarded or stray file must not be mass-captured: ask for /import
+        replied = message.reply_to_message
+        if not (
+            _is_import(message.caption)
+            or (replied is not None and _is_import(replied.text))
+        ):
+            if bulk.format_for(message.document.file_name or ""):
+                await self._reply(
+                    message, "To capture the notes in this file, send it with the caption /import.",
+                    parse_mode=None,
+                )
+            return
+
+        name = document.file_name or "upload"
+        fmt = bulk.format_for(name)
+        if fmt is None:
+            await self._reply(message, "I can import .md, .jsonl, .csv and .txt files.", parse_mode=None)
+            return
+        if document.file_size and document.file_size > MAX_UPLOAD_BYTES:
+            await self._reply(message, "That file is too big for the Bot API to download (20 MB max).", parse_mode=None)
+            return
+
+        # Downloaded to disk and parsed from there a line at a time
+        fd, tmp = tempfile.mkstemp(prefix="jack-import-", suffix=Path(name).suffix)
+        os.close(fd)
+        path = Path(tmp)
+        try:
+            file = await document.get_file()
+            await file.download_to_drive(path)
+            await self._bulk_capture(message, name, bulk.notes_from_file(path, fmt))
+        except Exception as e:
+            await self._reply(message, formatting.format_error(str(e)))
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def _bulk_capture(self, message: Any, label: str, notes: bulk.NoteStream) -> None:
+        """Capture ``notes`` with a coalesced progress message, then reply with a summary."""
+        status = _StatusMessage(
+            self.outbound, message.chat_id, ("import", message.chat_id, message.message_id),
+            message.reply_text,
+        )
+
+        def _on_progress(result: bulk.BulkResult) -> None:
+            status.update(formatting.format_bulk_progress(label, result))
+
+        try:
+            result = await bulk.run_bulk(
+                self.forest, notes, self.config.bulk_concurrency, on_progress=_on_progress,
+            )
+        finally:
+            await status.close()
+        logger.info(
+            "Imported %s: %d captured, %d failed",
+            label, result.created_count, result.failed_count,
+        )
+        await self._reply(message, formatting.format_bulk_summary(label, result))
+
+    async def _export_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """/export [md|jsonl] [#tag | query] — stream matching nodes into a gzipped document."""
+        if not self._is_authorized(update):
+            return
+
+        assert update.message is not None
+        message = update.message
+        chat_id = message.chat_id
+        args = message.text.split()[1:]
+        fmt = "md"
+        if args and args[0].lower() in ("md", "markdown", "jsonl"):
+            fmt = "jsonl" if args.pop(0).lower() == "jsonl" else "md"
+        tag = query = None
+        if len(args) == 1 and args[0].startswith("#"):
+            tag = args[0]
+        elif args:
+            query = " ".join(args)
+        label = tag or (f'"{query}"' if query else "all nodes")
+
+        status = _StatusMessage(
+            self.outbound, chat_id, ("export", chat_id, message.message_id), message.reply_text,
+        )
+
+        def _on_progress(result: export.ExportResult) -> None:
+            status.update(formatting.format_export_progress(label, result))
+
+        stem = re.sub(r"[^\w-]+", "-", (tag or query or "forest").lstrip("#")).strip("-")[:40] or "forest"
+        fd, tmp = tempfile.mkstemp(prefix="jack-export-", suffix=f".{fmt}.gz")
+        os.close(fd)
+        path = Path(tmp)
+        try:
+            # Reads skip the cache so a big export doesn't evict everything in it
+            result = await export.export(
+                self.coalescer, path, fmt, query=query, tag=tag,
+                concurrency=self.config.export_concurrency, on_progress=_on_progress,
+            )
+            logger.info(
+                "Exported %s: %d nodes, %d failed, %.1f nodes/s",
+                label, result.nodes, result.failed, result.rate,
+            )
+            if result.nodes == 0:
+                await self._reply(message, f"Nothing to export for {label}.", parse_mode=None)
+            elif result.bytes_written > MAX_SEND_BYTES:
+                await self._reply(
+                    message,
+                    f"The export is {result.bytes_written / 2**20:.0f} MB gzipped, over "
+                    f"Telegram's 50 MB limit; narrow it down with a tag or query.",
+                    parse_mode=None,
+                )
+            else:
+                caption = formatting.format_export_summary(label, result)
+
+                async def _send() -> Any:
+                    # Reopened on each attempt, since a retry needs the file from the start
+                    with path.open("rb") as f:
+                        return await message.reply_document(
+                            f, filename=f"{stem}.{fmt}.gz", caption=caption,
+                        )
+
+                await self.outbound.send(chat_id, _send)
         except Exception as e:
-            await update.message.reply_text(formatting.format_error(str(e)), parse_mode=ParseMode.HTML)
+            await self._reply(message, formatting.format_error(str(e)))
+        finally:
+            await status.close()
+            path.unlink(missing_ok=True)
 
     async def _command_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not self._is_authorized(update):
             return
 
         assert update.message is not None
-        await update.message.chat.send_action(ChatAction.TYPING)
+        await self._typing(update.message.chat)
+
+        # Journaled captures report back to this chat
+        current_chat_id.set(update.message.chat.id)
 
         command = update.message.text.split()[0].lstrip("/").split("@")[0]
         args = update.message.text.split(maxsplit=1)[1] if " " in update.message.text else ""
 
         reply = await self.router.handle_command(command, args)
-        await update.message.reply_text(reply, parse_mode=ParseMode.HTML)
+        await self._reply(update.message, reply)
 
     async def _text_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Free text → agent (if available) or search with inline buttons."""
@@ -118,75 +593,192 @@ class JackBot:
             reply_context = reply_msg.text
 
         if self.agent is not None:
-            # Status message: edited in-place as tool calls happen
-            status_msg = None
-
-            async def _on_tool_call(step: int, name: str, args: dict) -> None:
-                nonlocal status_msg
-                label = _tool_label(name, args)
-                text = f"Step {step}: {label}"
-                if status_msg is None:
-                    status_msg = await chat.send_message(text)
-                else:
-                    await status_msg.edit_text(text)
-
-            # Typing keepalive: re-send every 4s so Telegram doesn't drop the indicator
-            typing_task = asyncio.create_task(self._typing_keepalive(chat))
-            try:
-                reply = await self.router.handle_text(
-                    update.message.text,
-                    on_tool_call=_on_tool_call,
-                    reply_context=reply_context,
-                )
-            finally:
-                typing_task.cancel()
+            if not self.config.cancel_superseded:
+                await self._agent_run(update.message, reply_context, None)
+                return
+
+            # A newer message in the same chat supersedes the run in flight
+            previous = self._inflight.get(chat.id)
+            if previous is not None and not previous.done():
+                logger.info("Cancelling superseded agent run in chat %s", chat.id)
+                previous.cancel()
+            run = asyncio.create_task(self._agent_run(update.message, reply_context, previous))
+            self._inflight[chat.id] = run
+            run.add_done_callback(lambda t, chat_id=chat.id: self._agent_done(chat_id, t))
+            # Return without awaiting so the next update can supersede this one
+            return
 
-            # Clean up status message
-            if status_msg is not None:
-                try:
-                    await status_msg.delete()
-                except Exception:
-                    pass
+        # No agent — plain search with inline buttons
+        await self._typing(chat)
+        await self._search_reply(update.message, update.message.text)
+
+    async def _agent_run(
+        self, message: Any, reply_context: str | None, previous: asyncio.Task | None,
+    ) -> None:
+        """Run the agent once the superseded run has cleaned up and a slot is free."""
+        if previous is not None:
+            # Keeps the chat's replies in order: the old draft is gone before the new one starts
+            await asyncio.gather(previous, return_exceptions=True)
+        async with self._agent_slots:
+            await self._agent_reply(message, reply_context)
+
+    async def _agent_reply(self, message: Any, reply_context: str | None) -> None:
+        """Run the agent for one message and reply, cleaning up if cancelled."""
+        chat = message.chat
+        # Background jobs started by this run report back to this chat
+        current_chat_id.set(chat.id)
+
+        # Status message: edited in-place as tool calls happen. Steps that come
+        # faster than the chat's rate limit are coalesced to the latest one.
+        status = _StatusMessage(
+            self.outbound, chat.id, ("status", chat.id, message.message_id), chat.send_message,
+        )
 
-            try:
-                await update.message.reply_text(reply, parse_mode=ParseMode.HTML)
-            except Exception:
-                # HTML parse failure (bad LLM output) — strip tags and retry as plain text
-                logger.warning("HTML parse failed, stripping tags")
-                plain = re.sub(r"<[^>]+>", "", reply)
-                await update.message.reply_text(plain)
+        async def _on_tool_call(step: int, name: str, args: dict) -> None:
+            status.update(f"Step {step}: {_tool_label(name, args)}")
+
+        # Streamed answer text: edited in-place as tokens arrive
+        draft = _DraftMessage(self.outbound, message)
+
+        # Search listings answered without the agent keep their Read buttons
+        keyboard: InlineKeyboardMarkup | None = None
+
+        def _on_search(data: dict[str, Any]) -> None:
+            nonlocal keyboard
+            keyboard = _build_keyboard(formatting.search_buttons(data))
+
+        # Typing keepalive: re-send every 4s so Telegram doesn't drop the indicator
+        typing_task = asyncio.create_task(self._typing_keepalive(chat))
+        try:
+            reply = await self.router.handle_text(
+                message.text,
+                on_tool_call=_on_tool_call,
+                reply_context=reply_context,
+                on_text=draft.update,
+                on_search=_on_search,
+            )
+        except asyncio.CancelledError:
+            await draft.discard()
+            raise
+        finally:
+            typing_task.cancel()
+            await status.close()
+
+        # LLM HTML is repaired up front rather than bounced by Telegram
+        reply = markup.sanitize(reply)
+        if not reply.strip():
+            reply = EMPTY_ANSWER
+        if keyboard is not None:
+            # A draft can't take the buttons; the listing goes out as a new message
+            await draft.discard()
+        elif await draft.finish(reply):
             return
 
-        # No agent — plain search with inline buttons
-        await chat.send_action(ChatAction.TYPING)
         try:
-            data = await self.forest.search(update.message.text)
-            text = formatting.format_search(data)
-            keyboard = _build_keyboard(formatting.search_buttons(data))
-            await update.message.reply_text(text, parse_mode=ParseMode.HTML, reply_markup=keyboard)
-        except Exception as e:
-            await update.message.reply_text(formatting.format_error(str(e)), parse_mode=ParseMode.HTML)
+            await self._reply(message, reply, reply_markup=keyboard)
+        except Exception:
+            # Last resort if Telegram still rejects it — strip tags and retry as plain text
+            logger.warning("HTML parse failed, stripping tags")
+            plain = _strip_tags(reply)
+            await self._reply(message, plain, parse_mode=None, reply_markup=keyboard)
+
+    async def _notify(self, chat_id: int | None, text: str, result: dict[str, Any] | None) -> None:
+        """Send background work's outcome to ``chat_id``, with a Read button for its node."""
+        if chat_id is None or self._app is None:
+            return
+        keyboard = None
+        rid = (result or {}).get("node", {}).get("id", "")[:8]
+        if rid:
+            keyboard = _build_keyboard([("Read", f"read:{rid}")])
+        bot = self._app.bot
+        await self.outbound.send(
+            chat_id,
+            lambda: bot.send_message(
+                chat_id, text, parse_mode=ParseMode.HTML, reply_markup=keyboard,
+            ),
+        )
+
+    async def _notify_job(self, job: Job) -> None:
+        """Send a finished synthesize job's result to the chat that started it."""
+        await self._notify(
+            job.chat_id, formatting.format_job_done(job),
+            job.result if job.status == "done" else None,
+        )
+
+    async def _notify_capture(self, capture: PendingCapture) -> None:
+        """Tell the chat that made a journaled capture its real node id (or that it failed)."""
+        await self._notify(capture.chat_id, formatting.format_capture_done(capture), capture.result)
+
+    async def _startup(self, app: Application) -> None:
+        # Replays captures left pending by a previous run
+        if self.journal is not None:
+            self.journal.start()
+        # Only the API can list every node; in CLI mode the index learns from responses.
+        # Sharded workers each keep their own index: all sync on start, then take
+        # turns so Forest still sees one full crawl per index_sync seconds.
+        if self.config.mode == "api":
+            self.indexed.start(
+                self.config.index_sync * self.config.workers,
+                phase=self.config.index_sync * self.worker,
+            )
+        await self.transport.warm_up()
+
+    async def _shutdown(self, app: Application) -> None:
+        if self.jobs is not None:
+            await self.jobs.close()
+        if self.journal is not None:
+            logger.info(
+                "Capture journal: %d committed, %d retries, %d pending",
+                self.journal.committed, self.journal.retries, self.journal.pending_count(),
+            )
+            await self.journal.close()
+        await self.indexed.close()
+        await self.transport.close()
+        logger.info("HTTP pools: %s", self.transport.metrics())
+        logger.info("Outbound: %s", self.outbound.metrics())
+        if self.cache is not None:
+            logger.info("Backend cache: %s", self.cache.cache_info())
+        logger.info("Backend coalescing: %s", self.coalescer.coalesce_info())
+        logger.info("Node index: %s", self.indexed.index_info())
+        logger.info("Tool result sizes: %s", projection.size_report.summary())
+        logger.info(
+            "Fast path: %.2f hit rate %s",
+            self.router.fast_path_hit_rate(), dict(self.router.intent_stats),
+        )
+        if self.procs is not None:
+            logger.info("CLI processes: %s", self.procs.metrics())
 
-    @staticmethod
-    async def _typing_keepalive(chat: Any) -> None:
-        """Send TYPING action every 4 seconds until cancelled."""
+    def _agent_done(self, chat_id: int, task: asyncio.Task) -> None:
+        if self._inflight.get(chat_id) is task:
+            del self._inflight[chat_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Agent reply failed", exc_info=task.exception())
+
+    async def _typing_keepalive(self, chat: Any) -> None:
+        """Send TYPING action every 4 seconds until cancelled (skipped when redundant)."""
         try:
             while True:
-                await chat.send_action(ChatAction.TYPING)
+                await self._typing(chat)
                 await asyncio.sleep(4)
         except asyncio.CancelledError:
             pass
 
     async def _callback_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle inline button presses (e.g. read:abcd1234)."""
+        """Handle inline button presses (e.g. read:abcd1234, page:2)."""
         if not self._is_authorized(update):
             return
 
         query = update.callback_query
         assert query is not None
-        await query.answer()
 
         data = query.data or ""
+        if data.startswith("page:"):
+            await self._turn_page(query, data[5:])
+            return
+
+        # Answering a callback isn't a chat message, so it skips the scheduler
+        await query.answer()
+
         if data.startswith("read:"):
             ref = data[5:]
             try:
@@ -194,17 +786,32 @@ class JackBot:
                 text = formatting.format_read(result)
             except Exception as e:
                 text = formatting.format_error(str(e))
-            await query.message.reply_text(text, parse_mode=ParseMode.HTML)
-
-    def run(self) -> None:
-        app = Application.builder().token(self.config.telegram_token).build()
+            await self._reply(query.message, text)
+
+    def build_application(self) -> Application:
+        builder = (
+            Application.builder()
+            .token(self.config.telegram_token)
+            .concurrent_updates(
+                ChatOrderedUpdateProcessor(
+                    self.config.max_concurrent_updates,
+                    fast_concurrent=self.config.fast_concurrent,
+                )
+            )
+            .post_init(self._startup)
+            .post_shutdown(self._shutdown)
+        )
+        if self.config.telegram_base_url:
+            builder = builder.base_url(self.config.telegram_base_url)
+        app = builder.build()
+        self._app = app
 
         # Search gets its own handler for inline buttons
         for cmd in ("search", "s"):
             app.add_handler(CommandHandler(cmd, self._search_handler))
 
         # Forest commands (always available)
-        forest_commands = ("read", "r", "capture", "c", "stats", "start", "help")
+        forest_commands = ("read", "r", "capture", "c", "stats", "jobs", "start", "help")
 
         # Portfolio/novel commands (only in CLI mode)
         tool_commands = (
@@ -219,9 +826,60 @@ class JackBot:
         for cmd in all_commands:
             app.add_handler(CommandHandler(cmd, self._command_handler))
 
+        app.add_handler(CommandHandler("export", self._export_handler))
+
+        # Bulk capture from a message or an uploaded file
+        app.add_handler(CommandHandler("import", self._import_handler))
+        # Files are only imported when captioned /import or sent in reply to /import
+        app.add_handler(MessageHandler(filters.Document.ALL, self._import_handler))
+
         app.add_handler(CallbackQueryHandler(self._callback_handler))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._text_handler))
+        return app
+
+    def run(self) -> None:
+        app = self.build_application()
 
         mode_label = f"mode={self.config.mode}"
+        if self.config.transport == "webhook":
+            logger.info(f"Jack bot starting ({mode_label}, webhook)...")
+            asyncio.run(self._run_webhook(app))
+            return
+
         logger.info(f"Jack bot starting ({mode_label}, long polling)...")
         app.run_polling(allowed_updates=Update.ALL_TYPES)
+
+    async def _run_webhook(self, app: Application) -> None:
+        """Serve the webhook endpoint and feed updates into the application's queue."""
+
+        server = WebhookServer(
+            _update_enqueuer(app.update_queue, app.bot),
+            secret_token=self.config.webhook_secret,
+            path=self.config.webhook_path,
+            host=self.config.webhook_listen,
+            port=self.config.webhook_port,
+        )
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        async with app:
+            # run_polling calls post_init itself; here it's on us
+            await self._startup(app)
+            await app.start()
+            await server.start()
+            try:
+                if self.config.webhook_url:
+                    await app.bot.set_webhook(
+                        url=self.config.webhook_url,
+                        secret_token=self.config.webhook_secret,
+                        allowed_updates=Update.ALL_TYPES,
+                    )
+                await stop.wait()
+            finally:
+                await server.stop()
+                await app.stop()
+                # run_polling calls post_shutdown itself; here it's on us
+                await self._shutdown(app)
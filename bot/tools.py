@@ -2,35 +2,28 @@
 
 from __future__ import annotations
 
-import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from .procpool import ProcessPool
 
 
 @dataclass
 class ToolCLI:
     bin: str
     timeout: float = 30.0
+    pool: ProcessPool = field(default_factory=ProcessPool)
 
     async def _run(self, *args: str) -> str:
-        proc = await asyncio.create_subprocess_exec(
-            self.bin, *args,
-            stdin=asyncio.subprocess.DEVNULL,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(),
-            timeout=self.timeout,
-        )
-        if proc.returncode != 0:
+        returncode, stdout, stderr = await self.pool.run(self.bin, *args, timeout=self.timeout)
+        if returncode != 0:
             err = stderr.decode().strip() or stdout.decode().strip()
-            raise RuntimeError(f"{self.bin} exited {proc.returncode}: {err}")
+            raise RuntimeError(f"{self.bin} exited {returncode}: {err}")
         return stdout.decode().strip()
 
 
 class IdeaCLI(ToolCLI):
-    def __init__(self) -> None:
-        super().__init__(bin="icli")
+    def __init__(self, pool: ProcessPool | None = None) -> None:
+        super().__init__(bin="icli", pool=pool or ProcessPool())
 
     async def search(self, query: str) -> str:
         return await self._run("search", query)
@@ -61,8 +54,8 @@ class IdeaCLI(ToolCLI):
 
 
 class NovelCLI(ToolCLI):
-    def __init__(self) -> None:
-        super().__init__(bin="ncli")
+    def __init__(self, pool: ProcessPool | None = None) -> None:
+        super().__init__(bin="ncli", pool=pool or ProcessPool())
 
     async def ls(self, query: str | None = None) -> str:
         args = ["ls"]
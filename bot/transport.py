@@ -0,0 +1,141 @@
+"""Shared HTTP clients for the upstreams Jack talks to (Forest API, OpenRouter).
+
+JackBot owns one Transport, which owns one tuned httpx.AsyncClient per
+upstream: connection limits and keepalive are set per upstream, HTTP/2 is
+used when asked for and the ``h2`` package is installed, connections are
+opened at startup so the first user request doesn't pay for DNS and TLS,
+and every client is closed on shutdown.
+
+Each client records how long requests wait for a pooled connection,
+measured from the request start until httpcore begins connecting or
+writing, so a pool that is too small shows up as wait time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT = 5.0
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    new_connections: int = 0
+    wait_seconds: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, waited: float, new_connection: bool) -> None:
+        self.requests += 1
+        self.new_connections += new_connection
+        self.wait_seconds += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "avg_pool_wait": round(self.wait_seconds / self.requests, 4) if self.requests else 0.0,
+            "max_pool_wait": round(self.max_wait, 4),
+        }
+
+
+class _MeasuredTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that records pool wait via httpcore's trace hook."""
+
+    def __init__(self, stats: PoolStats, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        recorded = False
+        outer = request.extensions.get("trace")
+
+        async def trace(name: str, info: dict[str, Any]) -> None:
+            nonlocal recorded
+            # The first event is a new connection's TCP connect or a reused one's write
+            if not recorded and name.endswith(".started"):
+                recorded = True
+                self._stats.record(
+                    time.monotonic() - started, name.startswith("connection.connect_tcp"),
+                )
+            if outer is not None:
+                ret = outer(name, info)
+                if asyncio.iscoroutine(ret):
+                    await ret
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await super().handle_async_request(request)
+
+
+def _http2_available(name: str) -> bool:
+    if importlib.util.find_spec("h2") is not None:
+        return True
+    logger.warning("HTTP/2 requested for %s but the h2 package is missing; using HTTP/1.1", name)
+    return False
+
+
+class Transport:
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._warm_urls: dict[str, str] = {}
+        self.pool_stats: dict[str, PoolStats] = {}
+
+    def client(
+        self,
+        name: str,
+        base_url: str,
+        *,
+        max_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 30.0,
+    ) -> httpx.AsyncClient:
+        """The client for upstream ``name``, created on first use."""
+        if name in self._clients:
+            return self._clients[name]
+        stats = self.pool_stats[name] = PoolStats()
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        transport = _MeasuredTransport(
+            stats,
+            limits=limits,
+            http2=http2 and _http2_available(name),
+        )
+        client = httpx.AsyncClient(transport=transport, timeout=timeout)
+        self._clients[name] = client
+        self._warm_urls[name] = base_url
+        return client
+
+    async def warm_up(self) -> None:
+        """Open a connection to each upstream (DNS, TCP, TLS) ahead of real traffic."""
+
+        async def _warm(name: str, url: str) -> None:
+            try:
+                # Any response will do; the point is the pooled connection it leaves
+                await self._clients[name].head(url, timeout=WARMUP_TIMEOUT)
+                logger.info("Warmed up %s connection", name)
+            except httpx.HTTPError as e:
+                logger.warning("Warm-up for %s failed: %s", name, e)
+
+        await asyncio.gather(*(_warm(n, u) for n, u in self._warm_urls.items()))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(c.aclose() for c in self._clients.values()))
+        self._clients.clear()
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        return {name: stats.summary() for name, stats in self.pool_stats.items()}
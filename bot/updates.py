@@ -0,0 +1,81 @@
+"""Concurrent update processing with per-chat ordering.
+
+python-telegram-bot processes updates one at a time by default, so one
+chat's long agent run blocks every other chat. ChatOrderedUpdateProcessor
+runs updates concurrently up to a global limit while keeping each chat's
+updates in arrival order. Fast, read-only updates (callback buttons,
+/read, /stats, ...) get their own lane and never wait behind slow ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+FAST_COMMANDS = frozenset({"read", "r", "stats", "jobs", "search", "s", "help", "start"})
+
+# Updates admitted at once (running or waiting for their lane / chat)
+_ADMISSION_LIMIT = 1024
+
+
+def is_fast_update(update: object) -> bool:
+    if not isinstance(update, Update):
+        return False
+    if update.callback_query is not None:
+        return True
+    message = update.message
+    if message is None or not message.text or not message.text.startswith("/"):
+        return False
+    command = message.text.split()[0].lstrip("/").split("@")[0].lower()
+    return command in FAST_COMMANDS
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, in order within each chat.
+
+    Slow updates hold their chat's lock while running and share
+    ``max_concurrent`` slots; fast updates skip the chat lock and use a
+    separate pool of ``fast_concurrent`` slots.
+    """
+
+    def __init__(self, max_concurrent: int = 16, fast_concurrent: int = 8) -> None:
+        # The base class semaphore only bounds admission; lanes do the real limiting
+        super().__init__(_ADMISSION_LIMIT)
+        self._slow = asyncio.Semaphore(max_concurrent)
+        self._fast = asyncio.Semaphore(fast_concurrent)
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._chat_waiters: dict[int, int] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if is_fast_update(update):
+            async with self._fast:
+                await coroutine
+            return
+
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._slow:
+                await coroutine
+            return
+
+        lock = self._chat_locks.setdefault(chat.id, asyncio.Lock())
+        self._chat_waiters[chat.id] = self._chat_waiters.get(chat.id, 0) + 1
+        try:
+            # asyncio.Lock wakes waiters FIFO, preserving arrival order per chat
+            async with lock, self._slow:
+                await coroutine
+        finally:
+            self._chat_waiters[chat.id] -= 1
+            if not self._chat_waiters[chat.id]:
+                del self._chat_waiters[chat.id]
+                del self._chat_locks[chat.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,185 @@
+"""Minimal asyncio HTTP endpoint for Telegram webhook updates.
+
+Telegram POSTs each update as JSON with the secret token set via
+setWebhook in the X-Telegram-Bot-Api-Secret-Token header. The server
+checks the secret, hands the decoded update to ``on_update`` (which
+should only enqueue it) and acks right away, so Telegram never waits on
+update processing.
+
+A request must arrive in full within ``read_timeout`` seconds and an idle
+keep-alive connection is dropped after ``idle_timeout``, so slow or silent
+clients can't hold connections open. stop() stops accepting, drops idle
+connections and lets requests already being read finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY = 1 << 20  # Telegram updates are far smaller than this
+READ_TIMEOUT = 10.0
+IDLE_TIMEOUT = 60.0
+
+UpdateHook = Callable[[dict[str, Any]], Awaitable[None]]
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class WebhookServer:
+    def __init__(
+        self,
+        on_update: UpdateHook,
+        secret_token: str,
+        path: str = "/telegram",
+        host: str = "127.0.0.1",
+        port: int = 8443,
+        read_timeout: float = READ_TIMEOUT,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ) -> None:
+        self._on_update = on_update
+        self._secret = secret_token.encode()
+        self.path = path
+        self.host = host
+        self.port = port
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self._server: asyncio.AbstractServer | None = None
+        # Connection tasks waiting for their next request; stop() drops these
+        self._idle: set[asyncio.Task] = set()
+        self._closing = False
+        self.received = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_conn, self.host, self.port)
+        # Port 0 means "pick one"; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Webhook listening on %s:%d%s", self.host, self.port, self.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._closing = True
+            self._server.close()
+            for task in list(self._idle):
+                task.cancel()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        try:
+            # HTTP/1.1 keep-alive: serve requests until the client hangs up
+            while not self._closing:
+                self._idle.add(task)
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                finally:
+                    self._idle.discard(task)
+                if not request_line:
+                    break
+                try:
+                    keep_alive = await asyncio.wait_for(
+                        self._handle_request(request_line, reader, writer), self.read_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    await self._respond(writer, 408, keep_alive=False)
+                    break
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:
+            # Idle connection dropped by stop()
+            pass
+        except Exception:
+            logger.exception("Webhook connection failed")
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+    ) -> bool:
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            await self._respond(writer, 400, keep_alive=False)
+            return False
+
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        length = headers.get("content-length")
+        if length is None or not length.isdigit():
+            await self._respond(writer, 411, keep_alive=False)
+            return False
+        if int(length) > MAX_BODY:
+            await self._respond(writer, 413, keep_alive=False)
+            return False
+        body = await reader.readexactly(int(length))
+
+        if target.split("?")[0] != self.path:
+            status = 404
+        elif method != "POST":
+            status = 405
+        elif not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self._secret):
+            self.rejected += 1
+            logger.warning("Webhook request with bad secret token rejected")
+            status = 403
+        else:
+            status = await self._accept(body)
+
+        # Shutting down: finish this request, then hang up
+        keep_alive = keep_alive and not self._closing
+        await self._respond(writer, status, keep_alive=keep_alive)
+        return keep_alive
+
+    async def _accept(self, body: bytes) -> int:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 400
+        if not isinstance(data, dict):
+            return 400
+        try:
+            await self._on_update(data)
+        except Exception:
+            # Non-2xx makes Telegram redeliver the update later
+            logger.exception("Failed to enqueue webhook update")
+            return 503
+        self.received += 1
+        return 200
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+        )
+        await writer.drain()
@@ -0,0 +1,166 @@
+"""The agent loop: concurrent tool rounds, model cascade and speculative prefetch."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from typing import Any
+
+import httpx
+
+from bot.agent import EMPTY_ANSWER, Agent, _Prefetcher
+
+IDS = [f"{i:08x}-0000-4000-8000-000000000000" for i in range(1, 6)]
+
+
+class FakeForest:
+    def __init__(self) -> None:
+        self.reads: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.release = asyncio.Event()
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        return {"results": [{"id": node_id} for node_id in IDS[:limit]]}
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        self.reads.append(ref)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self.release.wait()
+        finally:
+            self.in_flight -= 1
+        return {"node": {"id": ref}, "body": "text"}
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class PrefetcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest()
+
+    async def test_prefetched_read_is_served_from_memory(self) -> None:
+        self.forest.release.set()
+        prefetch = _Prefetcher(self.forest, top_n=2)  # type: ignore[arg-type]
+        await prefetch.search("q")
+        await _settle()
+        data = await prefetch.read(IDS[0][:8])
+        self.assertEqual(data["node"]["id"], IDS[0])
+        self.assertEqual(self.forest.reads, IDS[:2])
+
+    async def test_prefetch_respects_the_read_limit(self) -> None:
+        limit = asyncio.Semaphore(2)
+        prefetch = _Prefetcher(self.forest, limit, top_n=5)  # type: ignore[arg-type]
+        await prefetch.search("q")
+        await _settle()
+        self.assertEqual(self.forest.in_flight, 2)
+        self.forest.release.set()
+        await _settle()
+        self.assertEqual(len(self.forest.reads), 5)
+        self.assertEqual(self.forest.max_in_flight, 2)
+        prefetch.cancel()
+
+    async def test_read_holding_the_last_slot_does_not_wait_on_queued_prefetch(self) -> None:
+        limit = asyncio.Semaphore(1)
+        prefetch = _Prefetcher(self.forest, limit, top_n=3)  # type: ignore[arg-type]
+        await prefetch.search("q")
+        await _settle()
+        self.forest.release.set()
+        # As _run_tool does: hold the slot, then read a hit whose prefetch is still queued
+        async with limit:
+            data = await asyncio.wait_for(prefetch.read(IDS[2]), 1)
+        self.assertEqual(data["node"]["id"], IDS[2])
+        prefetch.cancel()
+
+
+def _call(call_id: str, name: str, **args: Any) -> dict[str, Any]:
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+
+
+def _reply(content: str | None = None, *calls: dict[str, Any]) -> dict[str, Any]:
+    message: dict[str, Any] = {"role": "assistant", "content": content}
+    if calls:
+        message["tool_calls"] = list(calls)
+    return {"choices": [{"message": message, "finish_reason": "tool_calls" if calls else "stop"}]}
+
+
+class AgentRunTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest()
+        self.script: dict[str, list[dict[str, Any]]] = {}
+        self.requests: list[tuple[str, list[dict[str, Any]]]] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            self.requests.append((body["model"], body["messages"]))
+            return httpx.Response(200, json=self.script[body["model"]].pop(0))
+
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def asyncTearDown(self) -> None:
+        await self.http.aclose()
+
+    def agent(self, router_model: str | None = None) -> Agent:
+        return Agent(
+            self.http, "key", "strong", "https://llm.test", hedge=False, router_model=router_model,
+        )
+
+    async def test_a_rounds_tool_calls_run_concurrently_and_answer_in_order(self) -> None:
+        self.script["strong"] = [
+            _reply(None, _call("c1", "forest_read", ref=IDS[0]), _call("c2", "forest_read", ref=IDS[1])),
+            _reply("Dwarves hoard gold."),
+        ]
+        run = asyncio.create_task(self.agent().run("Why hoard?", "system", self.forest))  # type: ignore[arg-type]
+        for _ in range(100):
+            if self.forest.in_flight == 2:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.forest.in_flight, 2)
+        self.forest.release.set()
+        self.assertEqual(await run, "Dwarves hoard gold.")
+
+        _, messages = self.requests[-1]
+        tool_messages = [m for m in messages if m["role"] == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_messages], ["c1", "c2"])
+        self.assertEqual(json.loads(tool_messages[1]["content"])["node"]["id"], IDS[1])
+
+    async def test_tool_errors_are_reported_to_the_model(self) -> None:
+        self.script["strong"] = [_reply(None, _call("c1", "forest_nope")), _reply("Sorry.")]
+        await self.agent().run("?", "system", self.forest)  # type: ignore[arg-type]
+        _, messages = self.requests[-1]
+        self.assertIn("Unknown tool", messages[-1]["content"])
+
+    async def test_empty_answer_is_replaced(self) -> None:
+        self.script["strong"] = [_reply("")]
+        self.assertEqual(await self.agent().run("?", "system", self.forest), EMPTY_ANSWER)  # type: ignore[arg-type]
+
+    async def test_router_model_drives_tool_rounds_and_strong_model_answers(self) -> None:
+        self.forest.release.set()
+        self.script["cheap"] = [
+            _reply(None, _call("c1", "forest_read", ref=IDS[0])),
+            _reply("A cheap final answer"),
+        ]
+        self.script["strong"] = [_reply("Dwarves hoard gold.")]
+        agent = self.agent(router_model="cheap")
+        self.assertEqual(await agent.run("Why hoard?", "system", self.forest), "Dwarves hoard gold.")  # type: ignore[arg-type]
+        self.assertEqual([model for model, _ in self.requests], ["cheap", "cheap", "strong"])
+        self.assertEqual(agent.tier_stats["router"].escalations, 1)
+        self.assertEqual(agent.tier_stats["strong"].calls, 1)
+
+    async def test_unusable_router_tool_calls_are_escalated(self) -> None:
+        self.forest.release.set()
+        self.script["cheap"] = [_reply(None, _call("c1", "forest_read"))]
+        self.script["strong"] = [_reply("Dwarves hoard gold.")]
+        agent = self.agent(router_model="cheap")
+        await agent.run("Why hoard?", "system", self.forest)  # type: ignore[arg-type]
+        self.assertEqual(self.forest.reads, [])
+        self.assertEqual([model for model, _ in self.requests], ["cheap", "strong"])
+
+
+if __name__ == "__main__":
+    unittest.main()
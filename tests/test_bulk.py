@@ -0,0 +1,142 @@
+"""Note parsers and bounded, lazily-fed bulk capture."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+from bot.bulk import (
+    Note,
+    ParseError,
+    format_for,
+    notes_from_file,
+    parse_csv,
+    parse_jsonl,
+    parse_lines,
+    parse_markdown,
+    run_bulk,
+)
+from bot.journal import quiet_captures
+
+
+class ParseTest(unittest.TestCase):
+    def test_formats_by_suffix(self) -> None:
+        self.assertEqual(format_for("notes.MD"), "markdown")
+        self.assertEqual(format_for("export.ndjson"), "jsonl")
+        self.assertIsNone(format_for("photo.png"))
+
+    def test_lines(self) -> None:
+        notes = list(parse_lines(["Gold | Dwarves hoard it | lore,gold", "", "Just a title"]))
+        self.assertEqual(notes, [
+            Note(1, "Gold", "Dwarves hoard it", "lore,gold"),
+            Note(3, "Just a title", "Just a title"),
+        ])
+
+    def test_markdown(self) -> None:
+        text = "preamble\n# Gold\nDwarves hoard it.\n#lore #gold\n\n## Silver ##\n"
+        notes = list(parse_markdown(text.splitlines(keepends=True)))
+        self.assertEqual(notes, [
+            Note(2, "Gold", "Dwarves hoard it.", "#lore,#gold"),
+            Note(6, "Silver", "Silver"),
+        ])
+
+    def test_jsonl_reports_bad_lines(self) -> None:
+        notes = list(parse_jsonl([
+            '{"title": "Gold", "tags": ["lore", " "]}', "{oops", '{"body": "no title"}',
+        ]))
+        self.assertEqual(notes[0], Note(1, "Gold", "Gold", "lore"))
+        self.assertIsInstance(notes[1], ParseError)
+        self.assertEqual([n.line for n in notes[1:]], [2, 3])  # type: ignore[union-attr]
+
+    def test_csv(self) -> None:
+        notes = list(parse_csv(["Title,Body,Tags\n", "Gold,Hoarded,lore\n", ",orphan,\n"]))
+        self.assertEqual(notes[0], Note(2, "Gold", "Hoarded", "lore"))
+        self.assertIsInstance(notes[1], ParseError)
+        [error] = parse_csv(["name,body\n"])
+        self.assertIsInstance(error, ParseError)
+
+    def test_file_is_closed_once_consumed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "notes.txt")
+            path.write_text("A\nB\n", encoding="utf-8")
+            self.assertEqual([n.title for n in notes_from_file(path, "lines")], ["A", "B"])  # type: ignore[union-attr]
+            os.unlink(path)
+
+
+class FakeForest:
+    def __init__(self, pending: bool = False) -> None:
+        self.pending = pending
+        self.running = 0
+        self.peak = 0
+        self.done = 0
+        self.quiet: list[bool] = []
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.quiet.append(quiet_captures.get())
+        try:
+            await asyncio.sleep(0.001)
+            if title == "boom":
+                raise ConnectionError("Forest is down")
+            return {"node": {"id": f"id-{title}"}, "pending": self.pending}
+        finally:
+            self.running -= 1
+            self.done += 1
+
+
+class RunBulkTest(unittest.IsolatedAsyncioTestCase):
+    async def test_captures_with_bounded_concurrency_and_reports_failures(self) -> None:
+        forest = FakeForest()
+        notes: list[Note | ParseError] = [Note(i, f"n{i}", "") for i in range(1, 11)]
+        notes[3] = Note(4, "boom", "")
+        notes[6] = ParseError(7, "invalid JSON")
+        progress: list[int] = []
+        result = await run_bulk(
+            forest, notes, concurrency=3,  # type: ignore[arg-type]
+            on_progress=lambda r: progress.append(r.created_count + r.failed_count),
+        )
+        self.assertEqual(forest.peak, 3)
+        self.assertEqual((result.total, result.created_count, result.failed_count), (10, 8, 2))
+        self.assertEqual(sorted(f[0] for f in result.failed), [4, 7])
+        self.assertEqual(progress[-1], 10)
+        self.assertTrue(all(forest.quiet))
+        self.assertFalse(quiet_captures.get())
+
+    async def test_reads_no_further_ahead_than_free_slots(self) -> None:
+        forest = FakeForest()
+
+        def notes() -> Any:
+            for i in range(100):
+                # Note i is only parsed once all but two of the earlier ones are done
+                self.assertGreaterEqual(forest.done, i - 2)
+                yield Note(i, f"n{i}", "")
+
+        result = await run_bulk(forest, notes(), concurrency=2)  # type: ignore[arg-type]
+        self.assertEqual(result.created_count, 100)
+
+    async def test_journaled_captures_are_counted_as_queued(self) -> None:
+        result = await run_bulk(FakeForest(pending=True), [Note(1, "a", "")])  # type: ignore[arg-type]
+        self.assertEqual((result.created_count, result.queued_count), (0, 1))
+        self.assertEqual(result.created, [])
+
+    async def test_cancel_stops_running_captures(self) -> None:
+        forest = FakeForest()
+        run = asyncio.create_task(run_bulk(
+            forest, (Note(i, f"n{i}", "") for i in range(1000)), concurrency=4,  # type: ignore[arg-type]
+        ))
+        await asyncio.sleep(0.005)
+        run.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await run
+        await asyncio.sleep(0)
+        self.assertEqual(forest.running, 0)
+        self.assertLess(len(forest.quiet), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""TTL, LRU bounds and write invalidation in CachedForest."""
+
+from __future__ import annotations
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from bot.cache import CachedForest
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeForest:
+    def __init__(self) -> None:
+        self.calls: list[tuple] = []
+        self.fail_capture = False
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        self.calls.append(("search", query, limit))
+        return {"results": [], "query": query, "n": len(self.calls)}
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        self.calls.append(("read", ref))
+        return {"node": {"id": ref}, "n": len(self.calls)}
+
+    async def stats(self) -> dict[str, Any]:
+        self.calls.append(("stats",))
+        return {"counts": {}, "n": len(self.calls)}
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        self.calls.append(("capture", title))
+        if self.fail_capture:
+            raise RuntimeError("timed out after the write landed")
+        return {"node": {"id": "feedface"}}
+
+
+class CachedForestTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.clock = Clock()
+        patcher = mock.patch("bot.cache.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.forest = FakeForest()
+        self.cache = CachedForest(self.forest, max_entries=3)  # type: ignore[arg-type]
+
+    async def test_hit_until_the_ttl_runs_out(self) -> None:
+        first = await self.cache.search("dwarves")
+        self.assertIs(await self.cache.search("dwarves"), first)
+        self.clock.now += 60
+        self.assertIsNot(await self.cache.search("dwarves"), first)
+        self.assertEqual(self.cache.hits["search"], 1)
+        self.assertEqual(self.cache.misses["search"], 2)
+
+    async def test_key_includes_arguments(self) -> None:
+        await self.cache.search("dwarves")
+        await self.cache.search("dwarves", 10)
+        self.assertEqual(len(self.forest.calls), 2)
+
+    async def test_capture_invalidates_listings_but_not_reads(self) -> None:
+        await self.cache.search("dwarves")
+        await self.cache.stats()
+        await self.cache.read("3f2a9c1e")
+        await self.cache.capture("Title", "Body")
+        self.forest.calls.clear()
+        await self.cache.search("dwarves")
+        await self.cache.stats()
+        await self.cache.read("3f2a9c1e")
+        self.assertEqual(self.forest.calls, [("search", "dwarves", 5), ("stats",)])
+
+    async def test_failed_capture_still_invalidates(self) -> None:
+        await self.cache.stats()
+        self.forest.fail_capture = True
+        with self.assertRaises(RuntimeError):
+            await self.cache.capture("Title", "Body")
+        await self.cache.stats()
+        self.assertEqual(self.forest.calls.count(("stats",)), 2)
+
+    async def test_least_recently_used_is_evicted(self) -> None:
+        for ref in ("a", "b", "c"):
+            await self.cache.read(ref)
+        await self.cache.read("a")
+        await self.cache.read("d")
+        self.forest.calls.clear()
+        await self.cache.read("a")
+        await self.cache.read("b")
+        self.assertEqual(self.forest.calls, [("read", "b")])
+        self.assertEqual(self.cache.cache_info()["entries"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
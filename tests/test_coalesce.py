@@ -0,0 +1,110 @@
+"""Single-flight sharing, cancellation and write generations in CoalescingForest."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import Any
+
+from bot import deadline
+from bot.coalesce import CoalescingForest
+
+
+class FakeForest:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+        self.error: Exception | None = None
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        self.started.append(ref)
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(ref)
+            raise
+        if self.error is not None:
+            raise self.error
+        return {"node": {"id": ref}}
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        return {"node": {"id": "feedface"}}
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class CoalescingForestTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest()
+        self.coalescer = CoalescingForest(self.forest)  # type: ignore[arg-type]
+
+    async def test_identical_reads_share_one_call(self) -> None:
+        reads = [asyncio.create_task(self.coalescer.read("3f2a9c1e")) for _ in range(3)]
+        await _settle()
+        self.forest.release.set()
+        results = await asyncio.gather(*reads)
+        self.assertEqual(self.forest.started, ["3f2a9c1e"])
+        self.assertIs(results[0], results[2])
+        self.assertEqual(self.coalescer.coalesced["read"], 2)
+        self.assertEqual(self.coalescer.coalesce_info()["inflight"], 0)
+
+    async def test_errors_reach_every_waiter(self) -> None:
+        self.forest.error = LookupError("not found")
+        reads = [asyncio.create_task(self.coalescer.read("3f2a9c1e")) for _ in range(2)]
+        await _settle()
+        self.forest.release.set()
+        for result in await asyncio.gather(*reads, return_exceptions=True):
+            self.assertIsInstance(result, LookupError)
+
+    async def test_one_cancelled_waiter_leaves_the_call_running(self) -> None:
+        first = asyncio.create_task(self.coalescer.read("3f2a9c1e"))
+        second = asyncio.create_task(self.coalescer.read("3f2a9c1e"))
+        await _settle()
+        first.cancel()
+        await _settle()
+        self.forest.release.set()
+        self.assertEqual((await second)["node"]["id"], "3f2a9c1e")
+        self.assertEqual(self.forest.cancelled, [])
+
+    async def test_last_waiter_cancelling_cancels_the_call(self) -> None:
+        reads = [asyncio.create_task(self.coalescer.read("3f2a9c1e")) for _ in range(2)]
+        await _settle()
+        for read in reads:
+            read.cancel()
+        await asyncio.gather(*reads, return_exceptions=True)
+        await _settle()
+        self.assertEqual(self.forest.cancelled, ["3f2a9c1e"])
+        self.assertEqual(self.coalescer.coalesce_info()["inflight"], 0)
+
+        # A later read starts afresh instead of joining the cancelled call
+        self.forest.release.set()
+        await self.coalescer.read("3f2a9c1e")
+        self.assertEqual(self.forest.started, ["3f2a9c1e", "3f2a9c1e"])
+
+    async def test_reads_after_a_capture_do_not_join_older_calls(self) -> None:
+        before = asyncio.create_task(self.coalescer.read("3f2a9c1e"))
+        await _settle()
+        await self.coalescer.capture("Title", "Body")
+        after = asyncio.create_task(self.coalescer.read("3f2a9c1e"))
+        await _settle()
+        self.forest.release.set()
+        await asyncio.gather(before, after)
+        self.assertEqual(len(self.forest.started), 2)
+
+    async def test_waiter_gives_up_at_its_own_deadline(self) -> None:
+        patient = asyncio.create_task(self.coalescer.read("3f2a9c1e"))
+        await _settle()
+        with deadline.scope(0.6):
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.coalescer.read("3f2a9c1e")
+        self.assertFalse(patient.done())
+        self.forest.release.set()
+        self.assertEqual((await patient)["node"]["id"], "3f2a9c1e")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Token estimates and tool-result elision in ContextBudget."""
+
+from __future__ import annotations
+
+import json
+import unittest
+from typing import Any
+
+from bot.context import ContextBudget, estimate_tokens, message_tokens
+
+BODY = "Dwarves hoard gold because " + "the mountain remembers every debt. " * 80
+
+
+def _round(n: int, tool: str, result: dict[str, Any]) -> list[dict[str, Any]]:
+    call = {"id": f"call{n}", "type": "function", "function": {"name": tool, "arguments": "{}"}}
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "tool_call_id": f"call{n}", "content": json.dumps(result)},
+    ]
+
+
+def _conversation() -> list[dict[str, Any]]:
+    read = {"node": {"id": "3f2a9c1e", "title": "Dwarven economy", "tags": []}, "body": BODY}
+    search = {"results": [{"id": f"{i:08x}", "title": f"Note {i}", "bodyPreview": BODY[:300]}
+                          for i in range(5)]}
+    return [
+        {"role": "system", "content": "You are Jack."},
+        {"role": "user", "content": "Why do dwarves hoard?"},
+        *_round(1, "forest_search", search),
+        *_round(2, "forest_read", read),
+        *_round(3, "forest_read", read),
+    ]
+
+
+class EstimateTest(unittest.TestCase):
+    def test_words_and_punctuation(self) -> None:
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("gold, ore!"), 4)
+        self.assertEqual(estimate_tokens("mountainous"), 3)
+
+    def test_tool_calls_count(self) -> None:
+        [call, _] = _round(1, "forest_read", {})
+        self.assertGreater(message_tokens(call), message_tokens({"role": "assistant"}))
+
+
+class CompactTest(unittest.TestCase):
+    def test_under_budget_is_left_alone(self) -> None:
+        messages = _conversation()
+        before = json.dumps(messages)
+        total, saved = ContextBudget(10**6).compact(messages)
+        self.assertEqual(saved, 0)
+        self.assertEqual(json.dumps(messages), before)
+        self.assertEqual(total, sum(message_tokens(m) for m in messages))
+
+    def test_oldest_results_are_elided_first(self) -> None:
+        messages = _conversation()
+        full = sum(message_tokens(m) for m in messages)
+        latest = message_tokens(messages[-1])
+        total, saved = ContextBudget(full - 100).compact(messages)
+        self.assertEqual(total, full - saved)
+        self.assertLessEqual(total, full - 100)
+
+        search = json.loads(messages[3]["content"])
+        self.assertTrue(search["elided"])
+        self.assertEqual(search["tool"], "forest_search")
+        self.assertEqual([r["id"] for r in search["results"]], [f"{i:08x}" for i in range(5)])
+        # One elision was enough; the later read is untouched
+        self.assertNotIn("elided", json.loads(messages[5]["content"]))
+        self.assertEqual(message_tokens(messages[-1]), latest)
+
+    def test_latest_round_is_never_elided(self) -> None:
+        messages = _conversation()
+        total, saved = ContextBudget(1).compact(messages)
+        self.assertGreater(saved, 0)
+        self.assertGreater(total, 1)
+        read = json.loads(messages[5]["content"])
+        self.assertTrue(read["elided"])
+        self.assertEqual(read["node"]["id"], "3f2a9c1e")
+        self.assertLessEqual(len(read["body"]), 201)
+        self.assertEqual(json.loads(messages[-1]["content"])["body"], BODY)
+
+    def test_elided_results_are_not_elided_again(self) -> None:
+        messages = _conversation()
+        ContextBudget(1).compact(messages)
+        compacted = json.dumps(messages)
+        _, saved = ContextBudget(1).compact(messages)
+        self.assertEqual(saved, 0)
+        self.assertEqual(json.dumps(messages), compacted)
+
+    def test_small_results_are_kept(self) -> None:
+        messages = [
+            {"role": "user", "content": "hi"},
+            *_round(1, "forest_stats", {"n": 1}),
+            *_round(2, "forest_stats", {"n": 2}),
+        ]
+        _, saved = ContextBudget(1).compact(messages)
+        self.assertEqual(saved, 0)
+        self.assertEqual(messages[2]["content"], '{"n": 1}')
+
+
+if __name__ == "__main__":
+    unittest.main()
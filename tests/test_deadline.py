@@ -0,0 +1,90 @@
+"""Deadline scopes and how backend calls size their timeouts from them."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from bot import deadline
+from bot.forest_api import ForestAPI
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScopeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = Clock()
+        patcher = mock.patch("bot.deadline.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_scope_means_no_deadline(self) -> None:
+        self.assertIsNone(deadline.remaining())
+        self.assertEqual(deadline.budget(30.0), 30.0)
+
+    def test_inner_scope_can_shorten_but_not_extend(self) -> None:
+        with deadline.scope(10):
+            with deadline.scope(60):
+                self.assertEqual(deadline.remaining(), 10)
+            with deadline.scope(4):
+                self.assertEqual(deadline.remaining(), 4)
+            self.assertEqual(deadline.remaining(), 10)
+        self.assertIsNone(deadline.remaining())
+
+    def test_cleared_lifts_the_deadline_for_its_block(self) -> None:
+        with deadline.scope(10):
+            with deadline.cleared():
+                self.assertIsNone(deadline.remaining())
+            self.assertEqual(deadline.remaining(), 10)
+
+    def test_budget_is_capped_and_fails_when_too_little_is_left(self) -> None:
+        with deadline.scope(10):
+            self.assertEqual(deadline.budget(30.0), 10)
+            self.assertEqual(deadline.budget(5.0), 5.0)
+            self.clock.now += 9.6
+            with self.assertRaises(deadline.DeadlineExceeded):
+                deadline.budget(30.0)
+            self.assertIsInstance(deadline.DeadlineExceeded("x"), TimeoutError)
+
+
+class PropagationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_tasks_inherit_the_scope(self) -> None:
+        async def left() -> float | None:
+            return deadline.remaining()
+
+        with deadline.scope(10):
+            inherited = await asyncio.create_task(left())
+        self.assertIsNotNone(inherited)
+        self.assertLessEqual(inherited, 10)  # type: ignore[arg-type]
+
+    async def test_forest_requests_use_the_time_left(self) -> None:
+        timeouts: list[float] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            timeouts.append(request.extensions["timeout"]["read"])
+            return httpx.Response(200, json={"success": True, "data": {}})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            forest = ForestAPI("https://forest.test", "key", client=http)
+            await forest.stats()
+            with deadline.scope(5):
+                await forest.stats()
+                with deadline.scope(0.1):
+                    with self.assertRaises(deadline.DeadlineExceeded):
+                        await forest.stats()
+        self.assertEqual(timeouts[0], 30.0)
+        self.assertLessEqual(timeouts[1], 5)
+        self.assertEqual(len(timeouts), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
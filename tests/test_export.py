@@ -0,0 +1,84 @@
+"""Streaming export: paging, bounded reads and the gzip writer."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import gzip
+import json
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+from typing import Any
+
+from bot import export
+
+NODES = [{"id": f"{i:08x}", "title": f"Node {i}", "tags": ["t"]} for i in range(25)]
+
+
+class FakeForest:
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.fail = fail or set()
+        self.offsets: list[int] = []
+
+    async def list_nodes(
+        self, query: str | None = None, tag: str | None = None, limit: int = 100, offset: int = 0,
+    ) -> dict[str, Any]:
+        self.offsets.append(offset)
+        page = NODES[offset:offset + limit]
+        return {"nodes": page, "total": len(NODES), "has_more": offset + limit < len(NODES)}
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        await asyncio.sleep(0)
+        if ref in self.fail:
+            raise LookupError(f"{ref} not found")
+        return {"node": {"id": ref}, "body": f"Body of {ref}"}
+
+
+class ExportTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = Path(self.dir.name) / "out.gz"
+
+    async def test_jsonl_export_keeps_order_and_counts_failures(self) -> None:
+        forest = FakeForest(fail={NODES[3]["id"]})
+        with mock.patch.object(export, "WRITE_BATCH_CHARS", 100):
+            result = await export.export(forest, self.path, "jsonl", concurrency=4)  # type: ignore[arg-type]
+        self.assertEqual((result.nodes, result.failed), (24, 1))
+        self.assertEqual(forest.offsets, [0])
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["id"] for r in rows], [n["id"] for n in NODES if n is not NODES[3]])
+        self.assertEqual(rows[0]["body"], "Body of 00000000")
+        self.assertGreater(result.bytes_written, 0)
+
+    async def test_markdown_export_pages_through_refs(self) -> None:
+        forest = FakeForest()
+        refs = export.node_refs(forest, page_size=10)  # type: ignore[arg-type]
+        nodes = export.fetch_nodes(forest, refs)  # type: ignore[arg-type]
+        result = await export.write_export(nodes, self.path, "md")
+        self.assertEqual(forest.offsets, [0, 10, 20])
+        self.assertEqual(result.nodes, 25)
+        text = gzip.open(self.path, "rt", encoding="utf-8").read()
+        self.assertIn("# Node 24\n", text)
+        self.assertIn("tags: #t", text)
+
+    async def test_closing_early_retrieves_failed_reads(self) -> None:
+        unretrieved: list[dict[str, Any]] = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unretrieved.append(ctx))
+        forest = FakeForest(fail={n["id"] for n in NODES[1:8]})
+        nodes = export.fetch_nodes(forest, export.node_refs(forest), concurrency=8)  # type: ignore[arg-type]
+        await nodes.__anext__()
+        # Let the rest of the window fail, then walk away
+        await asyncio.sleep(0.01)
+        await nodes.aclose()
+        for _ in range(3):
+            gc.collect()
+            await asyncio.sleep(0)
+        self.assertEqual(unretrieved, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Fast-path intent classification and the router's use of it."""
+
+from __future__ import annotations
+
+import unittest
+from typing import Any
+
+from bot.intent import FAST_PATH_THRESHOLD, classify
+from bot.nodeindex import NodeIndex
+from bot.router import Router
+
+NODE_ID = "12345678-9abc-4def-8123-456789abcdef"
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_hex_prefix_is_a_fast_read(self) -> None:
+        for text in ("3f2a9c1e", "read 3f2a9c1e", "3F2A9C1E-0b1c"):
+            with self.subTest(text):
+                intent = classify(text)
+                self.assertEqual(intent.kind, "read")
+                self.assertTrue(intent.is_fast)
+
+    def test_all_digit_text_is_not_a_fast_read(self) -> None:
+        for text in ("20261018", "12345678", "open 12345678"):
+            with self.subTest(text):
+                intent = classify(text)
+                self.assertLess(intent.score, FAST_PATH_THRESHOLD)
+                self.assertFalse(intent.is_fast)
+
+    def test_all_digit_prefix_of_a_known_node_is_fast(self) -> None:
+        index = NodeIndex()
+        index.add({"id": NODE_ID, "title": "Dwarven economy"})
+        self.assertTrue(classify("12345678", index.resolves).is_fast)
+        self.assertFalse(classify("87654321", index.resolves).is_fast)
+
+    def test_search_and_stats(self) -> None:
+        self.assertEqual(classify("search dwarven economy").arg, "dwarven economy")
+        self.assertTrue(classify("search dwarven economy").is_fast)
+        self.assertTrue(classify("stats").is_fast)
+        self.assertFalse(classify("search why do dwarves hoard and what then?").is_fast)
+
+    def test_open_ended_goes_to_agent(self) -> None:
+        for text in ("what do we know about scoring?", "", "line one\nline two"):
+            with self.subTest(text):
+                self.assertEqual(classify(text).kind, "agent")
+
+
+class FakeForest:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, Any]] = []
+
+    async def search(self, query: str, limit: int = 5) -> dict[str, Any]:
+        self.calls.append(("search", query))
+        return {"results": [{"id": NODE_ID, "title": "Dwarven economy"}], "total": 1}
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        self.calls.append(("read", ref))
+        return {"node": {"id": NODE_ID, "title": "Dwarven economy"}, "body": "Gold."}
+
+
+class FakeAgent:
+    def __init__(self) -> None:
+        self.runs: list[str] = []
+
+    async def run(self, message: str, *args: Any, **kwargs: Any) -> str:
+        self.runs.append(message)
+        return "agent reply"
+
+
+class RouterFastPathTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest()
+        self.agent = FakeAgent()
+        self.router = Router(self.forest, agent=self.agent)  # type: ignore[arg-type]
+
+    async def test_fast_search_reports_results_for_buttons(self) -> None:
+        seen: list[dict[str, Any]] = []
+        await self.router.handle_text("search dwarven economy", on_search=seen.append)
+        self.assertEqual(self.agent.runs, [])
+        self.assertEqual(seen[0]["results"][0]["id"], NODE_ID)
+        self.assertEqual(self.router.intent_stats["fast:search"], 1)
+
+    async def test_date_goes_to_agent(self) -> None:
+        reply = await self.router.handle_text("20261018")
+        self.assertEqual(reply, "agent reply")
+        self.assertEqual(self.forest.calls, [])
+
+    async def test_indexed_digit_prefix_reads_directly(self) -> None:
+        index = NodeIndex()
+        index.add({"id": NODE_ID, "title": "Dwarven economy"})
+        self.router.index = index
+        await self.router.handle_text("12345678")
+        self.assertEqual(self.forest.calls, [("read", "12345678")])
+        self.assertEqual(self.agent.runs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
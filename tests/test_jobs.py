@@ -0,0 +1,75 @@
+"""SynthesizeQueue jobs and the /jobs command."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import Any
+
+from bot.jobs import SynthesizeQueue, current_chat_id
+from bot.router import Router
+
+
+class FakeForest:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def synthesize(self, node_ids: list[str]) -> dict[str, Any]:
+        await self.release.wait()
+        return {"node": {"id": "feedface-0000", "title": "Synthesis"}}
+
+
+class SynthesizeQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest()
+        self.queue = SynthesizeQueue(self.forest)  # type: ignore[arg-type]
+        self.done: list[str] = []
+
+        async def on_done(job: Any) -> None:
+            self.done.append(job.id)
+
+        self.queue.on_done = on_done
+
+    async def asyncTearDown(self) -> None:
+        await self.queue.close()
+
+    async def test_synthesize_returns_job_and_notifies(self) -> None:
+        current_chat_id.set(1)
+        result = await self.queue.synthesize(["aaaa1111", "bbbb2222"])
+        self.assertEqual(result["status"], "queued")
+        self.forest.release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.assertEqual(self.done, [result["job_id"]])
+        [job] = self.queue.jobs(1)
+        self.assertEqual(job.status, "done")
+
+    async def test_jobs_are_listed_per_chat(self) -> None:
+        mine = self.queue.submit(["aaaa1111"], chat_id=1)
+        theirs = self.queue.submit(["bbbb2222"], chat_id=2)
+        self.assertEqual([j.id for j in self.queue.jobs(1)], [mine.id])
+        self.assertEqual([j.id for j in self.queue.jobs(2)], [theirs.id])
+        self.assertEqual(self.queue.jobs(None), [])
+
+
+class JobsCommandTest(unittest.IsolatedAsyncioTestCase):
+    async def test_lists_only_the_asking_chats_jobs(self) -> None:
+        queue = SynthesizeQueue(FakeForest())  # type: ignore[arg-type]
+        mine = queue.submit(["aaaa1111"], chat_id=1)
+        theirs = queue.submit(["bbbb2222"], chat_id=2)
+        router = Router(queue, jobs=queue)  # type: ignore[arg-type]
+        current_chat_id.set(1)
+        reply = await router.handle_command("jobs", "")
+        await queue.close()
+        self.assertIn(mine.id, reply)
+        self.assertNotIn(theirs.id, reply)
+
+    async def test_help_hides_jobs_without_a_queue(self) -> None:
+        router = Router(FakeForest())  # type: ignore[arg-type]
+        self.assertNotIn("/jobs", await router.handle_command("help", ""))
+        router.jobs = SynthesizeQueue(FakeForest())  # type: ignore[arg-type]
+        self.assertIn("/jobs", await router.handle_command("help", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
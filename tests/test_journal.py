@@ -0,0 +1,192 @@
+"""Write-behind captures, retries and lease recovery in CaptureJournal."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from typing import Any
+from unittest import mock
+
+from bot.jobs import current_chat_id
+from bot.journal import CaptureJournal, PendingCapture, quiet_captures
+
+
+class FakeForest:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.captured: list[str] = []
+
+    async def capture(self, title: str, body: str, tags: str | None = None) -> dict[str, Any]:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Forest is restarting")
+        self.captured.append(title)
+        return {"node": {"id": f"node-{len(self.captured):04d}"}, "links": {"accepted": 2}}
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class CaptureJournalTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "captures.db")
+        patcher = mock.patch("bot.journal.BACKOFF_BASE", 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.journals: list[CaptureJournal] = []
+        self.done: list[PendingCapture] = []
+        self.notified = asyncio.Event()
+
+    async def asyncTearDown(self) -> None:
+        for journal in self.journals:
+            if journal._drainer is not None:
+                await journal.close()
+
+    def open(self, forest: FakeForest) -> CaptureJournal:
+        journal = CaptureJournal(forest, self.path)  # type: ignore[arg-type]
+
+        async def on_done(capture: PendingCapture) -> None:
+            self.done.append(capture)
+            self.notified.set()
+
+        journal.on_done = on_done
+        self.journals.append(journal)
+        return journal
+
+    async def wait_done(self, n: int = 1) -> None:
+        async def _wait() -> None:
+            while len(self.done) < n:
+                self.notified.clear()
+                await self.notified.wait()
+
+        await asyncio.wait_for(_wait(), timeout=5)
+
+    async def test_capture_returns_at_once_and_commits_later(self) -> None:
+        forest = FakeForest()
+        journal = self.open(forest)
+        current_chat_id.set(42)
+        result = await journal.capture("Dwarven economy", "Gold.", "lore, gold")
+        self.assertTrue(result["pending"])
+        self.assertEqual(result["node"]["tags"], ["lore", "gold"])
+        self.assertEqual(journal.pending_count(), 1)
+
+        journal.start()
+        await self.wait_done()
+        [capture] = self.done
+        self.assertEqual(capture.id, result["node"]["id"])
+        self.assertEqual(capture.chat_id, 42)
+        self.assertEqual(capture.status, "committed")
+        self.assertEqual(capture.result["node"]["id"], "node-0001")  # type: ignore[index]
+        self.assertEqual(journal.pending_count(), 0)
+
+    async def test_failures_are_retried(self) -> None:
+        forest = FakeForest(failures=2)
+        journal = self.open(forest)
+        journal.start()
+        await journal.capture("Title", "Body")
+        await self.wait_done()
+        self.assertEqual(self.done[0].attempts, 2)
+        self.assertEqual(journal.retries, 2)
+        self.assertEqual(forest.captured, ["Title"])
+
+    async def test_gives_up_after_max_attempts_but_keeps_the_note(self) -> None:
+        journal = self.open(FakeForest(failures=10))
+        with mock.patch("bot.journal.MAX_ATTEMPTS", 3):
+            journal.start()
+            await journal.capture("Title", "Body")
+            await self.wait_done()
+        self.assertEqual(self.done[0].status, "failed")
+        self.assertIn("restarting", self.done[0].error or "")
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual(db.execute("SELECT status FROM captures").fetchall(), [("failed",)])
+
+    async def test_quiet_captures_only_report_failures(self) -> None:
+        forest = FakeForest()
+        journal = self.open(forest)
+        journal.start()
+        quiet_captures.set(True)
+        await journal.capture("Bulk note", "Body")
+        for _ in range(100):
+            if forest.captured:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(forest.captured, ["Bulk note"])
+        self.assertEqual(self.done, [])
+
+    async def test_pending_captures_survive_a_restart(self) -> None:
+        first = self.open(FakeForest())
+        await first.capture("Written before the crash", "Body")
+        await first.close()
+
+        forest = FakeForest()
+        second = self.open(forest)
+        second.start()
+        await self.wait_done()
+        self.assertEqual(forest.captured, ["Written before the crash"])
+
+    async def seed_lease(self, owner: str) -> None:
+        journal = self.open(FakeForest())
+        await journal.capture("Leased", "Body")
+        await journal.close()
+        with sqlite3.connect(self.path) as db:
+            db.execute(
+                "UPDATE captures SET next_attempt = ?, leased_by = ?",
+                (time.time() + 3600, owner),
+            )
+
+    async def test_lease_of_a_stopped_process_is_released_on_start(self) -> None:
+        await self.seed_lease(f"{socket.gethostname()}:{_dead_pid()}:0123abcd")
+        forest = FakeForest()
+        self.open(forest).start()
+        await self.wait_done()
+        self.assertEqual(forest.captured, ["Leased"])
+
+    async def test_lease_of_an_earlier_run_with_our_pid_is_released(self) -> None:
+        await self.seed_lease(f"{socket.gethostname()}:{os.getpid()}:0123abcd")
+        forest = FakeForest()
+        self.open(forest).start()
+        await self.wait_done()
+        self.assertEqual(forest.captured, ["Leased"])
+
+    async def test_live_and_remote_leases_are_left_alone(self) -> None:
+        owners = (f"{socket.gethostname()}:{os.getppid()}:0123abcd", "elsewhere:1:0123abcd")
+        for i, owner in enumerate(owners):
+            with self.subTest(owner):
+                self.path = f"{self.path}.{i}"
+                await self.seed_lease(owner)
+                journal = self.open(FakeForest())
+                with journal._lock:
+                    self.assertEqual(journal._release_stale(journal._db), 0)
+                await journal.close()
+
+    async def test_old_journals_gain_new_columns(self) -> None:
+        with sqlite3.connect(self.path) as db:
+            db.execute(
+                "CREATE TABLE captures (id TEXT PRIMARY KEY, title TEXT NOT NULL, "
+                "body TEXT NOT NULL, tags TEXT, chat_id INTEGER, created REAL NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL DEFAULT 0, "
+                "status TEXT NOT NULL DEFAULT 'pending', last_error TEXT)"
+            )
+            db.execute(
+                "INSERT INTO captures (id, title, body, created) VALUES ('p-old', 'Old', 'Body', 0)"
+            )
+        forest = FakeForest()
+        self.open(forest).start()
+        await self.wait_done()
+        self.assertEqual(forest.captured, ["Old"])
+
+
+if __name__ == "__main__":
+    unittest.main()
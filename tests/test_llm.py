@@ -0,0 +1,246 @@
+"""Circuit breakers, retries and fallback in the OpenRouter chat client."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import httpx
+
+from bot.llm import ChatClient, CircuitBreaker, CircuitOpen
+
+OK_BODY = {
+    "choices": [{"message": {"role": "assistant", "content": "hi"}, "finish_reason": "stop"}],
+}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = Clock()
+        patcher = mock.patch("bot.llm.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(threshold=2, cooldown=30.0)
+
+    def trip(self) -> None:
+        for _ in range(self.breaker.threshold):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_failures(self) -> None:
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.acquire())
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+        self.assertFalse(self.breaker.acquire())
+
+    def test_success_resets_the_count(self) -> None:
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open)
+
+    def test_half_open_admits_one_trial(self) -> None:
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.acquire())
+        self.assertFalse(self.breaker.allow())
+        self.assertFalse(self.breaker.acquire())
+
+    def test_trial_success_closes(self) -> None:
+        self.trip()
+        self.clock.now += 30
+        self.breaker.acquire()
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.acquire())
+        self.assertTrue(self.breaker.acquire())
+
+    def test_trial_failure_reopens_for_another_cooldown(self) -> None:
+        self.trip()
+        self.clock.now += 30
+        self.breaker.acquire()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.acquire())
+        self.clock.now += 29
+        self.assertFalse(self.breaker.acquire())
+        self.clock.now += 1
+        self.assertTrue(self.breaker.acquire())
+
+    def test_released_trial_frees_the_slot(self) -> None:
+        self.trip()
+        self.clock.now += 30
+        self.breaker.acquire()
+        self.breaker.release()
+        self.assertTrue(self.breaker.is_open)
+        self.assertTrue(self.breaker.acquire())
+
+    def test_force_skips_cooldown_but_not_a_running_trial(self) -> None:
+        self.trip()
+        self.assertTrue(self.breaker.acquire(force=True))
+        self.assertFalse(self.breaker.acquire(force=True))
+
+
+class ChatClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[str] = []
+        self.status: dict[str, int] = {}
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            model = json.loads(request.content)["model"]
+            self.requests.append(model)
+            await self.gate.wait()
+            return httpx.Response(self.status.get(model, 200), json=OK_BODY)
+
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.client = ChatClient(
+            self.http, "key", "https://llm.test", ["primary", "backup"], hedge=False,
+        )
+        patcher = mock.patch("bot.llm.BACKOFF_BASE", 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.http.aclose()
+
+    async def test_retries_then_falls_back(self) -> None:
+        self.status["primary"] = 503
+        result = await self.client.chat({"messages": []}, timeout=5)
+        self.assertEqual(result, OK_BODY)
+        self.assertEqual(self.requests, ["primary"] * 3 + ["backup"])
+        self.assertTrue(self.client.breakers["primary"].is_open)
+
+    async def test_client_errors_are_not_retried_or_held_against_the_model(self) -> None:
+        self.status["primary"] = 400
+        await self.client.chat({"messages": []}, timeout=5)
+        self.assertEqual(self.requests, ["primary", "backup"])
+        self.assertEqual(self.client.breakers["primary"].failures, 0)
+
+    async def test_half_open_sends_one_trial_to_the_primary(self) -> None:
+        breaker = self.client.breakers["primary"]
+        for _ in range(breaker.threshold):
+            breaker.record_failure()
+        breaker.opened_at = breaker.opened_at - breaker.cooldown  # type: ignore[operator]
+
+        self.gate.clear()
+        runs = [asyncio.create_task(self.client.chat({"messages": []}, timeout=5)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        self.gate.set()
+        await asyncio.gather(*runs)
+        self.assertEqual(self.requests.count("primary"), 1)
+        self.assertEqual(self.requests.count("backup"), 4)
+        self.assertFalse(breaker.is_open)
+
+    async def test_all_open_fails_fast_while_a_trial_runs(self) -> None:
+        for breaker in self.client.breakers.values():
+            for _ in range(breaker.threshold):
+                breaker.record_failure()
+        self.gate.clear()
+        trial = asyncio.create_task(self.client.chat({"messages": []}, timeout=5))
+        await asyncio.sleep(0.05)
+        with self.assertRaises(CircuitOpen):
+            await self.client.chat({"messages": []}, timeout=5)
+        self.gate.set()
+        self.assertEqual(await trial, OK_BODY)
+        self.assertEqual(self.requests, ["primary"])
+
+
+class HedgeTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.delays = {"primary": 0.0, "backup": 0.0}
+        self.cancelled: list[str] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            model = json.loads(request.content)["model"]
+            try:
+                await asyncio.sleep(self.delays[model])
+            except asyncio.CancelledError:
+                self.cancelled.append(model)
+                raise
+            return httpx.Response(200, json={**OK_BODY, "model": model})
+
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.client = ChatClient(self.http, "key", "https://llm.test", ["primary", "backup"])
+        patcher = mock.patch("bot.llm.HEDGE_DEFAULT_DELAY", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.http.aclose()
+
+    async def test_fast_primary_is_not_hedged(self) -> None:
+        result = await self.client.chat({"messages": []}, timeout=5)
+        self.assertEqual(result["model"], "primary")
+        self.assertEqual(len(self.client.latency["backup"]), 0)
+
+    async def test_slow_primary_is_hedged_and_the_loser_cancelled(self) -> None:
+        self.delays["primary"] = 2.0
+        result = await self.client.chat({"messages": []}, timeout=5)
+        self.assertEqual(result["model"], "backup")
+        await asyncio.sleep(0)
+        self.assertEqual(self.cancelled, ["primary"])
+        # Losing a race says nothing about the model's health
+        self.assertEqual(self.client.breakers["primary"].failures, 0)
+        self.assertFalse(self.client.breakers["primary"]._trial_inflight)
+
+    def test_hedge_delay_follows_recent_latency(self) -> None:
+        tracker = self.client.latency["primary"]
+        for seconds in (1, 3, 3, 4, 5, 6, 7, 8, 9, 10):
+            tracker.add(seconds)
+        self.assertEqual(self.client.hedge_delay("primary"), 10)
+        for _ in range(50):
+            tracker.add(0.1)
+        self.assertEqual(self.client.hedge_delay("primary"), 2.0)
+
+
+def _sse(*deltas: dict) -> bytes:
+    chunks = [{"choices": [{"delta": d, "finish_reason": None}]} for d in deltas]
+    return b"".join(f"data: {json.dumps(c)}\n\n".encode() for c in chunks) + b"data: [DONE]\n\n"
+
+
+class StreamTest(unittest.IsolatedAsyncioTestCase):
+    async def stream(self, body: bytes) -> tuple[dict, list[str]]:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body)
+
+        shown: list[str] = []
+
+        async def on_text(text: str) -> None:
+            shown.append(text)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            client = ChatClient(http, "key", "https://llm.test", ["primary"], stream=True)
+            result = await client.chat({"messages": []}, timeout=5, on_text=on_text)
+        return result, shown
+
+    async def test_answer_text_is_streamed(self) -> None:
+        result, shown = await self.stream(_sse({"content": "Gold "}, {"content": "hoards."}))
+        self.assertEqual(shown, ["Gold ", "Gold hoards."])
+        self.assertEqual(result["choices"][0]["message"]["content"], "Gold hoards.")
+
+    async def test_preamble_to_a_tool_round_is_withdrawn(self) -> None:
+        call = {"index": 0, "id": "c1", "function": {"name": "forest_search", "arguments": "{}"}}
+        result, shown = await self.stream(_sse(
+            {"content": "Let me look."}, {"tool_calls": [call]}, {"content": " More."},
+        ))
+        self.assertEqual(shown, ["Let me look.", ""])
+        self.assertEqual(result["choices"][0]["message"]["tool_calls"][0]["id"], "c1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""sanitize and chunk on malformed and pathological input.
+
+The scaling tests time each input at two sizes eight times apart; a
+quadratic pass would take ~64x as long on the larger one, a linear one
+~8x. Run with ``python -m pytest`` or ``python -m unittest``.
+"""
+
+from __future__ import annotations
+
+import time
+import unittest
+from collections.abc import Callable
+
+from bot.markup import CLOSE, OPEN, chunk, sanitize, tokens
+
+# Inputs that defeat naive tokenizers or repair loops, built to about n chars
+PATHOLOGICAL: dict[str, Callable[[int], str]] = {
+    "stray_lt": lambda n: "<" * n,
+    "unterminated_tags": lambda n: "<a " * (n // 3),
+    "unterminated_entities": lambda n: ("&" + "x" * 20) * (n // 21),
+    "deep_nesting": lambda n: "<b><i><u><s>" * (n // 12) + "text",
+    "misnested_closes": lambda n: "<b>" + "<i>" * (n // 6) + "</b>x" * (n // 10),
+    "reopen_storm": lambda n: "<b><i>x" + "</b>y<b>" * (n // 8),
+    "unknown_tags": lambda n: "<foo>" * (n // 5),
+    "tags_in_pre": lambda n: "<pre>" + "<b>x</b>" * (n // 8) + "</pre>",
+    "one_long_word": lambda n: "<b>" + "x" * n + "</b>",
+}
+
+SMALL = 5_000
+# Generous for timer noise, well short of quadratic
+MAX_GROWTH = 24.0
+
+
+def _balanced(html: str) -> bool:
+    stack: list[str] = []
+    for kind, _, name in tokens(html):
+        if kind == OPEN:
+            stack.append(name)
+        elif kind == CLOSE:
+            if not stack or stack.pop() != name:
+                return False
+    return not stack
+
+
+def _best_time(fn: Callable[[], object], runs: int = 5) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+class SanitizeTest(unittest.TestCase):
+    def test_repairs(self) -> None:
+        cases = [
+            ("a < b & c", "a &lt; b &amp; c"),
+            ("<b>bold", "<b>bold</b>"),
+            ("<b><i>x</b>y</i>", "<b><i>x</i></b><i>y</i>"),
+            ("<b><b>x</b></b>", "<b>x</b>"),
+            ("<blink>x</blink>", "&lt;blink&gt;x&lt;/blink&gt;"),
+            ("<pre><b>x</b></pre>", "<pre>&lt;b&gt;x&lt;/b&gt;</pre>"),
+            ("<h2>Title</h2>body", "<b>Title</b>\nbody"),
+            ("&nbsp;&amp;&#169;", "\xa0&amp;&#169;"),
+            ('<a href="x?a=1&b=2">l</a>', '<a href="x?a=1&amp;b=2">l</a>'),
+        ]
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(sanitize(raw), expected)
+
+    def test_output_is_balanced(self) -> None:
+        for name, make in PATHOLOGICAL.items():
+            with self.subTest(name):
+                self.assertTrue(_balanced(sanitize(make(1_000))))
+
+
+class ChunkTest(unittest.TestCase):
+    def test_short_text_is_one_piece(self) -> None:
+        self.assertEqual(chunk("<b>hi</b>", 100), ["<b>hi</b>"])
+
+    def test_pieces_fit_and_parse(self) -> None:
+        for name, make in PATHOLOGICAL.items():
+            html = sanitize(make(20_000))
+            with self.subTest(name):
+                for piece in chunk(html, 4096):
+                    self.assertLessEqual(len(piece), 4096)
+                    self.assertTrue(_balanced(piece))
+
+    def test_cuts_at_line_breaks(self) -> None:
+        html = "\n".join(f"<b>line {i}</b>" for i in range(100))
+        for piece in chunk(html, 200):
+            self.assertTrue(piece.endswith("</b>\n") or piece.endswith("</b>"), piece)
+
+
+class LinearTimeTest(unittest.TestCase):
+    def test_sanitize_and_chunk_scale_linearly(self) -> None:
+        for name, make in PATHOLOGICAL.items():
+            small, large = make(SMALL), make(SMALL * 8)
+            with self.subTest(name):
+                t_small = _best_time(lambda: chunk(sanitize(small)))
+                t_large = _best_time(lambda: chunk(sanitize(large)))
+                self.assertLess(
+                    t_large / t_small, MAX_GROWTH,
+                    f"{name}: {t_small * 1e3:.1f}ms at {len(small)} chars, "
+                    f"{t_large * 1e3:.1f}ms at {len(large)}",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
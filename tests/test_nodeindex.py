@@ -0,0 +1,158 @@
+"""NodeIndex lookups, IndexedForest ref resolution and background sync."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+from typing import Any
+
+from bot.forest_api import ForestAPIError
+from bot.nodeindex import IndexedForest, NodeIndex, UnknownRef
+
+
+def _id(n: int) -> str:
+    return f"{n:08x}-0000-4000-8000-000000000000"
+
+
+class FakeForest:
+    """Lists nodes newest first, like Forest, from a list the test can change mid-sync."""
+
+    def __init__(self, nodes: list[dict[str, Any]]) -> None:
+        self.nodes = nodes
+        self.on_page: Any = None
+        self.reads: list[str] = []
+
+    async def list_nodes(
+        self, query: str | None = None, tag: str | None = None, limit: int = 100, offset: int = 0,
+    ) -> dict[str, Any]:
+        page = self.nodes[offset:offset + limit]
+        has_more = offset + limit < len(self.nodes)
+        total = len(self.nodes)
+        if self.on_page is not None:
+            self.on_page(offset)
+        return {"nodes": page, "total": total, "has_more": has_more}
+
+    async def read(self, ref: str) -> dict[str, Any]:
+        self.reads.append(ref)
+        for node in self.nodes:
+            if node["id"].startswith(ref):
+                return {"node": node, "body": ""}
+        raise ForestAPIError(f"Node {ref} not found", status=404)
+
+
+class NodeIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = NodeIndex()
+        self.index.add_many([
+            {"id": _id(0xABC0001), "title": "Dwarven economy"},
+            {"id": _id(0xABC0002), "title": "Elven trade routes"},
+            {"id": _id(0x1234567), "title": "Scoring rules"},
+        ])
+
+    def test_prefix_lookup(self) -> None:
+        self.assertEqual(self.index.by_prefix("0abc"), [_id(0xABC0001), _id(0xABC0002)])
+        self.assertTrue(self.index.resolves("01234567"))
+        self.assertFalse(self.index.resolves("0abc"))
+
+    def test_title_lookup_is_fuzzy(self) -> None:
+        [(node_id, ratio)] = self.index.by_title("dwarven economics")
+        self.assertEqual(node_id, _id(0xABC0001))
+        self.assertGreater(ratio, 0.8)
+
+    def test_retitle_and_remove(self) -> None:
+        self.index.add({"id": _id(0xABC0001), "title": "Gnomish economy"})
+        self.assertEqual(self.index.by_title("dwarven"), [])
+        self.index.remove(_id(0xABC0001))
+        self.assertNotIn(_id(0xABC0001), self.index)
+        self.assertEqual(self.index.by_title("gnomish economy"), [])
+
+
+class IndexedForestTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.forest = FakeForest([
+            {"id": _id(n), "title": f"Node number {n}"} for n in range(0x100, 0x10A)
+        ])
+        self.indexed = IndexedForest(self.forest)  # type: ignore[arg-type]
+        await self.indexed.sync()
+
+    async def test_prefix_resolves_locally(self) -> None:
+        data = await self.indexed.read(_id(0x105)[:8])
+        self.assertEqual(data["node"]["id"], _id(0x105))
+        self.assertEqual(self.forest.reads, [_id(0x105)])
+
+    async def test_ambiguous_prefix_fails_with_candidates(self) -> None:
+        with self.assertRaises(UnknownRef) as ctx:
+            await self.indexed.read("0000010")
+        self.assertEqual(len(ctx.exception.suggestions), 5)
+        self.assertEqual(self.forest.reads, [])
+
+    async def test_unindexed_ref_goes_to_forest(self) -> None:
+        self.forest.nodes.insert(0, {"id": _id(0x999), "title": "Fresh"})
+        data = await self.indexed.read(_id(0x999)[:8])
+        self.assertEqual(data["node"]["title"], "Fresh")
+        self.assertIn(_id(0x999), self.indexed.index)
+
+    async def test_deleted_node_is_dropped_on_404(self) -> None:
+        del self.forest.nodes[0]
+        with self.assertRaises(LookupError):
+            await self.indexed.read(_id(0x100))
+        self.assertNotIn(_id(0x100), self.indexed.index)
+
+    async def test_sync_under_a_shifting_listing_keeps_live_nodes(self) -> None:
+        # Two nodes on page 1 are deleted once it's fetched: page 2 starts two nodes late
+        def delete_once(offset: int) -> None:
+            if offset == 0:
+                del self.forest.nodes[:2]
+                self.forest.on_page = None
+
+        self.forest.on_page = delete_once
+        with mock.patch("bot.nodeindex.SYNC_PAGE_SIZE", 4):
+            await self.indexed.sync()
+        # 0x104 and 0x105 slid back across the page boundary: missed, but still live
+        self.assertEqual(len(self.indexed.index), 10)
+
+        with mock.patch("bot.nodeindex.SYNC_PAGE_SIZE", 4):
+            await self.indexed.sync()
+            self.assertEqual(len(self.indexed.index), 10)
+            await self.indexed.sync()
+        self.assertEqual(len(self.indexed.index), 8)
+        self.assertIn(_id(0x104), self.indexed.index)
+        self.assertNotIn(_id(0x100), self.indexed.index)
+
+    async def test_node_missed_by_two_syncs_is_dropped(self) -> None:
+        del self.forest.nodes[3]
+        await self.indexed.sync()
+        self.assertIn(_id(0x103), self.indexed.index)
+        await self.indexed.sync()
+        self.assertNotIn(_id(0x103), self.indexed.index)
+
+    async def test_miss_then_seen_again_is_forgiven(self) -> None:
+        node = self.forest.nodes.pop(3)
+        await self.indexed.sync()
+        self.forest.nodes.insert(3, node)
+        await self.indexed.sync()
+        self.forest.nodes.pop(3)
+        await self.indexed.sync()
+        self.assertIn(_id(0x103), self.indexed.index)
+
+    async def test_phase_brings_the_second_sync_forward(self) -> None:
+        pages: list[int] = []
+        self.forest.on_page = lambda offset: pages.append(offset)
+        slept: list[float] = []
+
+        async def sleep(delay: float) -> None:
+            slept.append(delay)
+            if len(slept) == 3:
+                raise asyncio.CancelledError
+
+        with mock.patch("bot.nodeindex.asyncio.sleep", sleep):
+            self.indexed.start(1800, phase=900)
+            with self.assertRaises(asyncio.CancelledError):
+                await self.indexed._syncer  # type: ignore[misc]
+        self.assertEqual(slept, [900, 1800, 1800])
+        self.assertEqual(len(pages), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
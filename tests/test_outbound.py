@@ -0,0 +1,125 @@
+"""Rate limiting, edit coalescing and chat actions in Outbound."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import Any
+from unittest import mock
+
+from telegram.error import RetryAfter
+
+from bot.outbound import CHAT_BURST, Outbound, TokenBucket
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _drained() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = Clock()
+        patcher = mock.patch("bot.outbound.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_refill_at_rate(self) -> None:
+        bucket = TokenBucket(rate=2.0, burst=3)
+        for _ in range(3):
+            self.assertTrue(bucket.ready())
+            bucket.take_now()
+        self.assertFalse(bucket.ready())
+        self.clock.now += 0.5
+        self.assertTrue(bucket.ready())
+        self.clock.now += 10
+        self.assertTrue(bucket.full())
+
+    def test_pause_holds_tokens_back(self) -> None:
+        bucket = TokenBucket(rate=1.0, burst=3)
+        bucket.pause(5)
+        self.clock.now += 5.5
+        self.assertFalse(bucket.ready())
+        self.clock.now += 0.5
+        self.assertTrue(bucket.ready())
+
+
+class OutboundTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: list[str] = []
+
+    def call(self, text: str) -> Any:
+        async def _call() -> str:
+            self.sent.append(text)
+            return text
+
+        return _call
+
+    async def test_chat_sends_keep_their_order_and_are_paced(self) -> None:
+        outbound = Outbound(rate=1000, chat_rate=20)
+        calls = [outbound.send(1, self.call(str(i))) for i in range(CHAT_BURST + 3)]
+        self.assertEqual(await asyncio.gather(*calls), [str(i) for i in range(CHAT_BURST + 3)])
+        self.assertEqual(self.sent, [str(i) for i in range(CHAT_BURST + 3)])
+        self.assertGreater(outbound.metrics()["throttled"], 0)
+        self.assertEqual(outbound.metrics()["queued"], 0)
+
+    async def test_flood_limit_is_retried(self) -> None:
+        outbound = Outbound(rate=1000, chat_rate=1000)
+        attempts = 0
+
+        async def flaky() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RetryAfter(0)
+            return "ok"
+
+        self.assertEqual(await outbound.send(1, flaky), "ok")
+        self.assertEqual(outbound.retry_after, 1)
+
+    async def test_edits_waiting_for_a_token_collapse_to_the_latest(self) -> None:
+        outbound = Outbound(rate=1000, chat_rate=1000)
+        for i in range(5):
+            outbound.coalesce("status", 1, self.call(f"edit {i}"))
+        await _drained()
+        self.assertEqual(self.sent, ["edit 4"])
+        self.assertEqual(outbound.coalesced, 4)
+
+    async def test_settle_drops_the_unsent_edit(self) -> None:
+        outbound = Outbound(rate=1000, chat_rate=1000)
+        gate = asyncio.Event()
+
+        async def slow() -> None:
+            await gate.wait()
+            self.sent.append("first")
+
+        outbound.coalesce("status", 1, slow)
+        await _drained()
+        outbound.coalesce("status", 1, self.call("second"))
+        settling = asyncio.create_task(outbound.settle("status"))
+        await _drained()
+        self.assertFalse(settling.done())
+        gate.set()
+        await settling
+        await _drained()
+        self.assertEqual(self.sent, ["first"])
+
+    async def test_typing_is_dropped_while_still_showing(self) -> None:
+        outbound = Outbound(rate=1000, chat_rate=1000)
+        self.assertTrue(await outbound.typing(1, self.call("typing")))
+        self.assertFalse(await outbound.typing(1, self.call("typing")))
+        await outbound.send(1, self.call("reply"))
+        self.assertTrue(await outbound.typing(1, self.call("typing")))
+        self.assertEqual(outbound.typing_dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+"""The page cache behind Prev/Next buttons."""
+
+from __future__ import annotations
+
+import unittest
+
+from bot.pages import PageCache
+
+
+class PageCacheTest(unittest.TestCase):
+    def test_pages_by_message(self) -> None:
+        cache = PageCache()
+        cache.put(1, 10, ["one", "two"])
+        self.assertEqual(cache.get(1, 10, 1), ("two", 2))
+        self.assertIsNone(cache.get(1, 10, 2))
+        self.assertIsNone(cache.get(1, 10, -1))
+        self.assertIsNone(cache.get(2, 10, 0))
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_least_recently_flipped_is_evicted(self) -> None:
+        cache = PageCache(max_entries=2)
+        cache.put(1, 10, ["a"])
+        cache.put(1, 11, ["b"])
+        cache.get(1, 10, 0)
+        cache.put(1, 12, ["c"])
+        self.assertIsNotNone(cache.get(1, 10, 0))
+        self.assertIsNone(cache.get(1, 11, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Slot limits, deadlines and child cleanup in ProcessPool."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from bot import deadline
+from bot.procpool import ProcessPool
+
+SLEEP = "import sys, time; time.sleep(float(sys.argv[1]))"
+
+
+def _alive(pid: int) -> bool:
+    """True if ``pid`` is running (an unreaped zombie doesn't count)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+class ProcessPoolTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_runs_with_stdin_and_reports_exit_status(self) -> None:
+        pool = ProcessPool()
+        code, out, err = await pool.run(
+            sys.executable, "-c", "import sys; d = sys.stdin.read(); print(d.upper()); sys.exit(3)",
+            stdin=b"gold",
+        )
+        self.assertEqual((code, out.strip(), err), (3, b"GOLD", b""))
+
+    async def test_children_beyond_the_limit_wait_for_a_slot(self) -> None:
+        pool = ProcessPool(max_concurrent=2)
+        started = time.monotonic()
+        await asyncio.gather(*(pool.run(sys.executable, "-c", SLEEP, "0.3") for _ in range(3)))
+        self.assertGreaterEqual(time.monotonic() - started, 0.6)
+        self.assertEqual(pool.metrics()["max_waiting"], 1)
+        self.assertGreater(pool.metrics()["max_wait"], 0.2)
+        self.assertEqual(pool.runs, 3)
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "needs /proc to inspect processes")
+    async def test_timeout_kills_the_child_and_its_children(self) -> None:
+        pool = ProcessPool()
+        with tempfile.TemporaryDirectory() as tmp:
+            pidfile = os.path.join(tmp, "grandchild")
+            script = (
+                "import subprocess, sys, time\n"
+                f"p = subprocess.Popen([sys.executable, '-c', {SLEEP!r}, '30'])\n"
+                f"open({pidfile!r}, 'w').write(str(p.pid))\n"
+                "time.sleep(30)\n"
+            )
+            with self.assertRaises(asyncio.TimeoutError):
+                await pool.run(sys.executable, "-c", script, timeout=1.0)
+            with open(pidfile) as f:
+                grandchild = int(f.read())
+        for _ in range(50):
+            if not _alive(grandchild):
+                break
+            await asyncio.sleep(0.02)
+        self.assertFalse(_alive(grandchild))
+        self.assertEqual(pool.killed, 1)
+
+    async def test_deadline_bounds_the_wait_for_a_slot(self) -> None:
+        pool = ProcessPool(max_concurrent=1)
+        busy = asyncio.create_task(pool.run(sys.executable, "-c", SLEEP, "2"))
+        await asyncio.sleep(0.05)
+        with deadline.scope(0.2):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                await pool.run(sys.executable, "-c", "pass")
+        busy.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await busy
+        self.assertEqual(pool.killed, 1)
+        self.assertEqual(pool.waiting, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Per-tool projection of results sent to the LLM, and the sampled size report."""
+
+from __future__ import annotations
+
+import json
+import unittest
+from unittest import mock
+
+from bot import projection
+from bot.projection import READ_BODY_CHARS, SizeReport, encode_result
+
+NODE = {
+    "id": "3f2a9c1e-0000-4000-8000-000000000000",
+    "title": "Dwarven economy",
+    "tags": ["lore"],
+    "createdAt": "2026-01-01T00:00:00Z",
+    "edges": [{"id": "e1", "weight": 0.9}],
+    "bodyPreview": "Gold " * 100,
+}
+
+
+class ProjectionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(projection, "size_report", SizeReport())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_search_keeps_refs_scores_and_a_preview(self) -> None:
+        raw = {"query": "gold", "total": 1, "results": [{**NODE, "similarity": 0.87654}]}
+        [hit] = json.loads(encode_result("forest_search", raw, {}))["results"]
+        self.assertEqual(set(hit), {"id", "title", "tags", "score", "preview"})
+        self.assertEqual(hit["score"], 0.877)
+        self.assertEqual(len(hit["preview"]), projection.PREVIEW_CHARS)
+
+    def test_read_pages_long_bodies(self) -> None:
+        body = "x" * (READ_BODY_CHARS + 10)
+        first = json.loads(encode_result("forest_read", {"node": NODE, "body": body}, {}))
+        self.assertEqual(len(first["body"]), READ_BODY_CHARS)
+        self.assertIn(f"offset={READ_BODY_CHARS}", first["truncated"])
+        rest = json.loads(encode_result(
+            "forest_read", {"node": NODE, "body": body}, {"offset": READ_BODY_CHARS},
+        ))
+        self.assertEqual(rest["body"], "x" * 10)
+        self.assertNotIn("truncated", rest)
+
+    def test_bad_offset_reads_from_the_start(self) -> None:
+        out = json.loads(encode_result("forest_read", {"node": NODE, "body": "abc"}, {"offset": "x"}))
+        self.assertEqual(out["body"], "abc")
+
+    def test_pending_capture_reports_the_provisional_id(self) -> None:
+        out = json.loads(encode_result(
+            "forest_capture", {"pending": True, "node": {"id": "c-1234"}}, {},
+        ))
+        self.assertEqual(out["provisional_id"], "c-1234")
+
+    def test_unknown_tools_and_non_dicts_pass_through(self) -> None:
+        self.assertEqual(json.loads(encode_result("novel_list", {"a": 1}, {})), {"a": 1})
+        self.assertEqual(encode_result("forest_read", "plain text", {}), '"plain text"')
+
+
+class SizeReportTest(unittest.TestCase):
+    def test_one_call_in_n_is_measured(self) -> None:
+        report = SizeReport(sample_every=3)
+        with mock.patch.object(projection, "size_report", report):
+            for _ in range(7):
+                encode_result("forest_search", {"results": [NODE]}, {})
+        summary = report.summary()["forest_search"]
+        self.assertEqual(summary["calls"], 7)
+        self.assertEqual(summary["sampled"], 3)
+        self.assertGreater(summary["raw_bytes"], summary["sent_bytes"])
+        self.assertGreater(summary["saved_pct"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
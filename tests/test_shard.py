@@ -0,0 +1,38 @@
+"""Routing raw updates to sharded workers by chat id."""
+
+from __future__ import annotations
+
+import unittest
+
+from bot.shard import chat_id_of
+
+
+class ChatIdOfTest(unittest.TestCase):
+    def test_chat_of_each_update_kind(self) -> None:
+        cases = {
+            "message": ({"update_id": 1, "message": {"chat": {"id": 42}}}, 42),
+            "edited": ({"update_id": 1, "edited_message": {"chat": {"id": -100}}}, -100),
+            "channel": ({"update_id": 1, "channel_post": {"chat": {"id": 7}}}, 7),
+            "button": (
+                {"update_id": 1, "callback_query": {"from": {"id": 9}, "message": {"chat": {"id": 42}}}},
+                42,
+            ),
+            "inline button": ({"update_id": 1, "callback_query": {"from": {"id": 9}}}, 9),
+            "sender only": ({"update_id": 1, "inline_query": {"from": {"id": 5}}}, 5),
+            "nothing": ({"update_id": 1, "poll": {"id": "p"}}, 0),
+        }
+        for name, (data, expected) in cases.items():
+            with self.subTest(name):
+                self.assertEqual(chat_id_of(data), expected)
+
+    def test_a_chat_always_lands_on_one_worker(self) -> None:
+        updates = [
+            {"update_id": 1, "message": {"chat": {"id": 42}}},
+            {"update_id": 2, "callback_query": {"from": {"id": 9}, "message": {"chat": {"id": 42}}}},
+            {"update_id": 3, "edited_message": {"chat": {"id": 42}}},
+        ]
+        self.assertEqual({chat_id_of(u) % 4 for u in updates}, {42 % 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
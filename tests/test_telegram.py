@@ -0,0 +1,102 @@
+"""Streamed drafts and status messages in the Telegram front end."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import Any
+
+from bot.outbound import Outbound
+from bot.telegram import _DraftMessage, _StatusMessage
+
+
+class FakeMessage:
+    """A sent Telegram message that logs what happens to it."""
+
+    def __init__(self, log: list[tuple[str, str]], text: str = "", message_id: int = 1) -> None:
+        self.log = log
+        self.text = text
+        self.chat_id = 1
+        self.message_id = message_id
+
+    async def reply_text(self, text: str, **kwargs: Any) -> FakeMessage:
+        self.log.append(("send", text))
+        return FakeMessage(self.log, text, self.message_id + 1)
+
+    async def edit_text(self, text: str, **kwargs: Any) -> None:
+        self.log.append(("edit", text))
+        self.text = text
+
+    async def delete(self) -> None:
+        self.log.append(("delete", self.text))
+
+
+async def _drained() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class DraftMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.log: list[tuple[str, str]] = []
+        self.draft = _DraftMessage(Outbound(rate=1000, chat_rate=1000), FakeMessage(self.log))
+
+    async def test_finish_replaces_the_draft(self) -> None:
+        await self.draft.update("Gold")
+        await _drained()
+        self.assertTrue(await self.draft.finish("<b>Gold</b> hoards"))
+        self.assertEqual(self.log, [("send", "Gold"), ("edit", "<b>Gold</b> hoards")])
+
+    async def test_empty_text_withdraws_the_draft(self) -> None:
+        await self.draft.update("Let me look that up")
+        await _drained()
+        await self.draft.update("")
+        await self.draft.update("Gold")
+        await _drained()
+        self.assertEqual(self.log, [
+            ("send", "Let me look that up"),
+            ("delete", "Let me look that up"),
+            ("send", "Gold"),
+        ])
+
+    async def test_empty_reply_does_not_leave_the_draft_standing(self) -> None:
+        await self.draft.update("Half an answer")
+        await _drained()
+        self.assertFalse(await self.draft.finish(""))
+        self.assertEqual(self.log[-1], ("delete", "Half an answer"))
+
+    async def test_nothing_streamed_leaves_the_reply_to_the_caller(self) -> None:
+        self.assertFalse(await self.draft.finish("Answer"))
+        self.assertEqual(self.log, [])
+
+
+class StatusMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.log: list[tuple[str, str]] = []
+        self.origin = FakeMessage(self.log)
+        self.status = _StatusMessage(
+            Outbound(rate=1000, chat_rate=1000), 1, ("status", 1), self.origin.reply_text,
+        )
+
+    async def test_updates_edit_one_message_then_close_deletes_it(self) -> None:
+        self.status.update("Searching…")
+        await _drained()
+        self.status.update("Reading 3f2a9c1e…")
+        self.status.update("Reading 9b1c2d3e…")
+        await _drained()
+        await self.status.close()
+        self.assertEqual(self.log, [
+            ("send", "Searching…"),
+            ("edit", "Reading 9b1c2d3e…"),
+            ("delete", "Reading 9b1c2d3e…"),
+        ])
+
+    async def test_close_before_anything_was_sent(self) -> None:
+        self.status.update("Searching…")
+        await self.status.close()
+        await _drained()
+        self.assertEqual(self.log, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Shared upstream clients: reuse, warm-up and pool wait measurement."""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from bot.transport import Transport
+
+
+class TinyServer:
+    """Keep-alive HTTP/1.1 server on localhost that answers every request with "ok"."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        assert self._server is not None
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while head := await reader.readuntil(b"\r\n\r\n"):
+                body = b"" if head.startswith(b"HEAD ") else b"ok"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class TransportTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = TinyServer()
+        self.url = await self.server.start()
+        self.transport = Transport()
+
+    async def asyncTearDown(self) -> None:
+        await self.transport.close()
+        await self.server.stop()
+
+    async def test_one_client_per_upstream(self) -> None:
+        forest = self.transport.client("forest", self.url)
+        self.assertIs(self.transport.client("forest", self.url), forest)
+        self.assertIsNot(self.transport.client("openrouter", self.url), forest)
+        self.assertEqual(set(self.transport.metrics()), {"forest", "openrouter"})
+
+    async def test_connections_are_reused_and_counted(self) -> None:
+        client = self.transport.client("forest", self.url)
+        for _ in range(3):
+            self.assertEqual((await client.get(self.url)).text, "ok")
+        stats = self.transport.metrics()["forest"]
+        self.assertEqual((stats["requests"], stats["new_connections"]), (3, 1))
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_warm_up_leaves_a_pooled_connection(self) -> None:
+        client = self.transport.client("forest", self.url)
+        await self.transport.warm_up()
+        await client.get(self.url)
+        self.assertEqual(self.transport.metrics()["forest"]["new_connections"], 1)
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_failed_warm_up_is_not_fatal(self) -> None:
+        await self.server.stop()
+        self.server = TinyServer()
+        await self.server.start()
+        self.transport.client("forest", self.url)
+        with self.assertLogs("bot.transport", "WARNING"):
+            await self.transport.warm_up()
+
+
+if __name__ == "__main__":
+    unittest.main()
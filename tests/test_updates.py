@@ -0,0 +1,86 @@
+"""Per-chat ordering and the fast lane in ChatOrderedUpdateProcessor."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import unittest
+
+from telegram import Chat, Message, Update
+
+from bot.updates import ChatOrderedUpdateProcessor, is_fast_update
+
+
+def _update(update_id: int, chat_id: int, text: str) -> Update:
+    message = Message(
+        message_id=update_id,
+        date=datetime.datetime.now(datetime.timezone.utc),
+        chat=Chat(chat_id, Chat.PRIVATE),
+        text=text,
+    )
+    return Update(update_id, message=message)
+
+
+class ChatOrderedUpdateProcessorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.processor = ChatOrderedUpdateProcessor(max_concurrent=4, fast_concurrent=2)
+        self.log: list[str] = []
+        self.release = asyncio.Event()
+
+    async def handle(self, label: str, wait: bool = False) -> None:
+        self.log.append(f"start {label}")
+        if wait:
+            await self.release.wait()
+        self.log.append(f"end {label}")
+
+    async def run_all(self, *runs: tuple[Update, str, bool]) -> list[asyncio.Task]:
+        tasks = []
+        for update, label, wait in runs:
+            tasks.append(asyncio.create_task(
+                self.processor.do_process_update(update, self.handle(label, wait))
+            ))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return tasks
+
+    def test_fast_updates(self) -> None:
+        self.assertTrue(is_fast_update(_update(1, 1, "/read 3f2a9c1e")))
+        self.assertTrue(is_fast_update(_update(1, 1, "/stats@jack_bot")))
+        self.assertFalse(is_fast_update(_update(1, 1, "/capture Title | Body")))
+        self.assertFalse(is_fast_update(_update(1, 1, "what do we know?")))
+        self.assertFalse(is_fast_update(object()))
+
+    async def test_chat_updates_run_in_order(self) -> None:
+        tasks = await self.run_all(
+            (_update(1, 1, "first"), "a1", True),
+            (_update(2, 1, "second"), "a2", False),
+            (_update(3, 2, "other chat"), "b1", False),
+        )
+        # a2 waits behind a1; chat 2 doesn't
+        self.assertEqual(self.log, ["start a1", "start b1", "end b1"])
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.log[3:], ["end a1", "start a2", "end a2"])
+        self.assertEqual(self.processor._chat_locks, {})
+
+    async def test_fast_lane_skips_the_chat_queue(self) -> None:
+        tasks = await self.run_all(
+            (_update(1, 1, "slow question"), "slow", True),
+            (_update(2, 1, "/read 3f2a9c1e"), "read", False),
+        )
+        self.assertEqual(self.log, ["start slow", "start read", "end read"])
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_fast_lane_has_its_own_limit(self) -> None:
+        tasks = await self.run_all(*(
+            (_update(i, i, "/stats"), f"stats{i}", True) for i in range(3)
+        ))
+        self.assertEqual(self.log, ["start stats0", "start stats1"])
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.log.count("end stats2"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
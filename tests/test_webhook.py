@@ -0,0 +1,232 @@
+"""WebhookServer against a fake Telegram client speaking raw HTTP/1.1.
+
+Run with ``python -m pytest`` or ``python -m unittest``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from typing import Any
+
+from bot.telegram import _update_enqueuer
+from bot.webhook import SECRET_HEADER, WebhookServer
+
+SECRET = "s3cret"
+UPDATE = {"update_id": 1, "message": {"message_id": 1, "text": "hi"}}
+
+
+class FakeTelegram:
+    """Delivers updates the way Telegram does: POSTs over a keep-alive connection."""
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+    async def send_raw(self, data: bytes) -> None:
+        if self.writer is None:
+            await self.connect()
+        assert self.writer is not None
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def request(
+        self,
+        body: bytes | None = None,
+        *,
+        method: str = "POST",
+        path: str = "/telegram",
+        secret: str | None = SECRET,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, dict[str, str]]:
+        body = json.dumps(UPDATE).encode() if body is None else body
+        lines = [f"{method} {path} HTTP/1.1", "Host: bot", "Content-Type: application/json"]
+        if secret is not None:
+            lines.append(f"{SECRET_HEADER}: {secret}")
+        all_headers = {"Content-Length": str(len(body)), **(headers or {})}
+        lines += [f"{k}: {v}" for k, v in all_headers.items() if v is not None]
+        await self.send_raw(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        return await self.response()
+
+    async def response(self) -> tuple[int, dict[str, str]]:
+        assert self.reader is not None
+        status_line = await asyncio.wait_for(self.reader.readline(), 5)
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+        headers: dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        if length:
+            await self.reader.readexactly(length)
+        return status, headers
+
+    async def closed_by_server(self) -> bool:
+        assert self.reader is not None
+        return await asyncio.wait_for(self.reader.read(), 5) == b""
+
+
+class WebhookServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.updates: list[dict[str, Any]] = []
+        self.fail_updates = False
+
+        async def on_update(data: dict[str, Any]) -> None:
+            if self.fail_updates:
+                raise RuntimeError("queue full")
+            self.updates.append(data)
+
+        self.server = WebhookServer(
+            on_update, SECRET, port=0, read_timeout=0.5, idle_timeout=1.0,
+        )
+        await self.server.start()
+        self.telegram = FakeTelegram(self.server.port)
+
+    async def asyncTearDown(self) -> None:
+        await self.telegram.close()
+        await self.server.stop()
+
+    async def test_accepts_update_with_secret(self) -> None:
+        status, headers = await self.telegram.request()
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["connection"], "keep-alive")
+        self.assertEqual(self.updates, [UPDATE])
+        self.assertEqual(self.server.received, 1)
+
+    async def test_keep_alive_serves_several_updates(self) -> None:
+        for _ in range(3):
+            status, _ = await self.telegram.request()
+            self.assertEqual(status, 200)
+        self.assertEqual(len(self.updates), 3)
+
+    async def test_rejects_missing_or_wrong_secret(self) -> None:
+        status, _ = await self.telegram.request(secret=None)
+        self.assertEqual(status, 403)
+        status, _ = await self.telegram.request(secret="wrong")
+        self.assertEqual(status, 403)
+        self.assertEqual(self.updates, [])
+        self.assertEqual(self.server.rejected, 2)
+
+    async def test_error_responses(self) -> None:
+        cases = [
+            ({"path": "/elsewhere"}, 404),
+            ({"method": "GET"}, 405),
+            ({"body": b"not json"}, 400),
+            ({"body": b"[1, 2]"}, 400),
+        ]
+        for kwargs, expected in cases:
+            with self.subTest(**{k: str(v) for k, v in kwargs.items()}):
+                status, _ = await self.telegram.request(**kwargs)
+                self.assertEqual(status, expected)
+        self.assertEqual(self.updates, [])
+
+    async def test_missing_length_closes_connection(self) -> None:
+        status, headers = await self.telegram.request(headers={"Content-Length": None})
+        self.assertEqual(status, 411)
+        self.assertEqual(headers["connection"], "close")
+        self.assertTrue(await self.telegram.closed_by_server())
+
+    async def test_oversized_body_rejected_unread(self) -> None:
+        await self.telegram.send_raw(
+            b"POST /telegram HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n"
+        )
+        status, _ = await self.telegram.response()
+        self.assertEqual(status, 413)
+
+    async def test_failed_enqueue_asks_for_redelivery(self) -> None:
+        self.fail_updates = True
+        status, _ = await self.telegram.request()
+        self.assertEqual(status, 503)
+
+    async def test_slow_request_times_out(self) -> None:
+        # Headers promise a body that never comes
+        await self.telegram.send_raw(
+            f"POST /telegram HTTP/1.1\r\n{SECRET_HEADER}: {SECRET}\r\n"
+            f"Content-Length: 100\r\n\r\n{{".encode()
+        )
+        status, headers = await self.telegram.response()
+        self.assertEqual(status, 408)
+        self.assertEqual(headers["connection"], "close")
+        self.assertTrue(await self.telegram.closed_by_server())
+
+    async def test_idle_connection_dropped(self) -> None:
+        await self.telegram.connect()
+        self.assertTrue(await self.telegram.closed_by_server())
+
+    async def test_stop_drops_idle_connections(self) -> None:
+        status, _ = await self.telegram.request()
+        self.assertEqual(status, 200)
+        await asyncio.wait_for(self.server.stop(), 2)
+        self.assertTrue(await self.telegram.closed_by_server())
+        with self.assertRaises(OSError):
+            await asyncio.open_connection("127.0.0.1", self.telegram.port)
+
+    async def test_stop_finishes_request_in_progress(self) -> None:
+        body = json.dumps(UPDATE).encode()
+        await self.telegram.send_raw(
+            f"POST /telegram HTTP/1.1\r\n{SECRET_HEADER}: {SECRET}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+        )
+        await asyncio.sleep(0.05)
+        stopping = asyncio.create_task(self.server.stop())
+        await asyncio.sleep(0.05)
+        await self.telegram.send_raw(body)
+        status, headers = await self.telegram.response()
+        await asyncio.wait_for(stopping, 2)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["connection"], "close")
+        self.assertEqual(self.updates, [UPDATE])
+
+
+
+class WebhookUpdateQueueTest(unittest.IsolatedAsyncioTestCase):
+    """The bot's enqueue hook: malformed updates are acked, a full queue is not."""
+
+    async def asyncSetUp(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.server = WebhookServer(_update_enqueuer(self.queue, None), SECRET, port=0)
+        await self.server.start()
+        self.telegram = FakeTelegram(self.server.port)
+
+    async def asyncTearDown(self) -> None:
+        await self.telegram.close()
+        await self.server.stop()
+
+    async def test_malformed_update_is_acked_and_dropped(self) -> None:
+        # A message without a date won't parse into an Update
+        status, _ = await self.telegram.request()
+        self.assertEqual(status, 200)
+        self.assertTrue(self.queue.empty())
+
+    async def test_full_queue_asks_for_redelivery(self) -> None:
+        update = {
+            "update_id": 2,
+            "message": {
+                "message_id": 1, "date": 0, "text": "hi",
+                "chat": {"id": 1, "type": "private"},
+            },
+        }
+        body = json.dumps(update).encode()
+        status, _ = await self.telegram.request(body)
+        self.assertEqual(status, 200)
+        self.assertEqual(self.queue.qsize(), 1)
+        status, _ = await self.telegram.request(body)
+        self.assertEqual(status, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()